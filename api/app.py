@@ -1,4 +1,6 @@
 import logging
+import time
+import click
 from flask import (
     Flask,
     request,
@@ -12,15 +14,24 @@ from flask_restx import Namespace, reqparse, Api, Resource
 from api.config import *
 from pyldapi import Renderer
 from api.model import *
+from api.dggs import store, zone_count, Zone
+from api.cache import cached
 from rdflib import Graph, Literal, URIRef
 from rdflib.namespace import DCAT, DCTERMS, RDF
 
 app = Flask(__name__, template_folder=TEMPLATES_DIR, static_folder=STATIC_DIR)
+if METRICS:
+    from api.metrics import instrument
+    instrument(app)
+if PROFILE_REQUESTS:
+    from api.profiling import ProfilingMiddleware
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app)
 
 blueprint = Blueprint('api', __name__)
 
 
 @app.route("/")
+@cached
 def landing_page():
     try:
         return LandingPageRenderer(request).render()
@@ -97,6 +108,7 @@ class ConformanceRoute(Resource):
 
 @api.route("/collections")
 class CollectionsRoute(Resource):
+    @cached
     def get(self):
         return CollectionsRenderer(request).render()
 
@@ -104,6 +116,7 @@ class CollectionsRoute(Resource):
 @api.route("/collections/<string:collection_id>")
 @api.param("collection_id", "The ID of a Collection delivered by this API. See /collections for the list.")
 class CollectionRoute(Resource):
+    @cached
     def get(self, collection_id):
         g = get_graph()
         # get the URI for the Collection using the ID
@@ -124,14 +137,24 @@ class CollectionRoute(Resource):
 @api.route("/collections/<string:collection_id>/items")
 @api.param("collection_id", "The ID of a Collection delivered by this API. See /collections for the list.")
 class FeaturesRoute(Resource):
+    @cached
     def get(self, collection_id):
         return FeaturesRenderer(request, collection_id).render()
 
 
+@api.route("/collections/<string:collection_id>/export")
+@api.param("collection_id", "The ID of a grid Collection delivered by this API, g0 - g15")
+@api.param("bbox", "Only export the Zones within this bbox, in any of the forms /items takes")
+class ExportRoute(Resource):
+    def get(self, collection_id):
+        return ExportRenderer(request, collection_id).render()
+
+
 @api.route("/collections/<string:collection_id>/items/<string:item_id>")
 @api.param("collection_id", "The ID of a Collection delivered by this API. See /collections for the list.")
 @api.param("item_id", "The ID of a Feature in this Collection's list of Items")
 class FeatureRoute(Resource):
+    @cached
     def get(self, collection_id, item_id):
         g = get_graph()
         # get the URI for the Collection using the ID
@@ -146,8 +169,17 @@ class FeatureRoute(Resource):
                 mimetype="text/plain"
             )
 
+        try:
+            zone = Zone.parse(item_id)
+        except ValueError:
+            return Response(
+                "You have entered an invalid Feature ID. It must be a TB16Pix Zone ID, e.g. R1234",
+                status=400,
+                mimetype="text/plain"
+            )
+
         # get URI
-        uri = "https://w3id.org/dggs/tb16pix/zone/{}".format(item_id)
+        uri = "https://w3id.org/dggs/tb16pix/zone/{}".format(zone)
         return FeatureRenderer(request, uri).render()
 
         # return Response(
@@ -157,12 +189,76 @@ class FeatureRoute(Resource):
         # )
 
 
+@api.route("/collections/<string:collection_id>/items/<string:item_id>/descendants")
+@api.param("collection_id", "The ID of a grid Collection delivered by this API, g0 - g15")
+@api.param("item_id", "The ID of a Zone in this grid")
+@api.param("resolution", "The resolution of the descendants to list, or a range of them, e.g. 7-9. Default the children's")
+@api.param("offset", "How many of the descendants to skip")
+@api.param("limit", "The most descendants to list. Default all")
+class DescendantsRoute(Resource):
+    @cached
+    def get(self, collection_id, item_id):
+        return DescendantsRenderer(request, collection_id, item_id).render()
+
+
+@api.route("/neighbours")
+@api.param("zones", "A comma-separated list of Zone IDs, or POST a JSON list of them")
+class NeighboursRoute(Resource):
+    @cached
+    def get(self):
+        return NeighboursRenderer(request).render()
+
+    def post(self):
+        return NeighboursRenderer(request).render()
+
+
+@api.route("/features")
+@api.param("zones", "A comma-separated list of Zone IDs, or POST a JSON list of them")
+class FeaturesBatchRoute(Resource):
+    @cached
+    def get(self):
+        return FeaturesBatchRenderer(request).render()
+
+    def post(self):
+        return FeaturesBatchRenderer(request).render()
+
+
+@api.route("/locate")
+@api.param("resolution", "The resolution of the Zones to find, or a comma-separated list of them")
+@api.param("points", "Semicolon-separated lon,lat pairs, or POST them as JSON, CSV or NDJSON")
+class LocateRoute(Resource):
+    @cached
+    def get(self):
+        return LocateRenderer(request).render()
+
+    def post(self):
+        return LocateRenderer(request).render()
+
+
 @api.route("/object")
 class ObjectRoute(Resource):
     def get(self):
         return "nothing"
 
 
+@app.cli.command("build-geometry-store")
+@click.argument("max_resolution", type=int, default=6)
+def build_geometry_store(max_resolution):
+    """
+    Precomputes the Zone geometry of grids g0 to g<MAX_RESOLUTION> into GEOMETRY_STORE_DIR. g6 takes ~255 MB, each
+    resolution 9 times the last.
+    """
+    for resolution in range(max_resolution + 1):
+        start = time.perf_counter()
+        store.build(resolution)
+        click.echo("{}: {} Zones, {:.1f} MB, {:.1f}s".format(
+            store.store_path(resolution),
+            zone_count(resolution),
+            os.path.getsize(store.store_path(resolution)) / 1e6,
+            time.perf_counter() - start
+        ))
+
+
 def render_api_error(title, status, message, mediatype="text/html"):
     if mediatype == "application/json":
         return jsonify({
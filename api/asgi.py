@@ -0,0 +1,173 @@
+"""
+The Flask app as an ASGI application, for serving with an ASGI server, such as uvicorn, e.g.
+
+    uvicorn asgi:application --port 5000
+
+The app's views are synchronous, WSGI. Here each is called, and each chunk of the body it returns generated, on a pool of
+ASGI_THREADS threads while the event loop does all the network I/O, so a thread is only held while there's work to do:
+not while a slow client reads a streamed export, or sends a large body, and a chunk of geometries being worked out
+doesn't stop any other request being read or written. A request's body is read from the client as the view reads it and
+a response's generated as the client takes it, so neither is held in memory whole, and a response stops being generated
+when its client disconnects.
+"""
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from api.config import *
+
+
+class _RequestBody(io.RawIOBase):
+    # a request's body, as the blocking file WSGI reads it from, received from the event loop as it's read
+    def __init__(self, receive, loop, disconnected, more):
+        self.receive = receive
+        self.loop = loop
+        self.disconnected = disconnected
+        self.buffer = b""
+        self.more = more
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self.buffer) == 0 and self.more:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if message["type"] == "http.disconnect":
+                self.loop.call_soon_threadsafe(self.disconnected.set)
+                self.more = False
+            else:
+                self.buffer = message.get("body", b"")
+                self.more = message.get("more_body", False)
+        n = min(len(b), len(self.buffer))
+        b[:n] = self.buffer[:n]
+        self.buffer = self.buffer[n:]
+        return n
+
+
+def _environ(scope, body):
+    # the WSGI environ of an ASGI HTTP request
+    root_path = scope.get("root_path", "")
+    path = scope["path"][len(root_path):] if scope["path"].startswith(root_path) else scope["path"]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/{}".format(scope.get("http_version", "1.1")),
+        "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ["CONTENT_TYPE", "CONTENT_LENGTH"] else "HTTP_" + name
+        value = value.decode("latin-1")
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+async def _watch_disconnect(receive, disconnected):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    disconnected.set()
+
+
+class AsgiApp:
+    """
+    An ASGI application calling the given WSGI application on a pool of threads.
+
+    :param wsgi_app: the WSGI application, e.g. the Flask app
+    :param threads: the most requests' views, or chunks of their responses, to run at once
+    """
+    def __init__(self, wsgi_app, threads: int = ASGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError("Only HTTP is served, not {}".format(scope["type"]))
+
+        loop = asyncio.get_running_loop()
+        # every call for a request runs in its own Context, as though on one thread, for Flask's context locals
+        context = contextvars.Context()
+
+        def run(f, *args):
+            return loop.run_in_executor(self.executor, context.run, f, *args)
+
+        disconnected = asyncio.Event()
+        # there's a body to receive only if the request says so: else watch for a disconnect from the start
+        headers = dict(scope["headers"])
+        body = _RequestBody(
+            receive,
+            loop,
+            disconnected,
+            int(headers.get(b"content-length", 0)) > 0 or b"transfer-encoding" in headers
+        )
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get("started"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+            def write(data):
+                # the legacy, imperative, way to send some of the body: from the view's thread, before what it returns
+                if len(data) > 0 and not disconnected.is_set():
+                    asyncio.run_coroutine_threadsafe(send_chunk(data), loop).result()
+
+            return write
+
+        async def start():
+            if not response.get("started"):
+                response["started"] = True
+                await send({"type": "http.response.start", "status": response["status"],
+                            "headers": response["headers"]})
+
+        async def send_chunk(chunk):
+            await start()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        watcher = None
+        iterable = await run(self.wsgi_app, _environ(scope, io.BufferedReader(body)), start_response)
+        try:
+            chunks = iter(iterable)
+            while not disconnected.is_set():
+                # once the view's read the whole request body, the only message left to receive is a disconnect
+                if watcher is None and not body.more:
+                    watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+                chunk = await run(next, chunks, None)
+                if chunk is None:
+                    break
+                if len(chunk) > 0:
+                    await send_chunk(chunk)
+            if not disconnected.is_set():
+                await start()
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if hasattr(iterable, "close"):
+                await run(iterable.close)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
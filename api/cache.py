@@ -0,0 +1,263 @@
+import functools
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import Response, request
+
+# the request headers, besides its URL, that responses are negotiated by
+VARY_HEADERS = ["Accept", "Accept-Profile", "Accept-Language"]
+
+
+def deep_sizeof(o, _seen=None) -> int:
+    """
+    An estimate of the memory, in bytes, used by an object and everything it contains, for bounding caches by memory.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(o) in _seen:
+        return 0
+    _seen.add(id(o))
+
+    size = sys.getsizeof(o)
+    if isinstance(o, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in o.items())
+    elif isinstance(o, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(x, _seen) for x in o)
+    elif hasattr(o, "__dict__"):
+        size += deep_sizeof(o.__dict__, _seen)
+    return size
+
+
+class LRUCache:
+    """
+    A thread-safe, least recently used, cache bounded by the estimated memory its values use and, optionally, their age.
+
+    Whenever an addition takes the cache over max_bytes, the least recently used entries are evicted until it's back
+    under. A value on its own bigger than max_bytes isn't cached at all. If ttl is given, entries older than ttl
+    seconds are treated as missing, and dropped, when next looked up.
+    """
+    def __init__(self, max_bytes: int, sizeof=deep_sizeof, ttl: float = None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key: (value, size, expiry time)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                del self._entries[key]
+                self.bytes -= entry[1]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, expiry)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        The cached value for key, or, if there isn't one, compute() which is then cached. compute() is called outside
+        the cache's lock so two threads missing on the same key at once may both compute it; the last one's is kept.
+        """
+        value = self.get(key, self)
+        if value is self:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups > 0 else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def response_etag(snapshot) -> str:
+    """
+    A strong ETag for the response to the current request: everything the API renders is determined by the request's
+    path, query string and negotiation headers, the API's version and the graph snapshot's data, so a hash of those.
+    """
+    from api.config import VERSION
+    h = hashlib.sha256()
+    for part in [VERSION, snapshot.checksum, request.path] + \
+                ["{}={}".format(k, v) for k, v in sorted(request.args.items(multi=True))] + \
+                [request.headers.get(header, "") for header in VARY_HEADERS]:
+        h.update(part.encode())
+        h.update(b"\n")
+    return h.hexdigest()[:32]
+
+
+class CachedResponse:
+    """
+    A rendered response, as kept by response_cache
+    """
+    def __init__(self, body: bytes, status: int, headers: list):
+        self.body = body
+        self.status = status
+        self.headers = headers
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def to_response(self) -> Response:
+        return Response(self.body, status=self.status, headers=self.headers)
+
+
+def _response_cache():
+    # made on first use as its size & TTL are set in api.config, which imports a great deal
+    global response_cache
+    if response_cache is None:
+        from api.config import RESPONSE_CACHE_BYTES, CACHE_HOURS
+        response_cache = LRUCache(RESPONSE_CACHE_BYTES, CachedResponse.size, ttl=CACHE_HOURS * 3600)
+    return response_cache
+
+
+# the responses cached, in this process, by cached(), keyed by ETag
+response_cache = None
+# response_cache's entries are each at most 1/MIN_ENTRIES of its size, so one large response can't evict the rest and
+# each response being sent, and buffered for it, holds that much memory at most
+MIN_ENTRIES = 16
+
+
+def _store_when_sent(key, response: Response):
+    # cache the response as it's sent, so a streamed one isn't held up, unless it's larger than an entry may be, in
+    # which case what's buffered of it is dropped, so each response being sent holds at most that much
+    cache = _response_cache()
+    max_size = cache.max_bytes // MIN_ENTRIES
+    if response.content_length is not None and response.content_length > max_size:
+        return
+    body = response.iter_encoded()
+    headers = list(response.headers.items())
+
+    def send():
+        chunks = []
+        size = 0
+        for chunk in body:
+            if chunks is not None:
+                size += len(chunk)
+                if size <= max_size:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+            yield chunk
+        if chunks is not None:
+            cache.put(key, CachedResponse(b"".join(chunks), response.status_code, headers))
+
+    response.response = send()
+
+
+def cached(get):
+    """
+    Caches a GET view's responses, in clients & CDNs and in this process.
+
+    Its successful responses are given an ETag, Last-Modified & Cache-Control of CACHE_HOURS and, if the request's
+    If-None-Match shows the client has the response already, a 304 is returned without calling the view at all. Its
+    If-Modified-Since is answered with a 304 only if the response is a 200, in response_cache or from the view, so an
+    invalid request still gets the view's error. Otherwise, the response is served from response_cache, of up to
+    RESPONSE_CACHE_BYTES of responses of the last CACHE_HOURS, each of at most 1/MIN_ENTRIES of it, if it's there, or
+    the view's response is added to it as it's sent. An X-Cache header says which. Requests being profiled, that asked
+    to be, see api.profiling, are always rendered.
+    """
+    @functools.wraps(get)
+    def wrapper(*args, **kwargs):
+        from api.config import CACHE_HOURS
+        from api.snapshot import get_snapshot
+        from api.profiling import PROFILED
+        snapshot = get_snapshot()
+        etag = response_etag(snapshot)
+        headers = {
+            "ETag": '"{}"'.format(etag),
+            "Last-Modified": datetime.fromtimestamp(int(snapshot.modified), timezone.utc),
+            "Cache-Control": "public, max-age={}".format(int(CACHE_HOURS * 3600)),
+            "Vary": ", ".join(VARY_HEADERS),
+        }
+
+        # only successful responses are given an ETag, so a client with this one has had the view's 200 response, but
+        # a client's date says nothing of what it was sent, e.g. an error, so If-Modified-Since is only answered with a
+        # 304 once the response is known to be a 200, from the cache or the view
+        if request.if_none_match:
+            if request.if_none_match.contains_weak(etag):
+                return _with_headers(Response(status=304), headers)
+            unmodified = False
+        else:
+            unmodified = request.if_modified_since is not None and \
+                headers["Last-Modified"] <= request.if_modified_since
+
+        # a request being profiled, see api.profiling, is rendered, to profile rendering it
+        if request.environ.get(PROFILED):
+            cached_response = None
+        else:
+            cached_response = _response_cache().get(etag)
+        if cached_response is not None:
+            if unmodified:
+                return _with_headers(Response(status=304), headers)
+            response = cached_response.to_response()
+            response.headers["X-Cache"] = "HIT"
+        else:
+            response = get(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if unmodified:
+                response.close()
+                return _with_headers(Response(status=304), headers)
+            _store_when_sent(etag, response)
+            response.headers["X-Cache"] = "MISS"
+        return _with_headers(response, headers)
+
+    return wrapper
+
+
+def _with_headers(response: Response, headers: dict) -> Response:
+    # a successful response's, or a 304's, caching headers
+    response.headers["ETag"] = headers["ETag"]
+    response.last_modified = headers["Last-Modified"]
+    response.headers["Cache-Control"] = headers["Cache-Control"]
+    response.headers["Vary"] = headers["Vary"]
+    return response
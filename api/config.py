@@ -1,7 +1,7 @@
 import os
+import threading
 from rdflib import Graph, Namespace, BNode
 from rdflib.namespace import RDF, RDFS
-from rdflib.plugins.stores.sparqlstore import SPARQLStore
 
 
 APP_DIR = os.environ.get("APP_DIR", os.path.dirname(os.path.realpath(__file__)))
@@ -10,8 +10,40 @@ STATIC_DIR = os.environ.get("STATIC_DIR", os.path.join(APP_DIR, "view", "style")
 LOGFILE = os.environ.get("LOGFILE", os.path.join(APP_DIR, "ogcapild.log"))
 DEBUG = os.environ.get("DEBUG", True)
 PORT = os.environ.get("PORT", 5000)
-CACHE_HOURS = os.environ.get("CACHE_HOURS", 1)
-CACHE_FILE = os.environ.get("CACHE_DIR", os.path.join(APP_DIR, "cache", "DATA.pickle"))
+# how long clients & CDNs may cache responses for before revalidating them, with their ETags, in hours
+CACHE_HOURS = float(os.environ.get("CACHE_HOURS", 1))
+# the most memory to use for keeping rendered responses, for up to CACHE_HOURS, to serve identical requests from
+RESPONSE_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", 32 * 1024 * 1024))
+DATA_DIR = os.environ.get("DATA_DIR", os.path.join(os.path.dirname(APP_DIR), "data"))
+CACHE_FILE = os.environ.get("CACHE_FILE", os.path.join(DATA_DIR, "cache.marshal"))
+# how often, at most, to check the files in DATA_DIR for changes to reload the graph from
+GRAPH_RELOAD_SECONDS = float(os.environ.get("GRAPH_RELOAD_SECONDS", 5))
+# where the precomputed Zone geometry of grids, built with flask --app api.app build-geometry-store, is kept
+GEOMETRY_STORE_DIR = os.environ.get("GEOMETRY_STORE_DIR", os.path.join(DATA_DIR, "geometry"))
+# the most memory to use for caching Zones' calculated geometries, parents, children & neighbours
+ZONE_CACHE_BYTES = int(os.environ.get("ZONE_CACHE_BYTES", 64 * 1024 * 1024))
+# how many Features to generate, and send, at a time when streaming a large response
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 1000))
+# how many Zones to generate, and send, at a time when exporting a grid
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 10000))
+# the most Zones one batch request, e.g. to /neighbours, may ask about
+MAX_BATCH_ZONES = int(os.environ.get("MAX_BATCH_ZONES", 10000))
+# how many points to find the Zones of at a time when streaming them through /locate
+LOCATE_CHUNK_SIZE = int(os.environ.get("LOCATE_CHUNK_SIZE", 10000))
+# how many threads the ASGI app (asgi.py) runs views, and generates chunks of their responses, on
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", 8))
+# record the metrics of requests, and serve them, and the process' others, at /metrics, see api.metrics
+METRICS = os.environ.get("METRICS", "true").lower() != "false"
+# profile single requests, see api.profiling: those with an X-Profile header of PROFILE_SECRET, which is needed for any
+# request to ask to be, and a random PROFILE_SAMPLE_RATE, 0 to 1, of the rest
+PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS", "false").lower() == "true"
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# "collapsed", stacks sampled every PROFILE_INTERVAL_MS, for flame graphs, or "pstats", cProfile's record of every call
+PROFILE_FORMAT = os.environ.get("PROFILE_FORMAT", "collapsed")
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+# where requests' profiles are saved
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(APP_DIR), "profiles"))
 LOCAL_URIS = os.environ.get("LOCAL_URIS", True)
 
 GEO = Namespace("http://www.opengis.net/ont/geosparql#")
@@ -25,33 +57,31 @@ DATASET_URI = "https://w3id.org/dggs/tb16pix"
 
 
 def get_graph():
-    from pathlib import Path
-    import pickle
-    import logging
-
-    # try to load static data from a pickle file
-    data_file = Path(APP_DIR).parent / "data" / "cache.pickle"
-    logging.debug(data_file)
-    if Path.is_file(data_file):
-        logging.debug("loading g from cache")
-        with open(data_file, 'rb') as f:
-            g = pickle.load(f)
-    else:
-        logging.debug("no cache - reloading g from source files")
-        g = Graph()
-        g.parse(Path(APP_DIR).parent / "data" / "collections.ttl")
-        g.parse(Path(APP_DIR).parent / "data" / "conformance_targets.ttl")
-        g.parse(Path(APP_DIR).parent / "data" / "dataservice.ttl")
-        g.parse(Path(APP_DIR).parent / "data" / "dataset.ttl")
-
-        with open(data_file, 'wb') as f:
-            pickle.dump(g, f)
-
-    return g
-
-
-# rHealPix
-from rhealpixdggs.dggs import *
-from rhealpixdggs.ellipsoids import *
-WGS84_TB16 = Ellipsoid(a=6378137.0, b=6356752.314140356, e=0.0578063088401, f=0.003352810681182, lon_0=-131.25)
-TB16Pix = RHEALPixDGGS(ellipsoid=WGS84_TB16, north_square=0, south_square=0, N_side=3)
+    # a read-only, process-wide snapshot of the static data, reloaded if the source files change
+    from api.snapshot import get_snapshot
+    return get_snapshot().graph
+
+
+def get_description(uri) -> str:
+    # the HTML of a resource's dcterms:description, converted from Markdown once per snapshot, or None if it's none
+    from api.snapshot import get_snapshot
+    return get_snapshot().descriptions.get(str(uri))
+
+
+# rHealPix. WGS84_TB16 & TB16Pix are only made when first used, see __getattr__(): rhealpixdggs imports scipy, which is
+# most of the app's start up time
+_rhealpix_lock = threading.Lock()
+
+
+def __getattr__(name):
+    global WGS84_TB16, TB16Pix
+    if name not in ["WGS84_TB16", "TB16Pix"]:
+        raise AttributeError("module {} has no attribute {}".format(__name__, name))
+    with _rhealpix_lock:
+        if "TB16Pix" not in globals():
+            from rhealpixdggs.dggs import RHEALPixDGGS
+            from rhealpixdggs.ellipsoids import Ellipsoid
+            WGS84_TB16 = Ellipsoid(a=6378137.0, b=6356752.314140356, e=0.0578063088401, f=0.003352810681182,
+                                   lon_0=-131.25)
+            TB16Pix = RHEALPixDGGS(ellipsoid=WGS84_TB16, north_square=0, south_square=0, N_side=3)
+    return globals()[name]
@@ -0,0 +1,3 @@
+from .index import FACES, CHILDREN, MAX_RESOLUTION, is_zone_id, grid_resolution, zone_count, zone_ordinal, zone_id, \
+    zone_range, zone_ids
+from .zone import Zone, zones, format_zones, descendants, descendant_count
@@ -0,0 +1,237 @@
+"""
+The Zones of a TB16Pix grid within, or intersecting, a WGS84 bounding box.
+"""
+import math
+import numpy as np
+from . import geometry
+from .index import FACES, N_SIDE, CHILDREN
+from .zone import zones
+
+WITHIN = "within"
+INTERSECTS = "intersects"
+
+# slack, in degrees, for Zone edges computed to lie exactly on the box's
+EPSILON = 1e-9
+
+# the most Zones along the box's edges, in polar faces, that will be examined to find the Zones of a cover
+MAX_EDGE_ZONES = 250000
+
+
+class CoverTooLarge(ValueError):
+    pass
+
+
+class _Ranges:
+    # a polar face's part of a cover: runs of consecutive grid ordinals, in grid order
+    def __init__(self, resolution, starts, stops):
+        self.resolution = resolution
+        self.starts = starts
+        self.stops = stops
+        self.positions = np.cumsum(stops - starts)
+        self.count = int(self.positions[-1]) if len(self.positions) > 0 else 0
+
+    def zones(self, start, stop):
+        # the range the start position falls in, then on through the ranges until stop
+        i = int(np.searchsorted(self.positions, start, side="right"))
+        position = int(self.positions[i - 1]) if i > 0 else 0
+        while start < stop:
+            first = int(self.starts[i]) + start - position
+            n = min(stop - start, int(self.stops[i]) - first)
+            yield from zones(self.resolution, first, first + n)
+            start += n
+            position = int(self.positions[i])
+            i += 1
+
+
+class _Rectangles:
+    # an equatorial face's part of a cover: the Zones in some runs of columns and one run of rows of the face
+    def __init__(self, resolution, face, rows, columns):
+        self.resolution = resolution
+        self.face = face
+        self.rows = rows
+        self.columns = columns
+        self.count = self._count(0, 0, N_SIDE ** resolution)
+
+    def _count(self, row, column, side):
+        # how many of the side x side Zones from row, column are in the part
+        rows = max(0, min(row + side, self.rows[1]) - max(row, self.rows[0]))
+        return rows * sum(max(0, min(column + side, c[1]) - max(column, c[0])) for c in self.columns)
+
+    def zones(self, start, stop):
+        # walk down the face's Zone hierarchy, skipping whole Zones before start and listing whole Zones within
+        def walk(ordinal, row, column, side, start, stop):
+            count = self._count(row, column, side)
+            if count == side * side:
+                yield from zones(self.resolution, ordinal * count + start, ordinal * count + stop)
+                return
+            side //= N_SIDE
+            for d in range(CHILDREN):
+                if start >= stop:
+                    return
+                r, c = row + d // N_SIDE * side, column + d % N_SIDE * side
+                n = self._count(r, c, side)
+                if start < n:
+                    yield from walk(ordinal * CHILDREN + d, r, c, side, start, min(stop, n))
+                start, stop = max(start - n, 0), stop - n
+
+        if start < stop:
+            yield from walk(self.face, 0, 0, N_SIDE ** self.resolution, start, stop)
+
+
+class ZoneCover:
+    """
+    The Zones of the grid of a given resolution that are within, or intersect, a longitude/latitude bounding box, in
+    grid order.
+
+    The cover is worked out top-down, pruning Zones that are wholly inside or wholly outside the box, and is held as
+    runs of Zones, not as Zones, which are only generated for the positions asked for: any page of any cover is cheap.
+
+    In equatorial faces, longitude depends only on planar x and latitude only on planar y so a box covers a
+    rectangle of each face's rows and columns and a Zone's share of it is counted in constant time. The count is
+    then immediate and a page is found by walking down from the face, skipping whole Zones' worth of positions.
+
+    In polar faces the hierarchy is walked one resolution at a time and only Zones on the box's edges are divided,
+    those wholly inside it contributing all their descendants as one run of grid ordinals. Zones are compared to the
+    box by their exact longitude and latitude extents, see geometry.extents(), but polar Zones' edges aren't
+    meridians or parallels so, in INTERSECTS mode, a polar Zone whose extent overlaps a corner of the box is included
+    even if the Zone itself only comes close to it. The work done here grows with the number of Zones along the box's
+    edges and CoverTooLarge is raised if more than MAX_EDGE_ZONES would have to be examined.
+    """
+    def __init__(self, bbox, resolution: int, mode: str = WITHIN):
+        """
+        :param bbox: (min longitude, min latitude, max longitude, max latitude), in degrees. A min longitude greater
+        than the max longitude is a box that crosses the antimeridian
+        :param resolution: the resolution of the grid to cover the box with
+        :param mode: WITHIN, for only the Zones wholly inside the box, or INTERSECTS for all that overlap it
+        """
+        min_lon, min_lat, max_lon, max_lat = (float(x) for x in bbox)
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+            raise ValueError("A bbox must be min longitude, min latitude, max longitude, max latitude, in degrees")
+        if mode not in (WITHIN, INTERSECTS):
+            raise ValueError("mode must be '{}' or '{}'".format(WITHIN, INTERSECTS))
+
+        self.bbox = min_lon, min_lat, max_lon, max_lat
+        self.resolution = resolution
+        self.mode = mode
+        self._west = min_lon
+        self._arc = 360.0 if max_lon - min_lon >= 360 else (max_lon - min_lon) % 360
+
+        self._parts = []
+        for face in range(len(FACES)):
+            if 0 < face < len(FACES) - 1:
+                part = self._equatorial_part(face)
+            else:
+                part = self._polar_part(face)
+            if part.count > 0:
+                self._parts.append(part)
+        self._positions = np.cumsum([0] + [part.count for part in self._parts])
+
+    def _equatorial_part(self, face):
+        grid = geometry._grid()
+        side = N_SIDE ** self.resolution
+        face_x, face_y = grid.ul_vertex[FACES[face]]
+        face_width = grid.cell_width(0)
+        face_west = float(grid.rhealpix(face_x, 0.0, inverse=True)[0])
+        face_lon = face_west + 45.0
+
+        # rows, from the top of the face, of latitudes
+        def row(lat):
+            lat = min(max(lat, -89.0), 89.0)
+            y = float(grid.rhealpix(face_lon if face_lon < 180 else face_lon - 360, lat)[1])
+            return min(max((face_y - y) / face_width, 0.0), 1.0) * side
+
+        south, north = self.bbox[1], self.bbox[3]
+        if self.mode == WITHIN:
+            rows = math.ceil(row(north + EPSILON)), math.floor(row(south - EPSILON))
+        else:
+            rows = math.floor(row(north - EPSILON)), math.ceil(row(south + EPSILON))
+
+        # columns, from the west of the face, of the box's longitudes east of the face's west edge. A box can
+        # overlap a face twice, once either side of the antimeridian, so try it there and one turn earlier
+        columns = []
+        west = (self._west - face_west) % 360
+        for offset in ((0.0,) if self._arc >= 360 else (west - 360, west)):
+            east = offset + self._arc
+            if self.mode == WITHIN:
+                c = math.ceil((offset - EPSILON) / 90 * side), math.floor((east + EPSILON) / 90 * side)
+            else:
+                c = math.floor((offset + EPSILON) / 90 * side), math.ceil((east - EPSILON) / 90 * side)
+            c = max(c[0], 0), min(c[1], side)
+            if c[0] < c[1]:
+                if len(columns) > 0 and c[0] <= columns[-1][1]:
+                    # at coarse resolutions, both may overlap the same Zones
+                    previous = columns.pop()
+                    c = min(previous[0], c[0]), max(previous[1], c[1])
+                columns.append(c)
+
+        return _Rectangles(self.resolution, face, (max(rows[0], 0), min(rows[1], side)), columns)
+
+    def _classify(self, ids):
+        # which of the Zones are wholly inside the box and which partly, those left being wholly outside it
+        west, arc, south, north = geometry.extents(ids)
+        lat_inside = (south >= self.bbox[1] - EPSILON) & (north <= self.bbox[3] + EPSILON)
+        lat_overlaps = (south < self.bbox[3] - EPSILON) & (north > self.bbox[1] + EPSILON)
+        if self._arc >= 360:
+            lon_inside = np.ones(len(ids), dtype=bool)
+            lon_overlaps = lon_inside
+        else:
+            # the arcs' offsets from each other's western edges, eastwards
+            zone_offset = (west - self._west + EPSILON) % 360 - EPSILON
+            box_offset = (self._west - west) % 360
+            lon_inside = zone_offset + arc <= self._arc + EPSILON
+            lon_overlaps = (zone_offset < self._arc - EPSILON) | (box_offset < arc - EPSILON)
+
+        inside = lat_inside & lon_inside
+        return inside, ~inside & lat_overlaps & lon_overlaps
+
+    def _polar_part(self, face):
+        starts = []
+        stops = []
+        ids = [FACES[face]]
+        ordinals = np.array([face], dtype=np.int64)
+        examined = 0
+        for r in range(self.resolution + 1):
+            if len(ids) == 0:
+                break
+            examined += len(ids)
+            if examined > MAX_EDGE_ZONES:
+                raise CoverTooLarge(
+                    "Too many Zones lie along the edges of the bbox: use a smaller bbox or a coarser grid")
+            inside, partial = self._classify(ids)
+            if r == self.resolution and self.mode == INTERSECTS:
+                inside = inside | partial
+            descendants = CHILDREN ** (self.resolution - r)
+            starts.append(ordinals[inside] * descendants)
+            stops.append((ordinals[inside] + 1) * descendants)
+
+            # the next resolution's Zones to look at are only the children of those on the box's edges
+            if r < self.resolution:
+                ids = [z + str(d) for z in np.array(ids, dtype=object)[partial] for d in range(CHILDREN)]
+                ordinals = (ordinals[partial][:, None] * CHILDREN + np.arange(CHILDREN)).ravel()
+
+        starts = np.concatenate(starts)
+        stops = np.concatenate(stops)
+        order = np.argsort(starts, kind="stable")
+        return _Ranges(self.resolution, starts[order], stops[order])
+
+    def __len__(self):
+        return int(self._positions[-1])
+
+    def zones(self, start: int = 0, stop: int = None):
+        """
+        Generates the Zones in positions start to stop (exclusive) of the cover, in grid order.
+        """
+        count = len(self)
+        start = min(max(start, 0), count)
+        stop = count if stop is None else min(max(stop, start), count)
+
+        i = int(np.searchsorted(self._positions, start, side="right")) - 1
+        while start < stop:
+            position = int(self._positions[i])
+            n = min(stop, int(self._positions[i + 1])) - start
+            yield from self._parts[i].zones(start - position, start - position + n)
+            start += n
+            i += 1
+
+    def __iter__(self):
+        return self.zones()
@@ -0,0 +1,238 @@
+"""
+Batch geometry for TB16Pix Zones.
+
+rhealpixdggs' Cell works out one Zone's nucleus and vertices at a time, in pure Python. Here the planar geometry of a
+whole batch of Zones is worked out with integer and array arithmetic straight from their IDs and then projected onto the
+WGS84_TB16 ellipsoid with a single, vectorised, call per region to the rHEALPix inverse projection. The results are the
+same as Cell.nucleus(plane=False) and Cell.vertices(plane=False) give, NW vertex first.
+"""
+import numpy as np
+from api.lazy import lazy_import
+from .index import FACES, N_SIDE, MAX_RESOLUTION
+from .zone import Zone, unpack
+
+pj_rhealpix = lazy_import("rhealpixdggs.pj_rhealpix")
+
+
+def _grid():
+    # the grid is built in api.config, which imports a great deal, so only fetch it when first needed
+    from api.config import TB16Pix
+    return TB16Pix
+
+
+def _parse(zone_ids):
+    """
+    The root face index, resolution and planar row & column offsets, in Zones of its own resolution from its root
+    face's upper left corner, of each of the given Zones, and their digits, -1 past their resolutions'.
+    """
+    if isinstance(zone_ids[0], Zone):
+        # unpacked from the Zones' ints, without formatting their IDs
+        face, resolution, digits = unpack(zone_ids)
+    else:
+        chars = np.array(zone_ids, dtype="S{}".format(MAX_RESOLUTION + 1))
+        chars = chars.view(np.uint8).reshape(len(chars), MAX_RESOLUTION + 1)
+        face = np.searchsorted(np.frombuffer(FACES.encode(), dtype=np.uint8), chars[:, 0])
+        resolution = np.count_nonzero(chars[:, 1:], axis=1)
+        digits = chars[:, 1:].astype(np.int64) - ord("0")
+
+    # Horner's rule, stopping at each Zone's own resolution: digit = row * N_SIDE + col
+    row = np.zeros(len(face), dtype=np.int64)
+    col = np.zeros(len(face), dtype=np.int64)
+    for i in range(MAX_RESOLUTION):
+        more = i < resolution
+        row = np.where(more, row * N_SIDE + digits[:, i] // N_SIDE, row)
+        col = np.where(more, col * N_SIDE + digits[:, i] % N_SIDE, col)
+
+    return face, resolution, row, col, np.where(digits >= 0, digits, -1)
+
+
+def _planar(zone_ids):
+    # upper left vertex and width of each Zone, calculated as Cell.ul_vertex() & Cell.width() do, for identical results
+    grid = _grid()
+    face, resolution, row, col, digits = _parse(zone_ids)
+    ul = np.array([grid.ul_vertex[f] for f in FACES])[face]
+    scale = float(N_SIDE) ** -resolution
+    width0 = grid.cell_width(0)
+    x = ul[:, 0] + width0 * (col * scale)
+    y = ul[:, 1] - width0 * (row * scale)
+    width = np.array([grid.cell_width(r) for r in range(MAX_RESOLUTION + 1)])[resolution]
+
+    return face, resolution, digits, x, y, width
+
+
+def _project(x, y, region):
+    # inverse project planar points onto the ellipsoid, in degrees, one batch per region as Cell.vertices() does
+    grid = _grid()
+    lon = np.empty_like(x)
+    lat = np.empty_like(y)
+    for name, mask in region.items():
+        if mask.any():
+            lon[mask], lat[mask] = grid.rhealpix(x[mask], y[mask], inverse=True, region=name)
+    return lon, lat
+
+
+def _regions(face, shape=()):
+    north = face == 0
+    south = face == len(FACES) - 1
+    if shape:
+        north = np.broadcast_to(north[:, None], shape)
+        south = np.broadcast_to(south[:, None], shape)
+    return {"north_polar": north, "south_polar": south, "equatorial": ~(north | south)}
+
+
+def _nw_vertex_index(face, digits, x, y, width):
+    """
+    Which of each Zone's planar vertices, ordered upper left, upper right, lower right, lower left, is its NW vertex
+    on the ellipsoid: always the upper left one for equatorial (quad) and cap Zones, but it depends on the Zone's shape
+    and which polar triangle it's in for polar Zones. See Cell.nw_vertex().
+    """
+    grid = _grid()
+    n = len(face)
+    north = face == 0
+    south = face == len(FACES) - 1
+    polar = north | south
+    nw = np.zeros(n, dtype=np.int64)
+    if not polar.any():
+        return nw
+
+    valid = digits >= 0
+    centre = (N_SIDE ** 2 - 1) // 2
+    cap = np.all(~valid | (digits == centre), axis=1)
+    diagonal = np.all(~valid | (digits % (N_SIDE + 1) == 0), axis=1)
+    anti_diagonal = np.all(~valid | ((digits % (N_SIDE - 1) == 0) & (digits > 0) & (digits < N_SIDE ** 2 - 1)), axis=1)
+    dart = polar & ~cap & (diagonal | anti_diagonal)
+    skew = polar & ~cap & ~dart
+
+    # skew quads: by the polar triangle the nucleus is moved into
+    if skew.any():
+        r_a = grid.ellipsoid.R_A
+        # rhealpixdggs' private helper, which may change with no notice, so requirements.txt pins rhealpixdggs to 0.11
+        tri, _ = pj_rhealpix._triangle_array(
+            (x[skew] + width[skew] / 2) / r_a,
+            (y[skew] - width[skew] / 2) / r_a,
+            north_square=grid.north_square,
+            south_square=grid.south_square,
+            inverse=True
+        )
+        tri = tri.astype(np.int64)
+        nw[skew] = np.where(
+            north[skew],
+            -((tri - grid.north_square) % 4) % 4,
+            (tri - grid.south_square) % 4
+        )
+
+    # darts: the polewards vertex is the one nearest, in Chebyshev distance, its face's centre, the pole
+    if dart.any():
+        w = width[dart][:, None]
+        vx = x[dart][:, None] + w * np.array([0, 1, 1, 0])
+        vy = y[dart][:, None] - w * np.array([0, 0, 1, 1])
+        face_width = grid.cell_width(0)
+        ul = np.array([grid.ul_vertex[f] for f in FACES])[face[dart]]
+        cx = (ul[:, 0] + face_width / 2)[:, None]
+        cy = (ul[:, 1] - face_width / 2)[:, None]
+        i = np.argmin(np.maximum(np.abs(vx - cx), np.abs(vy - cy)), axis=1)
+        nw[dart] = np.where(north[dart], i, (i + 1) % 4)
+
+    return nw
+
+
+def _normalise_antimeridian(lon):
+    # as Cell.vertices() does: a vertex on the antimeridian takes the sign that keeps its ring under half a turn wide
+    on = np.abs(np.abs(lon) - 180.0) <= 1e-9
+    if not on.any():
+        return lon
+    off_min = np.min(np.where(on, np.inf, lon), axis=-1, keepdims=True)
+    off_max = np.max(np.where(on, -np.inf, lon), axis=-1, keepdims=True)
+    lon = np.where(on & (off_min > 0), 180.0, lon)
+    return np.where(on & (off_max < 0), -180.0, lon)
+
+
+def nuclei(zone_ids) -> np.ndarray:
+    """
+    The nucleus (centroid) of each of the given Zones, as Cell.nucleus(plane=False) gives it.
+
+    :param zone_ids: a sequence of Zones, or of valid TB16Pix Zone IDs, of any mix of resolutions
+    :return: an array of shape (len(zone_ids), 2) of longitude, latitude pairs, in degrees
+    """
+    if len(zone_ids) == 0:
+        return np.empty((0, 2))
+    face, resolution, digits, x, y, width = _planar(zone_ids)
+    lon, lat = _grid().rhealpix(x + width / 2, y - width / 2, inverse=True)
+    return np.stack([lon, lat], axis=-1)
+
+
+def vertices(zone_ids) -> np.ndarray:
+    """
+    The four vertices of each of the given Zones, as Cell.vertices(plane=False) gives them: NW vertex first, clockwise.
+
+    :param zone_ids: a sequence of Zones, or of valid TB16Pix Zone IDs, of any mix of resolutions
+    :return: an array of shape (len(zone_ids), 4, 2) of longitude, latitude pairs, in degrees
+    """
+    if len(zone_ids) == 0:
+        return np.empty((0, 4, 2))
+    face, resolution, digits, x, y, width = _planar(zone_ids)
+
+    # planar vertices, upper left first, clockwise, then rotated to start at the NW vertex
+    order = (_nw_vertex_index(face, digits, x, y, width)[:, None] + np.arange(4)) % 4
+    vx = x[:, None] + width[:, None] * np.array([0, 1, 1, 0])[order]
+    vy = y[:, None] - width[:, None] * np.array([0, 0, 1, 1])[order]
+
+    lon, lat = _project(vx, vy, _regions(face, vx.shape))
+    return np.stack([_normalise_antimeridian(lon), lat], axis=-1)
+
+
+def geometries(zone_ids):
+    """
+    The nuclei and vertices of the given Zones, see nuclei() and vertices().
+
+    :return: a (nuclei, vertices) pair of arrays
+    """
+    return nuclei(zone_ids), vertices(zone_ids)
+
+
+def extents(zone_ids):
+    """
+    The range of longitudes and latitudes each of the given Zones covers.
+
+    A Zone's longitudes are given as an arc, eastwards from its western edge, so that Zones straddling the
+    antimeridian are handled. Polar Zones' edges aren't meridians or parallels but a polar face's parallels are
+    concentric squares about its pole and its meridians are straight lines from it so a polar Zone's extremes of
+    longitude are at its vertices and its latitude nearest the pole is at the point nearest the pole, both exactly.
+
+    :param zone_ids: a sequence of Zones, or of valid TB16Pix Zone IDs, of any mix of resolutions
+    :return: arrays of each Zone's western longitude, arc of longitude, southern and northern latitudes, in degrees
+    """
+    if len(zone_ids) == 0:
+        return tuple(np.empty(0) for _ in range(4))
+    grid = _grid()
+    v = vertices(zone_ids)
+    lon = v[:, :, 0]
+    south = v[:, :, 1].min(axis=1)
+    north = v[:, :, 1].max(axis=1)
+
+    # the smallest arc containing every vertex is all of the circle but the largest gap between them
+    ordered = np.sort(lon, axis=1)
+    gaps = np.concatenate([np.diff(ordered, axis=1), ordered[:, :1] + 360 - ordered[:, -1:]], axis=1)
+    largest = np.argmax(gaps, axis=1)
+    west = ordered[np.arange(len(lon)), (largest + 1) % 4]
+    arc = 360 - gaps[np.arange(len(lon)), largest]
+
+    # polar Zones' latitude nearest the pole
+    face, resolution, digits, x, y, width = _planar(zone_ids)
+    polar = (face == 0) | (face == len(FACES) - 1)
+    if polar.any():
+        face_width = grid.cell_width(0)
+        ul = np.array([grid.ul_vertex[f] for f in FACES])[face[polar]]
+        cx = ul[:, 0] + face_width / 2
+        cy = ul[:, 1] - face_width / 2
+        px = np.clip(cx, x[polar], x[polar] + width[polar])
+        py = np.clip(cy, y[polar] - width[polar], y[polar])
+        _, pole_lat = grid.rhealpix(px, py, inverse=True)
+        has_pole = (px == cx) & (py == cy)
+        pole_lat = np.where(has_pole, np.where(face[polar] == 0, 90.0, -90.0), pole_lat)
+        north[polar] = np.where(face[polar] == 0, pole_lat, north[polar])
+        south[polar] = np.where(face[polar] == 0, south[polar], pole_lat)
+        west[polar] = np.where(has_pole, -180.0, west[polar])
+        arc[polar] = np.where(has_pole, 360.0, arc[polar])
+
+    return west, arc, south, north
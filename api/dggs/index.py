@@ -0,0 +1,130 @@
+import re
+
+# TB16Pix root Zones, in grid order
+FACES = "NOPQRS"
+# each Zone has N_SIDE x N_SIDE children, numbered 0 - 8 left-to-right, top-to-bottom
+N_SIDE = 3
+CHILDREN = N_SIDE ** 2
+MAX_RESOLUTION = 15
+
+ZONE_ID_PATTERN = re.compile(r"^[{}][0-{}]{{0,{}}}$".format(FACES, CHILDREN - 1, MAX_RESOLUTION))
+GRID_ID_PATTERN = re.compile(r"^g([0-9]{1,2})$")
+
+
+def is_zone_id(zone_id: str) -> bool:
+    return ZONE_ID_PATTERN.match(zone_id) is not None
+
+
+def grid_resolution(collection_id: str):
+    """
+    The resolution of the TB16Pix grid Collection with the given ID, e.g. 7 for g7, or None if it isn't a grid.
+
+    :param collection_id: a Collection's dcterms:identifier
+    :type collection_id: str
+    :return: the grid resolution
+    :rtype: int
+    """
+    m = GRID_ID_PATTERN.match(collection_id)
+    if m is None or int(m.group(1)) > MAX_RESOLUTION:
+        return None
+    return int(m.group(1))
+
+
+def zone_count(resolution: int, within: str = None) -> int:
+    """
+    The number of Zones in the grid of the given resolution, 6 * 9^resolution, or, if within is given, the number of
+    them that are within (are, or are descendants of) that Zone, 9^(resolution - resolution of within).
+    """
+    if within is None:
+        return len(FACES) * CHILDREN ** resolution
+    within_resolution = len(within) - 1
+    if within_resolution > resolution:
+        return 0
+    return CHILDREN ** (resolution - within_resolution)
+
+
+def zone_ordinal(zone_id: str) -> int:
+    """
+    The position of a Zone within its grid, in the order TB16Pix.grid() yields them.
+
+    A Zone ID is its root face's letter followed by one base-9 digit per resolution so its ordinal is just the face
+    index and digits read as a single base-9 number.
+    """
+    if not is_zone_id(zone_id):
+        raise ValueError("{} is not a valid TB16Pix Zone ID".format(zone_id))
+    ordinal = FACES.index(zone_id[0])
+    for d in zone_id[1:]:
+        ordinal = ordinal * CHILDREN + int(d)
+    return ordinal
+
+
+def zone_id(ordinal: int, resolution: int) -> str:
+    """
+    The ID of the Zone at the given position within the grid of the given resolution, the inverse of zone_ordinal().
+    """
+    if not 0 <= ordinal < zone_count(resolution):
+        raise IndexError("There is no Zone {} in grid {}".format(ordinal, resolution))
+    digits = []
+    for _ in range(resolution):
+        ordinal, d = divmod(ordinal, CHILDREN)
+        digits.append(str(d))
+    return FACES[ordinal] + "".join(reversed(digits))
+
+
+def zone_range(resolution: int, first: str, last: str = None, intersects: bool = False):
+    """
+    The ordinals, start to stop (exclusive), of the Zones in the grid of the given resolution that are within the Zone
+    first or, if last is given, within the run of Zones from first to last inclusive, in grid order. If intersects is
+    True, those that overlap it at all are included too.
+
+    Zone IDs are prefixes of their descendants' so the Zones within another, or within a run of them, are always a
+    contiguous range of their grid.
+
+    :param resolution: the grid's resolution
+    :param first: a Zone ID, of any resolution
+    :param last: an optional Zone ID, of any resolution, at or after first
+    :param intersects: whether to include Zones that are only partly within
+    :return: a (start, stop) pair of ordinals, equal if no Zones of the grid are within
+    """
+    if last is None:
+        last = first
+    # compare the range and the grid's Zones in the ordinals of the finest resolution of the three
+    finest = max(resolution, len(first) - 1, len(last) - 1)
+    lo = zone_ordinal(first) * CHILDREN ** (finest - len(first) + 1)
+    hi = (zone_ordinal(last) + 1) * CHILDREN ** (finest - len(last) + 1)
+    descendants = CHILDREN ** (finest - resolution)
+    if intersects:
+        start = lo // descendants
+        stop = max(-(-hi // descendants), start)
+    else:
+        start = -(-lo // descendants)
+        stop = max(hi // descendants, start)
+    return start, stop
+
+
+def zone_ids(resolution: int, start: int = 0, stop: int = None):
+    """
+    Generates the IDs of the Zones in positions start to stop (exclusive) of the grid of the given resolution.
+
+    Only the requested window is ever visited so any page of any grid costs time proportional to the page size.
+    """
+    count = zone_count(resolution)
+    start = min(max(start, 0), count)
+    stop = count if stop is None else min(max(stop, start), count)
+    if start == stop:
+        return
+
+    # work out the first Zone's digits then count upwards in base 9
+    first = zone_id(start, resolution)
+    face = FACES.index(first[0])
+    digits = [int(d) for d in first[1:]]
+    for _ in range(stop - start):
+        yield FACES[face] + "".join(map(str, digits))
+        i = resolution - 1
+        while i >= 0 and digits[i] == CHILDREN - 1:
+            digits[i] = 0
+            i -= 1
+        if i >= 0:
+            digits[i] += 1
+        else:
+            face += 1
@@ -0,0 +1,132 @@
+"""
+Zone neighbours by index arithmetic.
+
+A Zone's planar neighbours, as Cell.neighbors() gives them, are the Zones of its resolution one row up or down, or one
+column left or right, of it on the rHEALPix plane. Within a root face that's just a step in row or column. Stepping
+off a face's edge lands on the opposite edge of the adjacent face, as the faces lie on a cube, and, where a polar face
+is involved, that face's Zones are then rotated by some quarter turns, exactly as Cell.neighbor() does.
+
+Here each Zone's row and column are read from its ID, stepped and, where an edge is crossed, moved to the adjacent face
+and rotated, all as array arithmetic over a whole batch of Zones, then turned back into IDs.
+"""
+import numpy as np
+from .index import FACES, N_SIDE, MAX_RESOLUTION
+
+# the directions of a Zone's neighbours, in the order they're given
+DIRECTIONS = ("down", "left", "right", "up")
+
+# the step in row & column of each direction
+_STEPS = {"down": (1, 0), "left": (0, -1), "right": (0, 1), "up": (-1, 0)}
+
+_crossings = None
+
+
+def _crossing_table():
+    """
+    For each root face and direction, the face stepped onto off that edge and the number of anticlockwise quarter turns
+    its Zones are rotated by, as Cell.neighbor() works them out.
+    """
+    global _crossings
+    if _crossings is None:
+        from .geometry import _grid
+        an = _grid().atomic_neighbors
+        north, south = FACES[0], FACES[-1]
+        rotations = {
+            (south, an[south]["left"]): 1, (an[south]["right"], south): 1,
+            (north, an[north]["right"]): 1, (an[north]["left"], north): 1,
+            (south, an[south]["down"]): 2, (an[south]["down"], south): 2,
+            (north, an[north]["up"]): 2, (an[north]["up"], north): 2,
+            (south, an[south]["right"]): 3, (an[south]["left"], south): 3,
+            (north, an[north]["left"]): 3, (an[north]["right"], north): 3,
+        }
+        faces = [[FACES.index(an[f][d]) for d in DIRECTIONS] for f in FACES]
+        turns = [[rotations.get((f, an[f][d]), 0) for d in DIRECTIONS] for f in FACES]
+        _crossings = faces, turns
+    return _crossings
+
+
+def zone_ids_from_rows(face, resolution, row, col) -> np.ndarray:
+    """
+    The IDs of the Zones at the given rows and columns, on the rHEALPix plane, of the given root faces.
+
+    :param face: arrays, all of the same length, of each Zone's root face, as its index in FACES, resolution, and row
+        and column within that face, 0 to N_SIDE^resolution - 1, top left first
+    :return: an array of the Zones' IDs
+    """
+    chars = np.zeros((len(face), MAX_RESOLUTION + 1), dtype=np.uint8)
+    chars[:, 0] = np.frombuffer(FACES.encode(), dtype=np.uint8)[face]
+    for i in range(int(resolution.max())):
+        more = i < resolution
+        scale = N_SIDE ** np.maximum(resolution - 1 - i, 0)
+        digit = (row // scale % N_SIDE) * N_SIDE + col // scale % N_SIDE
+        chars[:, i + 1] = np.where(more, digit + ord("0"), 0)
+    return chars.view("S{}".format(MAX_RESOLUTION + 1)).ravel().astype(str)
+
+
+def neighbours(zone_ids) -> np.ndarray:
+    """
+    The up, down, left & right neighbours on the rHEALPix plane of each of the given Zones, as Cell.neighbors() gives
+    them.
+
+    :param zone_ids: a sequence of valid TB16Pix Zone IDs, of any mix of resolutions
+    :return: an array of shape (len(zone_ids), 4) of the neighbours' IDs, in DIRECTIONS order
+    """
+    from .geometry import _parse
+    if len(zone_ids) == 0:
+        return np.empty((0, len(DIRECTIONS)), dtype=str)
+
+    face, resolution, row, col, _ = _parse(zone_ids)
+    side = N_SIDE ** resolution
+    faces, turns = (np.array(t) for t in _crossing_table())
+
+    out = []
+    for d, direction in enumerate(DIRECTIONS):
+        r = row + _STEPS[direction][0]
+        c = col + _STEPS[direction][1]
+        crossed = (r < 0) | (r >= side) | (c < 0) | (c >= side)
+        n_face = np.where(crossed, faces[face, d], face)
+        r %= side
+        c %= side
+
+        # rotate the Zones stepped onto in a polar face, or from one, about the middle of their face
+        quarter_turns = np.where(crossed, turns[face, d], 0)
+        for _ in range(3):
+            rotate = quarter_turns > 0
+            r, c = np.where(rotate, c, r), np.where(rotate, side - 1 - r, c)
+            quarter_turns = quarter_turns - rotate
+
+        out.append(zone_ids_from_rows(n_face, resolution, r, c))
+
+    return np.stack(out, axis=1)
+
+
+def zone_neighbours(zone_id: str) -> list:
+    """
+    The neighbours of one Zone, as neighbours() works them out but in plain Python, which is far quicker for one.
+
+    :param zone_id: a valid TB16Pix Zone ID
+    :return: a list of the neighbours' IDs, in DIRECTIONS order
+    """
+    face = FACES.index(zone_id[0])
+    resolution = len(zone_id) - 1
+    row = col = 0
+    for digit in zone_id[1:]:
+        row, col = row * N_SIDE + int(digit) // N_SIDE, col * N_SIDE + int(digit) % N_SIDE
+    side = N_SIDE ** resolution
+    faces, turns = _crossing_table()
+
+    out = []
+    for d, direction in enumerate(DIRECTIONS):
+        n_face, r, c = face, row + _STEPS[direction][0], col + _STEPS[direction][1]
+        if not (0 <= r < side and 0 <= c < side):
+            n_face, r, c = faces[face][d], r % side, c % side
+            for _ in range(turns[face][d]):
+                r, c = c, side - 1 - r
+
+        digits = []
+        for _ in range(resolution):
+            digits.append(str((r % N_SIDE) * N_SIDE + c % N_SIDE))
+            r, c = r // N_SIDE, c // N_SIDE
+        out.append(FACES[n_face] + "".join(reversed(digits)))
+
+    return out
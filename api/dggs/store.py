@@ -0,0 +1,158 @@
+"""
+Precomputed Zone geometry, memory-mapped.
+
+A Zone's centroid and vertices never change so, for the grids small enough to store, they're worked out once, offline,
+by api.dggs.geometry and written to one file per resolution: a float64 array, in .npy format, of shape
+(zone count, 10) holding each Zone's centroid longitude & latitude then its four vertices' longitudes & latitudes, NW
+vertex first, in grid (Zone ordinal) order. To build the files, for resolutions 0 to 6, say:
+
+    flask --app api.app build-geometry-store 6
+
+At runtime the files are memory-mapped, read only, so any Zone's geometry is found by its ordinal in constant time,
+without copying the rest, and the operating system shares the pages read among all the processes serving the API.
+Zones of resolutions without a file have theirs calculated as before.
+"""
+import logging
+import os
+import threading
+import numpy as np
+from . import geometry
+from .index import FACES, CHILDREN, MAX_RESOLUTION, zone_count, zone_ids
+from .zone import Zone, RESOLUTION_SHIFT, ORDINAL_MASK
+
+# each Zone's record: centroid, then four vertices, each a longitude & latitude
+RECORD_WIDTH = 10
+
+# how many Zones to calculate at a time when building a file
+BUILD_BATCH_SIZE = 100000
+
+_arrays = {}
+_lock = threading.Lock()
+
+
+def _store_dir():
+    # the directory is set in api.config, which imports a great deal, so only fetch it when first needed
+    from api.config import GEOMETRY_STORE_DIR
+    return GEOMETRY_STORE_DIR
+
+
+def store_path(resolution: int, directory: str = None) -> str:
+    return os.path.join(directory or _store_dir(), "g{}.npy".format(resolution))
+
+
+def _array(resolution: int):
+    # the resolution's memory-mapped array, or None if it hasn't been built, opened once per process
+    try:
+        return _arrays[resolution]
+    except KeyError:
+        pass
+
+    with _lock:
+        if resolution not in _arrays:
+            array = None
+            path = store_path(resolution)
+            if os.path.exists(path):
+                try:
+                    array = np.load(path, mmap_mode="r")
+                    if array.dtype != np.float64 or array.shape != (zone_count(resolution), RECORD_WIDTH):
+                        logging.debug("ignoring geometry store {} of the wrong shape or type".format(path))
+                        array = None
+                except (OSError, ValueError) as e:
+                    logging.debug("could not open geometry store {}: {}".format(path, e))
+            _arrays[resolution] = array
+        return _arrays[resolution]
+
+
+def _ordinals(ids):
+    # each Zone's resolution and position in its grid, see zone_ordinal(), unpacked from Zones or read from IDs
+    if isinstance(ids[0], Zone):
+        packed = np.array(ids, dtype=np.int64)
+        return packed >> RESOLUTION_SHIFT, packed & ORDINAL_MASK
+    chars = np.array(ids, dtype="S{}".format(MAX_RESOLUTION + 1))
+    chars = chars.view(np.uint8).reshape(len(chars), MAX_RESOLUTION + 1)
+    resolution = np.count_nonzero(chars[:, 1:], axis=1)
+    ordinal = np.searchsorted(np.frombuffer(FACES.encode(), dtype=np.uint8), chars[:, 0]).astype(np.int64)
+    for i in range(MAX_RESOLUTION):
+        more = i < resolution
+        ordinal = np.where(more, ordinal * CHILDREN + chars[:, i + 1].astype(np.int64) - ord("0"), ordinal)
+    return resolution, ordinal
+
+
+def records(ids) -> np.ndarray:
+    """
+    The stored record of each of the given Zones, or their calculated equivalent for those of resolutions not stored.
+
+    A run of consecutive Zones of a stored resolution, as a page or export is, is read as a view of the file, without
+    copying it.
+
+    :param ids: a sequence of Zones, or of valid TB16Pix Zone IDs, of any mix of resolutions
+    :return: an array of shape (len(ids), RECORD_WIDTH), see the module's docstring
+    """
+    n = len(ids)
+    if n == 0:
+        return np.empty((0, RECORD_WIDTH))
+
+    resolution, ordinal = _ordinals(ids)
+    first = int(resolution[0])
+    if np.all(resolution == first) and _array(first) is not None:
+        array = _array(first)
+        start = int(ordinal[0])
+        if int(ordinal[-1]) - start == n - 1 and np.all(np.diff(ordinal) == 1):
+            return array[start:start + n]
+        return array[ordinal]
+
+    out = np.empty((n, RECORD_WIDTH))
+    calculate = np.ones(n, dtype=bool)
+    for r in np.unique(resolution):
+        array = _array(int(r))
+        if array is not None:
+            stored = resolution == r
+            out[stored] = array[ordinal[stored]]
+            calculate &= ~stored
+    if calculate.any():
+        centroids, vertices = geometry.geometries([ids[i] for i in np.flatnonzero(calculate)])
+        out[calculate, :2] = centroids
+        out[calculate, 2:] = vertices.reshape(len(centroids), 8)
+    return out
+
+
+def nuclei(ids) -> np.ndarray:
+    """
+    As api.dggs.geometry.nuclei(), from the store where it can be.
+    """
+    return records(ids)[:, :2]
+
+
+def geometries(ids):
+    """
+    As api.dggs.geometry.geometries(), from the store where it can be.
+    """
+    r = records(ids)
+    return r[:, :2], r[:, 2:].reshape(len(r), 4, 2)
+
+
+def build(resolution: int, directory: str = None):
+    """
+    Calculates and writes the geometry store file of the given resolution. It's written to a temporary file then
+    renamed so that processes serving the API never see a partial one.
+
+    :param resolution: the grid resolution to build the file for
+    :param directory: where to write it, GEOMETRY_STORE_DIR by default
+    """
+    path = store_path(resolution, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = "{}.{}.tmp.npy".format(path[:-len(".npy")], os.getpid())
+    count = zone_count(resolution)
+    array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(count, RECORD_WIDTH))
+    try:
+        for start in range(0, count, BUILD_BATCH_SIZE):
+            ids = list(zone_ids(resolution, start, start + BUILD_BATCH_SIZE))
+            centroids, vertices = geometry.geometries(ids)
+            array[start:start + len(ids), :2] = centroids
+            array[start:start + len(ids), 2:] = vertices.reshape(len(ids), 8)
+        array.flush()
+        del array
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
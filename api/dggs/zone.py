@@ -0,0 +1,178 @@
+"""
+A compact TB16Pix Zone value.
+
+A Zone is identified by its resolution and its ordinal, its position within the grid of its resolution (see
+zone_ordinal()), so a Zone here is an int packing the two: the resolution in the top byte, the ordinal below. Being an
+int it costs no more memory than one, hashes and compares as fast as one and whole lists of Zones convert straight to
+numpy int64 arrays. Its ID is only formatted when wanted, with str().
+"""
+import numpy as np
+from .index import FACES, CHILDREN, MAX_RESOLUTION, is_zone_id, zone_count
+
+# the bit the resolution starts at, above the ordinal which, at 6 x 9^15 for g15, needs 51 bits
+RESOLUTION_SHIFT = 56
+ORDINAL_MASK = (1 << RESOLUTION_SHIFT) - 1
+
+# the packed int of the first Zone of resolution 1, 1 finer, and of MAX_RESOLUTION: Zones are ordered by resolution
+_ONE_RESOLUTION = 1 << RESOLUTION_SHIFT
+_FIRST_OF_RESOLUTION_1 = _ONE_RESOLUTION
+_FIRST_OF_MAX_RESOLUTION = MAX_RESOLUTION << RESOLUTION_SHIFT
+
+# CHILDREN^r for each resolution r
+_POWERS = [CHILDREN ** r for r in range(MAX_RESOLUTION + 1)]
+
+# the base-9 digits of 0 to 9^3 - 1, formatted three at a time
+_TRIPLES = ["{}{}{}".format(n // 81, n // 9 % 9, n % 9) for n in range(CHILDREN ** 3)]
+
+
+class Zone(int):
+    """
+    A TB16Pix Zone. Make one with Zone.parse() from its ID or Zone.of() from its ordinal and resolution.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, ordinal: int, resolution: int) -> "Zone":
+        return cls(resolution << RESOLUTION_SHIFT | ordinal)
+
+    @classmethod
+    def parse(cls, zone_id: str) -> "Zone":
+        """
+        The Zone with the given ID, e.g. R1234
+
+        :raises ValueError: if zone_id isn't a valid TB16Pix Zone ID
+        """
+        if not is_zone_id(zone_id):
+            raise ValueError("{} is not a valid TB16Pix Zone ID".format(zone_id))
+        resolution = len(zone_id) - 1
+        # the digits are the base-9 digits of the Zone's position within its root face
+        ordinal = FACES.index(zone_id[0]) * _POWERS[resolution] + (int(zone_id[1:], CHILDREN) if resolution else 0)
+        return cls(resolution << RESOLUTION_SHIFT | ordinal)
+
+    @property
+    def resolution(self) -> int:
+        return self >> RESOLUTION_SHIFT
+
+    @property
+    def ordinal(self) -> int:
+        return self & ORDINAL_MASK
+
+    @property
+    def face(self) -> str:
+        return FACES[(self & ORDINAL_MASK) // _POWERS[self >> RESOLUTION_SHIFT]]
+
+    @property
+    def parent(self):
+        """
+        The Zone this is one of the children of, or None for a root Zone
+        """
+        if self < _FIRST_OF_RESOLUTION_1:
+            return None
+        # the ordinal's last base-9 digit dropped and the resolution one coarser, in the packed int
+        return Zone(((self >> RESOLUTION_SHIFT) - 1) << RESOLUTION_SHIFT | (self & ORDINAL_MASK) // CHILDREN)
+
+    def ancestor(self, resolution: int) -> "Zone":
+        """
+        The Zone of the given resolution, no finer than this one's, this is, or is a descendant of
+        """
+        levels = (self >> RESOLUTION_SHIFT) - resolution
+        if levels < 0:
+            raise ValueError("Zone {} has no ancestor of resolution {}".format(self, resolution))
+        return Zone.of((self & ORDINAL_MASK) // _POWERS[levels], resolution)
+
+    def children(self) -> list:
+        """
+        This Zone's children, in grid order, or an empty list for a Zone of MAX_RESOLUTION
+        """
+        if self >= _FIRST_OF_MAX_RESOLUTION:
+            return []
+        first = (self & ~ORDINAL_MASK) + _ONE_RESOLUTION | (self & ORDINAL_MASK) * CHILDREN
+        return list(map(Zone, range(first, first + CHILDREN)))
+
+    def __str__(self):
+        resolution = self >> RESOLUTION_SHIFT
+        face, position = divmod(self & ORDINAL_MASK, _POWERS[resolution])
+        digits = ""
+        while position:
+            position, triple = divmod(position, CHILDREN ** 3)
+            digits = _TRIPLES[triple] + digits
+        return FACES[face] + digits.rjust(resolution, "0")[-resolution:] if resolution else FACES[face]
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return "Zone('{}')".format(self)
+
+
+def zones(resolution: int, start: int = 0, stop: int = None):
+    """
+    Generates the Zones in positions start to stop (exclusive) of the grid of the given resolution, as zone_ids() does
+    their IDs.
+    """
+    count = zone_count(resolution)
+    start = min(max(start, 0), count)
+    stop = count if stop is None else min(max(stop, start), count)
+    first = resolution << RESOLUTION_SHIFT
+    return map(Zone, range(first + start, first + stop))
+
+
+def unpack(zones):
+    """
+    Each of many Zones' root face index, resolution and digits, -1 past its resolution, as arrays, by array arithmetic
+
+    :param zones: a non-empty sequence of Zones, of any mix of resolutions
+    :return: arrays of shape (len(zones),), (len(zones),) & (len(zones), MAX_RESOLUTION)
+    """
+    packed = np.fromiter(zones, dtype=np.int64, count=len(zones))
+    resolution = packed >> RESOLUTION_SHIFT
+    powers = np.array(_POWERS, dtype=np.int64)
+    face, position = np.divmod(packed & ORDINAL_MASK, powers[resolution])
+    digits = np.full((len(packed), MAX_RESOLUTION), -1, dtype=np.int64)
+    for i in range(int(resolution.max())):
+        place = resolution - 1 - i
+        digits[:, i] = np.where(place >= 0, position // powers[np.maximum(place, 0)] % CHILDREN, -1)
+    return face, resolution, digits
+
+
+def format_zones(zones) -> list:
+    """
+    The IDs of many Zones, as str() gives each, formatted all at once by array arithmetic, for a page or export of them
+
+    :param zones: a sequence of Zones, of any mix of resolutions
+    """
+    if len(zones) == 0:
+        return []
+    face, _, digits = unpack(zones)
+    # each ID's characters, its face's letter then its digits, padded with NULs to MAX_RESOLUTION + 1
+    chars = np.zeros((len(face), MAX_RESOLUTION + 1), dtype=np.uint8)
+    chars[:, 0] = np.frombuffer(FACES.encode(), dtype=np.uint8)[face]
+    chars[:, 1:] = np.where(digits >= 0, digits + ord("0"), 0)
+    return chars.view("S{}".format(MAX_RESOLUTION + 1)).ravel().astype(str).tolist()
+
+
+def descendant_count(zone: Zone, resolutions) -> int:
+    """
+    The number of descendants the given Zone has of each of the given resolutions, all finer than the Zone's
+    """
+    return sum(_POWERS[resolution - zone.resolution] for resolution in resolutions)
+
+
+def descendants(zone: Zone, resolutions, start: int = 0, stop: int = None):
+    """
+    Generates the descendants of the given Zone of each of the given resolutions, all finer than the Zone's, a
+    resolution's in turn, each in grid order, those in positions start to stop (exclusive) of that sequence.
+
+    A Zone's descendants of any one resolution are a contiguous run of that grid's ordinals so none need be visited to
+    skip to start, nor any Cell made.
+    """
+    start = max(start, 0)
+    for resolution in resolutions:
+        if stop is not None and start >= stop:
+            return
+        count = _POWERS[resolution - zone.resolution]
+        if start < count:
+            first = resolution << RESOLUTION_SHIFT | zone.ordinal * count
+            yield from map(Zone, range(first + start, first + (count if stop is None else min(stop, count))))
+        start = max(start - count, 0)
+        stop = None if stop is None else stop - count
@@ -0,0 +1,49 @@
+"""
+Modules imported only when first used.
+
+Some of the app's dependencies are slow to import but only needed by some routes. Such a module is imported with
+lazy_import(), which gives a stand-in that imports the real module the first time one of its attributes is used, so the
+app starts without it and only the first request that needs it waits for it. load_all() imports them all, for a server
+that forks its workers from a fully loaded app, see api.preload.
+"""
+import importlib
+
+_lazy_modules = []
+
+
+class LazyModule:
+    """
+    A stand-in for the named module, imported when one of its attributes is first used
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module() holds the import lock, so if two threads get here at once the module's imported once
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return "<lazy module '{}'{}>".format(self._name, "" if self._module is None else ", imported")
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    The named module, e.g. "markdown" or "geomet.wkt", to be imported when first used
+    """
+    module = LazyModule(name)
+    _lazy_modules.append(module)
+    return module
+
+
+def load_all():
+    """
+    Imports every module lazy_import() has deferred
+
+    :return: the modules' names
+    """
+    for module in _lazy_modules:
+        module.__getattr__("__name__")
+    return [module._name for module in _lazy_modules]
@@ -0,0 +1,209 @@
+"""
+The API's operational metrics, in Prometheus' text format, at /metrics.
+
+Each request is counted and its latency, to the end of its response's body, so including streaming it, the size of that
+body and how many Zones it rendered, see count_zones(), recorded in histograms, by its route, e.g.
+/collections/<string:collection_id>/items, the profile it asked for with _profile, "default" if none, and the Media Type
+of its response. That's all that's done per request, once its response has been sent.
+
+Everything else is only read when /metrics is requested: the Zone & response caches' hits, misses, evictions & size, see
+api.cache.LRUCache.stats(), how long the graph snapshot took to load, and the process' memory.
+
+When the API's served by several processes, e.g. gunicorn's workers, they share their metrics through files in the
+directory PROMETHEUS_MULTIPROC_DIR, if it's set, which should be emptied before the server starts. Requests' metrics
+are then totalled across the workers, and the caches' & memory's are of the worker answering, labelled with its pid.
+
+If METRICS is false none of this is done: prometheus_client isn't imported, no metric is registered and count_zones()
+does nothing.
+"""
+import os
+import time
+from flask import Response, g, has_request_context, request
+from api.config import METRICS
+
+# the profiles a request may ask for; any other's labelled "other", as labels' values mustn't be unbounded
+PROFILE_TOKENS = ["oai", "geosp", "dcat", "alt"]
+MULTIPROCESS = METRICS and os.environ.get("PROMETHEUS_MULTIPROC_DIR") is not None
+
+if METRICS:
+    from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+    REQUESTS = Counter(
+        "tb16pix_requests",
+        "Requests, by route, method, response status, profile & response Media Type",
+        ["route", "method", "status", "profile", "mediatype"]
+    )
+    REQUEST_SECONDS = Histogram(
+        "tb16pix_request_duration_seconds",
+        "Time taken to respond to requests, to the end of their response bodies",
+        ["route", "profile", "mediatype"],
+        buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+    )
+    RESPONSE_BYTES = Histogram(
+        "tb16pix_response_size_bytes",
+        "Sizes of response bodies",
+        ["route", "profile", "mediatype"],
+        buckets=[4 ** i for i in range(4, 16)]
+    )
+    ZONES_RENDERED = Histogram(
+        "tb16pix_zones_rendered",
+        "Zones rendered per request, by requests rendering any",
+        ["route"],
+        buckets=[10 ** i for i in range(9)]
+    )
+
+# the metrics of each set of labels, (route, method, status, profile, Media Type), as labels() is slow to find them
+_labelled = {}
+
+
+def _metrics_of(route: str, method: str, status: str, profile: str, mediatype: str) -> tuple:
+    labels = (route, method, status, profile, mediatype)
+    metrics = _labelled.get(labels)
+    if metrics is None:
+        metrics = _labelled[labels] = (
+            REQUESTS.labels(*labels),
+            REQUEST_SECONDS.labels(route, profile, mediatype),
+            RESPONSE_BYTES.labels(route, profile, mediatype),
+            ZONES_RENDERED.labels(route),
+        )
+    return metrics
+
+
+def count_zones(n: int):
+    """
+    Counts n more Zones as rendered by the current request, if there is one, for the tb16pix_zones_rendered histogram.
+    Does nothing if METRICS is false.
+
+    :param n: the number of Zones
+    """
+    if METRICS and has_request_context():
+        g.zones_rendered = g.get("zones_rendered", 0) + n
+
+
+def _started():
+    g.started = time.perf_counter()
+
+
+def _record(response: Response) -> Response:
+    # records the request once its response has been sent, for streamed responses once the last chunk has
+    requested = g._get_current_object()
+    req = request._get_current_object()
+    profile = req.args.get("_profile", "default")
+    if profile != "default" and profile not in PROFILE_TOKENS:
+        profile = "other"
+    requests, seconds, sizes, zones = _metrics_of(
+        req.url_rule.rule if req.url_rule is not None else "unmatched",
+        req.method,
+        str(response.status_code),
+        profile,
+        response.mimetype or ""
+    )
+    requests.inc()
+
+    def sent(size):
+        started = requested.get("started")
+        if started is not None:
+            seconds.observe(time.perf_counter() - started)
+        sizes.observe(size)
+        if "zones_rendered" in requested:
+            zones.observe(requested.zones_rendered)
+
+    if not response.is_streamed:
+        sent(response.content_length or 0)
+        return response
+
+    body = response.iter_encoded()
+
+    def send():
+        size = 0
+        try:
+            for chunk in body:
+                size += len(chunk)
+                yield chunk
+        finally:
+            sent(size)
+
+    response.response = send()
+    return response
+
+
+class _ProcessCollector:
+    """
+    The caches', graph snapshot's & memory's metrics of this process, read when collected
+    """
+    def __init__(self, pid_label: bool):
+        # label the metrics with the pid of the process, when totalled across several
+        self.labels = ["pid"] if pid_label else []
+        self.values = [str(os.getpid())] if pid_label else []
+
+    def _family(self, kind, name, documentation, labels=()):
+        return kind(name, documentation, labels=self.labels + list(labels))
+
+    def collect(self):
+        from api.cache import _response_cache
+        from api.model.feature import zone_cache
+        from api.preload import process_memory
+        from api.snapshot import _snapshot
+
+        counters = {
+            stat: self._family(CounterMetricFamily, "tb16pix_cache_{}".format(stat), "Cache {}".format(stat), ["cache"])
+            for stat in ["hits", "misses", "evictions", "expirations"]
+        }
+        gauges = {
+            "entries": self._family(GaugeMetricFamily, "tb16pix_cache_entries", "Entries cached", ["cache"]),
+            "bytes": self._family(GaugeMetricFamily, "tb16pix_cache_bytes", "Estimated memory cached", ["cache"]),
+            "max_bytes": self._family(GaugeMetricFamily, "tb16pix_cache_max_bytes", "Most memory cached", ["cache"]),
+            "hit_ratio": self._family(
+                GaugeMetricFamily, "tb16pix_cache_hit_ratio", "Fraction of cache lookups that were hits", ["cache"]),
+        }
+        for cache, stats in [("zone", zone_cache.stats()), ("response", _response_cache().stats())]:
+            for stat, family in list(counters.items()) + list(gauges.items()):
+                if stats[stat] is not None:
+                    family.add_metric(self.values + [cache], stats[stat])
+        yield from counters.values()
+        yield from gauges.values()
+
+        if _snapshot is not None:
+            load = self._family(GaugeMetricFamily, "tb16pix_graph_load_seconds", "Time taken to load the graph")
+            load.add_metric(self.values, _snapshot.load_seconds)
+            yield load
+            triples = self._family(GaugeMetricFamily, "tb16pix_graph_triples", "Triples in the graph")
+            triples.add_metric(self.values, len(_snapshot.graph))
+            yield triples
+
+        try:
+            memory = process_memory()
+        except OSError:
+            return
+        family = self._family(
+            GaugeMetricFamily, "tb16pix_process_memory_bytes", "Memory: resident, proportional & unique", ["kind"])
+        for kind, size in memory.items():
+            family.add_metric(self.values + [kind], size)
+        yield family
+
+
+def metrics():
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_ProcessCollector(pid_label=True))
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def instrument(app):
+    """
+    Records metrics of each of the app's requests, and serves them, and the process' others, at /metrics
+
+    :param app: the Flask app
+    """
+    if not METRICS:
+        raise RuntimeError("METRICS is false, so no metrics are recorded to serve")
+    if not MULTIPROCESS:
+        REGISTRY.register(_ProcessCollector(pid_label=False))
+    app.before_request(_started)
+    app.after_request(_record)
+    app.add_url_rule("/metrics", "metrics", metrics)
@@ -4,4 +4,8 @@ from .conformance import ConformanceRenderer
 from .collections import CollectionsRenderer
 from .collection import Collection, CollectionRenderer
 from .features import FeaturesRenderer
+from .export import ExportRenderer
+from .batch import NeighboursRenderer, FeaturesBatchRenderer
+from .locate import LocateRenderer
+from .descendants import DescendantsRenderer
 from .feature import Feature, FeatureRenderer, Geometry, GeometryRole, CRS
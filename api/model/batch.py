@@ -0,0 +1,171 @@
+import json
+from itertools import chain
+from flask import Response, stream_with_context
+from pyldapi import Renderer
+from rdflib import Graph, URIRef
+from api.config import *
+from api.dggs import is_zone_id, Zone
+from api.dggs.neighbours import neighbours, DIRECTIONS
+from api.metrics import count_zones
+from api.rdf import RDFWriter, FORMATS, add_resource
+from .feature import tb16pix_features, GEOSP_NAMESPACES, URI_BASE_ZONE
+
+# the Media Types many Features can be fetched as, the first the default
+BATCH_MEDIA_TYPES = [
+    "application/geo+json",
+    "text/turtle",
+    "application/n-triples",
+    "application/ld+json",
+    "application/rdf+xml",
+]
+
+
+def requested_zone_ids(request):
+    """
+    The Zone IDs a batch request asks about: a comma-separated zones parameter, of a GET query string or a POST form,
+    or a POST body of a JSON list of IDs, or a JSON object with such a list as its zones member.
+
+    :return: the IDs, in the order given, or None if none were given in any of these forms
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            body = body.get("zones")
+        if isinstance(body, list) and all(isinstance(z, str) for z in body):
+            return body
+        return None
+    if request.values.get("zones") is None:
+        return None
+    return [z.strip() for z in request.values.get("zones").split(",") if z.strip() != ""]
+
+
+def valid_zone_ids(zone_ids):
+    """
+    Whether a batch request's Zone IDs are valid and, if not, a message saying why
+    """
+    if zone_ids is None or len(zone_ids) == 0:
+        return False, "You must supply the Zones to look up: a comma-separated 'zones' parameter or a POSTed " \
+                      "JSON list of Zone IDs"
+    if len(zone_ids) > MAX_BATCH_ZONES:
+        return False, "You may only look up {} Zones at a time, you supplied {}".format(MAX_BATCH_ZONES, len(zone_ids))
+    invalid = [z for z in zone_ids if not is_zone_id(z)]
+    if len(invalid) > 0:
+        return False, "These are not TB16Pix Zone IDs, e.g. R1234: {}".format(", ".join(invalid[:10]))
+    return True, None
+
+
+class NeighboursRenderer:
+    """
+    The up, down, left & right neighbours, on the rHEALPix plane, of many Zones at once, as a JSON object of each
+    Zone's ID to its neighbours' IDs by direction
+    """
+    def __init__(self, request):
+        self.request = request
+        self.zone_ids = requested_zone_ids(request)
+        self.valid = self._valid_parameters()
+
+    def _valid_parameters(self):
+        allowed_params = ["zones"]
+
+        for p in self.request.values.keys():
+            if p not in allowed_params:
+                return False, \
+                       "The parameter {} you supplied is not allowed. " \
+                       "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params))
+
+        return valid_zone_ids(self.zone_ids)
+
+    def render(self):
+        if not self.valid[0]:
+            return Response(self.valid[1], status=400, mimetype="text/plain")
+
+        count_zones(len(self.zone_ids))
+        return Response(
+            json.dumps({
+                zone_id: dict(zip(DIRECTIONS, zone_neighbours))
+                for zone_id, zone_neighbours in zip(self.zone_ids, neighbours(self.zone_ids).tolist())
+            }),
+            mimetype="application/json"
+        )
+
+
+class FeaturesBatchRenderer:
+    """
+    Many Zones' Features at once, as one GeoJSON FeatureCollection or one GeoSPARQL RDF document, as /items would give
+    them, but of whichever Zones, of any grids, are asked for, each once, in the order first asked for.
+
+    Their geometries are read, or worked out, STREAM_CHUNK_SIZE Zones at a time, by tb16pix_features(), and the
+    response streamed as they are, so asking for hundreds of Zones costs one request's routing and negotiation, not
+    hundreds.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.zone_ids = requested_zone_ids(request)
+        self.mediatype = request.values.get("_mediatype") or \
+            request.accept_mimetypes.best_match(BATCH_MEDIA_TYPES, default=BATCH_MEDIA_TYPES[0])
+        self.valid = self._valid_parameters()
+
+    def _valid_parameters(self):
+        allowed_params = ["_mediatype", "zones"]
+
+        for p in self.request.values.keys():
+            if p not in allowed_params:
+                return False, \
+                       "The parameter {} you supplied is not allowed. " \
+                       "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params))
+
+        if self.mediatype not in BATCH_MEDIA_TYPES:
+            return False, "The parameter '_mediatype' you supplied is invalid. It must be one of '{}'".format(
+                "', '".join(BATCH_MEDIA_TYPES))
+
+        return valid_zone_ids(self.zone_ids)
+
+    def _feature_chunks(self):
+        # the Features, generated STREAM_CHUNK_SIZE at a time
+        zones = list(dict.fromkeys(Zone.parse(z) for z in self.zone_ids))
+        for start in range(0, len(zones), STREAM_CHUNK_SIZE):
+            yield tb16pix_features(zones[start:start + STREAM_CHUNK_SIZE], URI_BASE_ZONE)
+
+    def render(self):
+        if not self.valid[0]:
+            return Response(self.valid[1], status=400, mimetype="text/plain")
+
+        if self.mediatype == "application/geo+json":
+            return self._render_geojson()
+        else:
+            return self._render_geosp_rdf()
+
+    def _render_geojson(self):
+        count = len(dict.fromkeys(self.zone_ids))
+
+        def stream():
+            yield '{"type": "FeatureCollection", "features": ['
+            separator = ""
+            for features in self._feature_chunks():
+                yield separator + ", ".join(json.dumps(f.to_geo_json_dict()) for f in features)
+                separator = ", "
+            yield '], "numberMatched": {0}, "numberReturned": {0}}}'.format(count)
+
+        return Response(stream_with_context(stream()), mimetype=self.mediatype)
+
+    def _render_geosp_rdf(self):
+        features = ([(URIRef(f.uri), f.to_geosp_properties()) for f in chunk] for chunk in self._feature_chunks())
+
+        if self.mediatype in FORMATS:
+            writer = RDFWriter(FORMATS[self.mediatype], GEOSP_NAMESPACES)
+
+            def stream():
+                yield writer.header()
+                for resources in features:
+                    yield writer.resources(resources)
+                yield writer.footer()
+
+            return Response(stream_with_context(stream()), mimetype=self.mediatype)
+        else:
+            # formats only rdflib writes still need a Graph, but only one
+            g = Graph()
+            for prefix, namespace in GEOSP_NAMESPACES.items():
+                g.bind(prefix, namespace)
+            for s, properties in chain.from_iterable(features):
+                add_resource(g, s, properties)
+            return Response(g.serialize(format=self.mediatype), mimetype=self.mediatype)
@@ -6,9 +6,27 @@ import json
 from flask import Response, render_template
 from .spatial_object import SpatialExtent, TemporalExtent
 from .feature import Feature
-import markdown
+from api.dggs import grid_resolution, zone_count
+from api.snapshot import get_snapshot
 from rdflib import URIRef, Literal
-from rdflib.namespace import DCTERMS
+from rdflib.namespace import DCMITYPE, DCTERMS
+
+
+def count_features(collection_uri: str, collection_id: str) -> int:
+    """
+    The number of Features in a Collection, without enumerating them.
+
+    TB16Pix grids' Features are generated, not stored, so their count is worked out from the grid's resolution. Any other
+    Collection's Features are counted once per metadata graph snapshot and then remembered.
+    """
+    resolution = grid_resolution(collection_id)
+    if resolution is not None:
+        return zone_count(resolution)
+
+    return get_snapshot().derived(
+        ("feature_count", collection_uri),
+        lambda g: sum(1 for _ in g.subjects(predicate=DCTERMS.isPartOf, object=URIRef(collection_uri)))
+    )
 
 
 class Collection(object):
@@ -27,7 +45,7 @@ class Collection(object):
             elif p == DCTERMS.identifier:
                 self.identifier = str(o)
             elif p == DCTERMS.description:
-                self.description = markdown.markdown(str(o))
+                self.description = get_description(self.uri)
 
         # Collection other properties
         self.extent_spatial = None
@@ -41,9 +59,7 @@ class Collection(object):
         if other_links is not None:
             self.links.extend(other_links)
 
-        self.feature_count = 0
-        for s in g.subjects(predicate=DCTERMS.isPartOf, object=URIRef(self.uri)):
-            self.feature_count += 1
+        self.feature_count = count_features(self.uri, self.identifier)
 
     def to_dict(self):
         self.links = [x.__dict__ for x in self.links]
@@ -68,7 +84,7 @@ class Collection(object):
         g.add((
             c,
             RDF.type,
-            DCTERMS.Collection
+            DCMITYPE.Collection
         ))
 
         g.add((
@@ -0,0 +1,128 @@
+import json
+from itertools import islice
+from urllib.parse import urlencode
+from flask import Response, stream_with_context
+from api.config import *
+from api.dggs import MAX_RESOLUTION, Zone, descendants, descendant_count, grid_resolution
+from api.metrics import count_zones
+
+# the Media Types descendants can be listed as, the first the default
+DESCENDANTS_MEDIA_TYPES = ["application/json", "text/plain"]
+
+
+class DescendantsRenderer:
+    """
+    All the descendants of a Zone of a finer resolution, e.g. its 81 grandchildren, or of each of a range of them,
+    listed as a JSON object or as plain text, one Zone ID per line, without a request per level per Zone.
+
+    A Zone's descendants of a resolution are a contiguous run of that grid's Zones so they're generated straight from
+    their ordinals by api.dggs.descendants(), EXPORT_CHUNK_SIZE at a time, as the response is streamed, without making
+    a Cell or Feature for any. The whole list, of any length, can be streamed, or it can be paged through by offset,
+    its position in the list, and limit, with a Link header to the next page.
+    """
+    def __init__(self, request, collection_id, item_id):
+        self.request = request
+        self.collection_id = collection_id
+        self.item_id = item_id
+        self.mediatype = request.values.get("_mediatype") or \
+            request.accept_mimetypes.best_match(DESCENDANTS_MEDIA_TYPES, default=DESCENDANTS_MEDIA_TYPES[0])
+        self.valid = self._valid_parameters()
+
+    def _valid_parameters(self):
+        allowed_params = ["_mediatype", "resolution", "offset", "limit"]
+
+        for p in self.request.values.keys():
+            if p not in allowed_params:
+                return False, \
+                       "The parameter {} you supplied is not allowed. " \
+                       "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params))
+
+        if self.mediatype not in DESCENDANTS_MEDIA_TYPES:
+            return False, "The parameter '_mediatype' you supplied is invalid. It must be one of '{}'".format(
+                "', '".join(DESCENDANTS_MEDIA_TYPES))
+
+        resolution = grid_resolution(self.collection_id)
+        if resolution is None:
+            return False, "You have entered an unknown Collection ID"
+        try:
+            self.zone = Zone.parse(self.item_id)
+        except ValueError:
+            return False, "You have entered an invalid Feature ID. It must be a TB16Pix Zone ID, e.g. R1234"
+        if self.zone.resolution != resolution:
+            return False, "The Feature you have entered the ID for is not part of the Collection you entered the ID for"
+        if self.zone.resolution == MAX_RESOLUTION:
+            return False, "Zones of resolution {} have no descendants".format(MAX_RESOLUTION)
+
+        # a resolution, e.g. 9, or an inclusive range of them, e.g. 7-9, by default the children's
+        try:
+            bounds = [int(r) for r in self.request.values.get("resolution", str(resolution + 1)).split("-")]
+        except ValueError:
+            bounds = []
+        if len(bounds) not in [1, 2] or not resolution < bounds[0] <= bounds[-1] <= MAX_RESOLUTION:
+            return False, "The parameter 'resolution' must be a resolution, or a range of them, e.g. {}-{}, finer " \
+                          "than the Zone's, from {} to {}".format(resolution + 1, MAX_RESOLUTION, resolution + 1,
+                                                                  MAX_RESOLUTION)
+        self.resolutions = list(range(bounds[0], bounds[-1] + 1))
+
+        try:
+            self.offset = int(self.request.values.get("offset", 0))
+            self.limit = int(self.request.values["limit"]) if "limit" in self.request.values else None
+        except ValueError:
+            self.offset = -1
+        if self.offset < 0 or (self.limit is not None and self.limit < 1):
+            return False, "The parameter 'offset' must be a whole number and 'limit' a positive one"
+
+        return True, None
+
+    def _next_link(self, count):
+        # the URL of the next page of descendants, if limit leaves any out
+        if self.limit is None or self.offset + self.limit >= count:
+            return None
+        args = dict(self.request.args.items())
+        args["offset"] = self.offset + self.limit
+        return "{}?{}".format(self.request.base_url, urlencode(args))
+
+    def _chunks(self):
+        # the descendants' IDs, EXPORT_CHUNK_SIZE at a time
+        zones = descendants(
+            self.zone,
+            self.resolutions,
+            self.offset,
+            None if self.limit is None else self.offset + self.limit
+        )
+        while True:
+            chunk = list(map(str, islice(zones, EXPORT_CHUNK_SIZE)))
+            if len(chunk) == 0:
+                break
+            count_zones(len(chunk))
+            yield chunk
+
+    def render(self):
+        if not self.valid[0]:
+            return Response(self.valid[1], status=400, mimetype="text/plain")
+
+        count = descendant_count(self.zone, self.resolutions)
+        returned = min(max(count - self.offset, 0), count if self.limit is None else self.limit)
+        next_link = self._next_link(count)
+
+        def json_stream():
+            yield '{{"zone": "{}", "resolutions": {}, "numberMatched": {}, "numberReturned": {}, "zones": ['.format(
+                self.zone, json.dumps(self.resolutions), count, returned)
+            separator = ""
+            for chunk in self._chunks():
+                yield separator + ", ".join('"{}"'.format(z) for z in chunk)
+                separator = ", "
+            links = [{"href": self.request.url, "rel": "self", "type": self.mediatype}]
+            if next_link is not None:
+                links.append({"href": next_link, "rel": "next", "type": self.mediatype})
+            yield '], "links": {}}}'.format(json.dumps(links))
+
+        def text_stream():
+            for chunk in self._chunks():
+                yield "\n".join(chunk) + "\n"
+
+        stream = json_stream if self.mediatype == "application/json" else text_stream
+        response = Response(stream_with_context(stream()), mimetype=self.mediatype)
+        if next_link is not None:
+            response.headers["Link"] = '<{}>; rel="next"; type="{}"'.format(next_link, self.mediatype)
+        return response
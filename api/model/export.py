@@ -0,0 +1,194 @@
+import json
+import re
+from itertools import chain, repeat
+from string import Formatter
+import numpy as np
+from flask import Response, stream_with_context
+from rdflib import URIRef
+from api.config import *
+from api.dggs import grid_resolution, store, Zone, format_zones
+from api.dggs.cover import CoverTooLarge, WITHIN
+from api.metrics import count_zones
+from api.rdf import RDFWriter, TURTLE, NTRIPLES
+from .feature import Tb16PixFeature, GEOSP_NAMESPACES
+from .features import grid_zones, valid_bbox
+
+NDJSON = "application/x-ndjson"
+
+# the Media Types a grid can be exported as, the first the default
+EXPORT_MEDIA_TYPES = ["application/n-triples", "text/turtle", NDJSON]
+
+# a Range header, in Zones, e.g. zones=1000- to resume an export after its first 1000 Zones
+ZONES_RANGE_PATTERN = re.compile(r"^zones=([0-9]+)-([0-9]*)$")
+
+# stand-ins for a Zone's ID, centroid & boundary in the text written for one Zone, to make a template of it
+_ZONE = "__zone__"
+_CENTROID = "__centroid__"
+_BOUNDARY = "__boundary__"
+_COORDINATES = [1234.5, 6789.5]
+# the Zone of the template's Feature, whose stand-in ID can't be parsed as one; nothing in the template is its
+_STAND_IN = Zone.of(0, 0)
+
+
+def _template(text, fields):
+    # text as a str.format() template, each (stand-in, replacement) of fields replaced
+    text = text.replace("{", "{{").replace("}", "}}")
+    for field, replacement in fields:
+        text = text.replace(field, replacement)
+    return text
+
+
+def _fill(template, columns) -> str:
+    """
+    A str.format() template filled in with each row of columns, as template.format(*row) would be, for every row, all
+    at once. The template's parsed once, into its literal text & fields, then the text's repeated and interleaved with
+    the columns, by zip() & chain(), so no Python code is run per row.
+
+    :param template: a template whose fields are numbered, e.g. "{0} is at {1}, {2}", and have no format spec
+    :param columns: the strings of each field, by its number, each column as long as the others
+    """
+    parts = []
+    for literal, field, _, _ in Formatter().parse(template):
+        if literal != "":
+            parts.append(repeat(literal))
+        if field is not None:
+            parts.append(columns[int(field)])
+    return "".join(chain.from_iterable(zip(*parts)))
+
+
+def _coordinates_text(coordinates: np.ndarray) -> list:
+    """
+    Each column of coordinates' floats, as str() writes them. Zones share vertices, and the Zones of an equatorial face
+    in a row share latitudes and in a column longitudes, so the distinct floats, by their bits, so -0.0 isn't taken for
+    0.0, are written once each and the rest looked up.
+    """
+    bits = np.ascontiguousarray(coordinates, dtype=np.float64).view(np.int64)
+    distinct, inverse = np.unique(bits, return_inverse=True)
+    text = np.array(list(map(str, distinct.view(np.float64).tolist())), dtype=object)
+    return text[inverse.reshape(coordinates.shape)].T.tolist()
+
+
+class ExportRenderer:
+    """
+    All the Zones of a grid Collection, or those in a bbox of any of the forms /items takes, streamed as N-Triples,
+    Turtle or newline-delimited GeoJSON in grid order.
+
+    Each Zone's text is a template, made once per export from what /items writes for a Zone, filled in with its ID and
+    coordinates, which are read, or worked out, EXPORT_CHUNK_SIZE Zones at a time by api.dggs.store: no Feature or
+    rdflib term is made per Zone. A chunk's IDs are formatted, its distinct coordinates written, and the template
+    filled in for all its Zones, as arrays or by C loops, see _fill(), so no Python code is run per Zone.
+
+    An export can be resumed, or fetched in parts, with a Range header in units of Zones, e.g. "Range: zones=1000-"
+    for all but the first 1000. Every Zone of an export is written whole, and in the same place, so a client that has
+    N Zones, lines of NDJSON or geo:Feature resources of RDF, of an interrupted export can ask for the rest from N.
+    """
+    def __init__(self, request, collection_id):
+        self.request = request
+        self.collection_id = collection_id
+        self.resolution = grid_resolution(collection_id)
+        self.mediatype = request.values.get("_mediatype") or \
+            request.accept_mimetypes.best_match(EXPORT_MEDIA_TYPES, default=EXPORT_MEDIA_TYPES[0])
+        self.valid = self._valid_parameters()
+
+    def _valid_parameters(self):
+        allowed_params = ["_mediatype", "bbox", "bbox_mode"]
+
+        for p in self.request.values.keys():
+            if p not in allowed_params:
+                return False, \
+                       "The parameter {} you supplied is not allowed. " \
+                       "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params))
+
+        if self.resolution is None:
+            return False, "You have entered an unknown Collection ID"
+
+        if self.mediatype not in EXPORT_MEDIA_TYPES:
+            return False, "The parameter '_mediatype' you supplied is invalid. It must be one of '{}'".format(
+                "', '".join(EXPORT_MEDIA_TYPES))
+
+        return valid_bbox(self.request.values.get("bbox"), self.request.values.get("bbox_mode", WITHIN))
+
+    def _zone_template(self):
+        # the text written for a Zone, as /items would write it, with fields for its ID and the coordinates of its
+        # centroid then its boundary's vertices
+        if self.mediatype == NDJSON:
+            feature = Tb16PixFeature(
+                "https://w3id.org/dggs/zone/{}".format(_ZONE),
+                zone=_STAND_IN,
+                zone_data={
+                    "centroid": "POINT ({} {})".format(*_COORDINATES),
+                    "boundary": "POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))",
+                }
+            )
+            # the stand-in ID isn't the length of a real one
+            feature.isPartOf = self.collection_id
+            return _template(
+                json.dumps(feature.to_geo_json_dict()) + "\n",
+                [(_ZONE, "{0}"), (json.dumps(_COORDINATES), "[{1}, {2}]")]
+            )
+
+        feature = Tb16PixFeature(
+            "https://w3id.org/dggs/zone/{}".format(_ZONE),
+            zone=_STAND_IN,
+            zone_data={"centroid": _CENTROID, "boundary": _BOUNDARY}
+        )
+        writer = RDFWriter(TURTLE if self.mediatype == "text/turtle" else NTRIPLES, GEOSP_NAMESPACES)
+        text = writer.resources([(URIRef(feature.uri), feature.to_geosp_properties())])
+        # N-Triples' blank nodes are labelled: make them unique to the Zone
+        text = re.sub(r"_:b([0-9]+)", "_:{}b\\1".format(_ZONE), text)
+        return _template(text, [
+            (_ZONE, "{0}"),
+            (_CENTROID, "POINT ({1} {2})"),
+            (_BOUNDARY, "POLYGON (({3} {4}, {5} {6}, {7} {8}, {9} {10}, {3} {4}))"),
+        ])
+
+    def _header(self):
+        if self.mediatype == "text/turtle":
+            return RDFWriter(TURTLE, GEOSP_NAMESPACES).header()
+        return ""
+
+    def _zones_text(self, grid_zone_list, start, stop):
+        template = self._zone_template()
+        for chunk_start in range(start, stop, EXPORT_CHUNK_SIZE):
+            zones = list(grid_zone_list(chunk_start, min(chunk_start + EXPORT_CHUNK_SIZE, stop)))
+            count_zones(len(zones))
+
+            # each Zone's ID, then its coordinates, as "{}".format() would write them, in the template's order
+            if self.mediatype == NDJSON:
+                coordinates = store.nuclei(zones)
+            else:
+                coordinates = store.records(zones)
+            yield _fill(template, [format_zones(zones)] + _coordinates_text(coordinates))
+
+    def render(self):
+        if not self.valid[0]:
+            return Response(self.valid[1], status=400, mimetype="text/plain")
+
+        try:
+            count, grid_zone_list = grid_zones(
+                self.resolution,
+                self.request.values.get("bbox"),
+                self.request.values.get("bbox_mode", WITHIN)
+            )
+        except CoverTooLarge as e:
+            return Response(str(e), status=400, mimetype="text/plain")
+
+        headers = {"Accept-Ranges": "zones"}
+        start, stop, status = 0, count, 200
+        requested = ZONES_RANGE_PATTERN.match(self.request.headers.get("Range", ""))
+        if requested is not None:
+            start = int(requested.group(1))
+            if requested.group(2) != "":
+                stop = min(int(requested.group(2)) + 1, count)
+            if start >= stop:
+                headers["Content-Range"] = "zones */{}".format(count)
+                return Response("The range of Zones you requested is not in this export of {} Zones".format(count),
+                                status=416, mimetype="text/plain", headers=headers)
+            headers["Content-Range"] = "zones {}-{}/{}".format(start, stop - 1, count)
+            status = 206
+
+        def stream():
+            yield self._header()
+            yield from self._zones_text(grid_zone_list, start, stop)
+
+        return Response(stream_with_context(stream()), status=status, mimetype=self.mediatype, headers=headers)
@@ -6,11 +6,16 @@ import json
 from flask import Response, render_template
 from .spatial_object import SpatialExtent, TemporalExtent
 from rdflib import URIRef, Literal
-from rdflib.namespace import DCTERMS
+from rdflib.namespace import DCMITYPE, DCTERMS
 from enum import Enum
-from geomet import wkt
-from geojson_rewind import rewind
-import markdown
+from api.cache import LRUCache
+from api.lazy import lazy_import
+from api.metrics import count_zones
+from api.rdf import RDFWriter, FORMATS, add_resource
+from api.dggs import neighbours, store, Zone, MAX_RESOLUTION
+
+wkt = lazy_import("geomet.wkt")
+geojson_rewind = lazy_import("geojson_rewind")
 
 
 class GeometryRole(Enum):
@@ -85,7 +90,7 @@ class Feature(object):
             elif p == DCTERMS.title:
                 self.title = str(o)
             elif p == DCTERMS.description:
-                self.description = markdown.markdown(str(o))
+                self.description = get_description(self.uri)
             elif p == DCTERMS.isPartOf:
                 self.isPartOf = str(o)
 
@@ -153,64 +158,85 @@ class Feature(object):
         return {
             "id": self.uri,
             "type": "Feature",
-            "geometry": rewind(geojson_geometry),
+            "geometry": geojson_rewind.rewind(geojson_geometry),
             "properties": properties
         }
 
+    def to_geosp_properties(self) -> list:
+        """
+        This Feature's GeoSPARQL properties, each Geometry a blank node, as an api.rdf resource's properties
+        """
+        properties = [(RDF.type, GEO.Feature)]
+        for geom in self.geometries:
+            geometry_properties = [
+                (RDFS.label, Literal(geom.label)),
+                (GEOX.hasRole, URIRef(geom.role.value)),
+                (GEOX.inCRS, URIRef(geom.crs.value)),
+            ]
+            if geom.crs == CRS.TB16PIX:
+                geometry_properties.append((GEOX.asDGGS, Literal(geom.coordinates, datatype=GEOX.DggsLiteral)))
+            else:  # WGS84
+                geometry_properties.append((GEO.asWKT, Literal(geom.coordinates, datatype=GEO.WktLiteral)))
+            properties.append((GEO.hasGeometry, geometry_properties))
+
+        return properties
+
     def to_geosp_graph(self):
         g = Graph()
         g.bind("geo", GEO)
         g.bind("geox", GEOX)
-
-        f = URIRef(self.uri)
-        g.add((
-            f,
-            RDF.type,
-            GEO.Feature
-        ))
-        for geom in self.geometries:
-            this_geom = BNode()
-            g.add((
-                f,
-                GEO.hasGeometry,
-                this_geom
-            ))
-            g.add((
-                this_geom,
-                RDFS.label,
-                Literal(geom.label)
-            ))
-            g.add((
-                this_geom,
-                GEOX.hasRole,
-                URIRef(geom.role.value)
-            ))
-            g.add((
-                this_geom,
-                GEOX.inCRS,
-                URIRef(geom.crs.value)
-            ))
-            if geom.crs == CRS.TB16PIX:
-                g.add((
-                    this_geom,
-                    GEOX.asDGGS,
-                    Literal(geom.coordinates, datatype=GEOX.DggsLiteral)
-                ))
-            else:  # WGS84
-                g.add((
-                    this_geom,
-                    GEO.asWKT,
-                    Literal(geom.coordinates, datatype=GEO.WktLiteral)
-                ))
+        add_resource(g, URIRef(self.uri), self.to_geosp_properties())
 
         return g
 
 
+# the prefixes GeoSPARQL Features, and their Collections, are written with
+GEOSP_NAMESPACES = {
+    "dcmitype": DCMITYPE,
+    "dcterms": DCTERMS,
+    "geo": GEO,
+    "geox": GEOX,
+    "rdfs": RDFS,
+}
+
+URI_BASE_ZONE = "https://w3id.org/dggs/tb16pix/zone/"
+
+# each Zone's geometries, and neighbours once wanted, by Zone, shared by all requests, up to ZONE_CACHE_BYTES of them
+zone_cache = LRUCache(ZONE_CACHE_BYTES)
+
+
+def _calculate_neighbours(zone_id):
+    # (direction, Zone ID) pairs, as Cell.neighbors() would give them, sorted by direction
+    return list(zip(neighbours.DIRECTIONS, neighbours.zone_neighbours(zone_id)))
+
+
+def _child_ids(zone_id: str) -> list:
+    # the IDs of a Zone's children, in grid order: its ID and each digit
+    return [zone_id + digit for digit in "012345678"]
+
+
+def _zone_data(centroid, vertices) -> dict:
+    # the WGS84 geometries of a Zone, from the centroid and vertices api.dggs.store gives
+    return {
+        "centroid": "POINT ({} {})".format(*centroid.tolist()),
+        "boundary": "POLYGON (({0}, {1}, {2}, {3}, {0}))".format(*("{} {}".format(*p) for p in vertices.tolist())),
+    }
+
+
+def get_zone_data(zone: Zone) -> dict:
+    return zone_cache.get_or_compute(
+        zone,
+        lambda: _zone_data(*(a[0] for a in store.geometries([zone])))
+    )
+
+
 class Tb16PixFeature(Feature):
     def __init__(
             self,
             uri: str,
             other_links: List[Link] = None,
+            zone: Zone = None,
+            zone_data: dict = None,
     ):
         self.uri = uri
 
@@ -219,7 +245,11 @@ class Tb16PixFeature(Feature):
         self.identifier = self.uri.split("/")[-1]
         self.title = "Zone {}".format(self.identifier)
         self.description = None
-        self.isPartOf = "g{}".format(len(self.identifier))
+        self.isPartOf = "g{}".format(len(self.identifier) - 1)  # the grid of its resolution
+        self.zone = zone if zone is not None else Zone.parse(self.identifier)
+
+        # geometries are calculated once per Zone, then cached
+        self._zone = zone_data if zone_data is not None else get_zone_data(self.zone)
         self.geometries = [
             Geometry(
                 "POINT ({})".format(self.identifier),
@@ -227,67 +257,10 @@ class Tb16PixFeature(Feature):
                 "TB16Pix Cell Geometry",
                 CRS.TB16PIX
             ),
+            Geometry(self._zone["centroid"], GeometryRole.Centroid, "WGS84 Cell centroid", CRS.WGS84),
+            Geometry(self._zone["boundary"], GeometryRole.Boundary, "WGS84 Boundary", CRS.WGS84),
         ]
 
-        from rhealpixdggs.dggs import Cell
-
-        def _suid_from_string(zone_id):
-            if len(zone_id) == 1:
-                return [zone_id[0]]
-            else:
-                return [zone_id[0]] + [int(x) for x in zone_id[1:]]
-
-        c = Cell(TB16Pix, _suid_from_string(self.identifier))
-        centroid = c.nucleus(plane=False)
-        self.geometries.append(
-            Geometry(
-                "POINT ({} {})".format(centroid[0], centroid[1]),
-                GeometryRole.Centroid,
-                "WGS84 Cell centroid",
-                CRS.WGS84),
-        )
-        v = c.vertices(plane=False)
-
-        self.geometries.append(
-            Geometry(
-                "POLYGON (({0}, {1}, {2}, {3}, {0}))".format(
-                    "{} {}".format(v[0][0], v[0][1]),
-                    "{} {}".format(v[1][0], v[1][1]),
-                    "{} {}".format(v[2][0], v[2][1]),
-                    "{} {}".format(v[3][0], v[3][1])
-                ),
-                GeometryRole.Boundary,
-                "WGS84 Boundary",
-                CRS.WGS84),
-        )
-
-        URI_BASE_ZONE = Namespace("https://w3id.org/dggs/tb16pix/zone/")
-
-        def _calculate_parent(zone_id):
-            if len(zone_id) == 1:
-                return URI_BASE_ZONE + "Earth", "Earth"
-            else:  # <LETTER>...<LETTER><0-8>*9
-                return URI_BASE_ZONE + zone_id[:-1], zone_id[:-1]
-
-        self.parent = _calculate_parent(self.identifier)
-
-        def _calculate_children(zone_id):
-            if len(zone_id) < 15:
-                return [(URI_BASE_ZONE + zone_id + str(n), zone_id + str(n)) for n in range(9)]
-            else:
-                return None
-
-        self.children = _calculate_children(self.identifier)
-
-        def _calculate_neighbours(zone_id):
-            c = Cell(TB16Pix, _suid_from_string(zone_id))
-            neighbours = []
-            for k, v in sorted(c.neighbors().items()):
-                neighbours.append((k, str(v)))
-            return neighbours
-
-        self.neighbours = _calculate_neighbours(self.identifier)
-
         # Feature other properties
         self.extent_spatial = None
         self.extent_temporal = None
@@ -300,10 +273,57 @@ class Tb16PixFeature(Feature):
         if other_links is not None:
             self.links.extend(other_links)
 
+    @property
+    def parent(self):
+        # (URI, ID) of the Zone's parent, Earth for a root Zone's, worked out from the Zone when wanted: a Zone's ID
+        # is its parent's and one more digit
+        if self.zone.resolution == 0:
+            return URI_BASE_ZONE + "Earth", "Earth"
+        parent_id = self.identifier[:-1]
+        return URI_BASE_ZONE + parent_id, parent_id
+
+    @property
+    def children(self):
+        # (URI, ID) of each of the Zone's children, or None if it's of the finest resolution
+        if self.zone.resolution == MAX_RESOLUTION:
+            return None
+        return [(URI_BASE_ZONE + child_id, child_id) for child_id in _child_ids(self.identifier)]
+
+    @property
+    def neighbours(self):
+        # only calculated if wanted, but then cached along with the rest of the Zone's data
+        if "neighbours" not in self._zone:
+            self._zone = dict(self._zone, neighbours=_calculate_neighbours(self.identifier))
+            zone_cache.put(self.zone, self._zone)
+        return self._zone["neighbours"]
+
+
+def tb16pix_features(zones: List[Zone], uri_base: str = URI_BASE_ZONE) -> List[Tb16PixFeature]:
+    """
+    Tb16PixFeatures for many Zones, the geometries of those not already cached all calculated in one pass
+
+    :param zones: the Zones
+    :param uri_base: the base of the Features' URIs, to which each Zone's ID is appended
+    """
+    count_zones(len(zones))
+    data = [zone_cache.get(zone) for zone in zones]
+
+    missing = [i for i, zone_data in enumerate(data) if zone_data is None]
+    if len(missing) > 0:
+        centroids, vertices = store.geometries([zones[i] for i in missing])
+        for i, c, v in zip(missing, centroids, vertices):
+            data[i] = _zone_data(c, v)
+            zone_cache.put(zones[i], data[i])
+
+    return [
+        Tb16PixFeature(uri_base + str(zone), zone=zone, zone_data=zone_data) for zone, zone_data in zip(zones, data)
+    ]
+
 
 class FeatureRenderer(Renderer):
     def __init__(self, request, feature_uri: str, other_links: List[Link] = None):
         self.feature = Tb16PixFeature(feature_uri)
+        count_zones(1)
         self.links = []
         if other_links is not None:
             self.links.extend(other_links)
@@ -372,12 +392,17 @@ class FeatureRenderer(Renderer):
         )
 
     def _render_geosp_rdf(self):
-        g = self.feature.to_geosp_graph()
-
         # serialise in the appropriate RDF format
-        if self.mediatype in ["application/rdf+json", "application/json"]:
-            return Response(g.serialize(format="json-ld"), mimetype=self.mediatype)
+        if self.mediatype in FORMATS:
+            writer = RDFWriter(FORMATS[self.mediatype], GEOSP_NAMESPACES)
+            return Response(
+                writer.header()
+                + writer.resources([(URIRef(self.feature.uri), self.feature.to_geosp_properties())])
+                + writer.footer(),
+                mimetype=self.mediatype
+            )
         elif self.mediatype in Renderer.RDF_MEDIA_TYPES:
+            g = self.feature.to_geosp_graph()
             return Response(g.serialize(format=self.mediatype), mimetype=self.mediatype)
         else:
             return Response(
@@ -4,16 +4,125 @@ from .profiles import *
 from api.config import *
 from .link import *
 from .collection import Collection
-from .feature import Feature
+from .feature import Feature, tb16pix_features, GEOSP_NAMESPACES
+from api.dggs.cover import ZoneCover, CoverTooLarge, WITHIN, INTERSECTS
+from api.dggs import is_zone_id, grid_resolution, zone_count, zone_range, zones
+from api.metrics import count_zones
+from api.rdf import RDFWriter, FORMATS, add_resource, graph_resources
 import json
-from flask import Response, render_template
+from flask import Response, render_template, stream_with_context
 from flask_paginate import Pagination
 from rdflib import Graph, Literal, URIRef
 from rdflib.namespace import DCAT, DCTERMS, RDF
 import re
+from itertools import chain, islice
+
+
+# the base of the URIs Zones are listed with
+ZONE_LIST_URI_BASE = "https://w3id.org/dggs/zone/"
+
+
+class LazyPage:
+    """
+    A page of things, e.g. Features, that is generated afresh each time it's iterated over rather than kept in memory
+    """
+    def __init__(self, generate, length: int):
+        """
+        :param generate: a function returning a new iterator over the page's things
+        :param length: the number of things on the page
+        """
+        self._generate = generate
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return iter(self._generate())
+
+
+# the forms a bbox parameter can take
+BBOX_FORMATS = {
+    "coords": r"([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+)",  # Lat Longs, e.g. 160.6,-55.95,-170,-25.89
+    "cell_id": r"([A-Z][0-9]{0,15})$",  # single DGGS Cell ID, e.g. R1234
+    "cell_ids": r"([A-Z][0-9]{0,15}),([A-Z][0-9]{0,15})$",  # two DGGS cells, e.g. R123,R456
+}
+
+
+def bbox_type(bbox: str):
+    """
+    Which of BBOX_FORMATS a bbox parameter is in, or None if it's in none of them
+    """
+    found = None
+    for k, v in BBOX_FORMATS.items():
+        if re.match(v, bbox):
+            found = k
+    return found
+
+
+def valid_bbox(bbox: str, bbox_mode: str):
+    """
+    Whether bbox & bbox_mode parameters, either of which may be None, are valid and, if not, a message saying why
+    """
+    if bbox_mode not in [WITHIN, INTERSECTS]:
+        return False, "The parameter 'bbox_mode' you supplied is invalid. It must be either '{}' or '{}'".format(
+            WITHIN, INTERSECTS)
+
+    if bbox is not None:
+        if bbox_type(bbox) in ["cell_id", "cell_ids"]:
+            # DGGS Cell IDs must be TB16Pix Zone IDs
+            if not all(is_zone_id(c) for c in bbox.split(",")):
+                return False, "The parameter 'bbox' you supplied is invalid. DGGS Cell IDs must be TB16Pix " \
+                              "Zone IDs, e.g. R1234"
+            return True, None
+        if re.match(BBOX_FORMATS["coords"], bbox):
+            try:
+                min_lon, min_lat, max_lon, max_lat = (float(x) for x in bbox.split(","))
+            except ValueError:
+                min_lat = None
+            if min_lat is None or not (-90 <= min_lat <= max_lat <= 90 and
+                                       -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+                return False, "The parameter 'bbox' you supplied is invalid. Long/lat values must be min " \
+                              "longitude, min latitude, max longitude, max latitude, in degrees"
+            return True, None
+        return False, "The parameter 'bbox' you supplied is invalid. Must be either two pairs of long/lat values, " \
+                      "a DGGS Cell ID or a pair of DGGS Cell IDs"
+
+    return True, None
+
+
+def grid_zones(resolution: int, bbox: str = None, bbox_mode: str = WITHIN):
+    """
+    The Zones of a grid or, if a valid bbox is given, those of them within, or intersecting, it.
+
+    :param resolution: the grid's resolution
+    :param bbox: a bbox parameter, in any of BBOX_FORMATS
+    :param bbox_mode: WITHIN or INTERSECTS
+    :return: the number of Zones and a function generating the Zones in positions start to stop (exclusive), in grid
+    order
+    """
+    if bbox is not None and bbox_type(bbox) in ["cell_id", "cell_ids"]:
+        # the Zones within one DGGS Cell, or a run of them, are a contiguous range of the Grid's Zones
+        first_start, stop = zone_range(resolution, *bbox.split(","), intersects=bbox_mode == INTERSECTS)
+        return stop - first_start, lambda start, end: zones(
+            resolution,
+            first_start + start,
+            min(first_start + end, stop)
+        )
+    elif bbox is not None and bbox_type(bbox) == "coords":
+        # Features are generated so the Zones of the Grid in the box are worked out, not queried for
+        cover = ZoneCover(bbox.split(","), resolution, bbox_mode)
+        return len(cover), cover.zones
+    else:
+        # Features in this Grid generated straight from their ordinals
+        return zone_count(resolution), lambda start, end: zones(resolution, start, end)
 
 
 class FeaturesList:
+    """
+    A page of a Collection's Features: the page, of per_page, or the first limit, asked for, and the kind of bbox filter,
+    if any, it's to be filtered by
+    """
     def __init__(self, request, collection_id):
         self.request = request
         self.page = (
@@ -36,233 +145,60 @@ class FeaturesList:
             self.start = (self.page - 1) * self.per_page
             self.end = self.start + self.per_page
 
-        g = get_graph()
-
         # get Collection
+        g = get_graph()
         for s in g.subjects(predicate=DCTERMS.identifier, object=Literal(collection_id)):
             self.collection = Collection(str(s))
 
-        # get list of Features within this Collection
-        features_uris = []
         # filter if we have a filtering param
-        if request.values.get("bbox") is not None:
-            # work out what sort of BBOX filter it is and filter by that type
-            features_uris = self.get_feature_uris_by_bbox()
-        else:
-            # all features in list
-            for s in g.subjects(predicate=DCTERMS.isPartOf, object=URIRef(self.collection.uri)):
-                features_uris.append(s)
-
-        self.feature_count = len(features_uris)
-        # truncate the list of Features to this page
-        page = features_uris[self.start:self.end]
-
-        # Features - only this page's
-        self.features = []
-        for s in page:
-            description = None
-            for p, o in g.predicate_objects(subject=s):
-                if p == DCTERMS.identifier:
-                    identifier = str(o)
-                elif p == DCTERMS.title:
-                    title = str(o)
-                elif p == DCTERMS.description:
-                    description = str(o)
-            self.features.append(
-                (str(s), identifier, title, description)
-            )
-
         self.bbox_type = None
+        if request.values.get("bbox") is not None:
+            # work out what sort of BBOX filter it is
+            self._set_bbox_type()
 
-    def get_feature_uris_by_bbox(self):
-        allowed_bbox_formats = {
-            "coords": r"([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+)",  # Lat Longs, e.g. 160.6,-55.95,-170,-25.89
-            "cell_id": r"([A-Z][0-9]{0,15})$",  # single DGGS Cell ID, e.g. R1234
-            "cell_ids": r"([A-Z][0-9]{0,15}),([A-Z][0-9]{0,15})",  # two DGGS cells, e.g. R123,R456
-        }
-        for k, v in allowed_bbox_formats.items():
-            if re.match(v, self.request.values.get("bbox")):
-                self.bbox_type = k
-
-        if self.bbox_type is None:
-            return None
-        elif self.bbox_type == "coords":
-            return self._get_filtered_features_list_bbox_wgs84()
-        elif self.bbox_type == "cell_id":
-            return self._get_filtered_features_list_bbox_dggs()
-        elif self.bbox_type == "cell_ids":
-            pass
-
-    def _get_filtered_features_list_bbox_wgs84(self):
-        parts = self.request.values.get("bbox").split(",")
-
-        demo = """
-            149.041411262992398 -35.292795884738389, 
-            149.041411262992398 -35.141378579917053, 
-            149.314863045854082 -35.141378579917053,
-            149.314863045854082 -35.292795884738389,
-            149.041411262992398 -35.292795884738389
-            """
-
-        q = """
-            PREFIX dcterms: <http://purl.org/dc/terms/>
-            PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-            PREFIX geof: <http://www.opengis.net/def/function/geosparql/>
-            PREFIX ogcapi: <https://data.surroundaustralia.com/def/ogcapi/>
-
-            SELECT ?f
-            WHERE {{
-                ?f a ogcapi:Feature ;
-                   dcterms:isPartOf <{collection_uri}> ;            
-                   geo:hasGeometry/geo:asWKT ?wkt .
-    
-                FILTER (geof:sfWithin(?wkt, 
-                    '''
-                    <http://www.opengis.net/def/crs/OGC/1.3/CRS84>
-                    POLYGON ((
-                        {tl_lon} {tl_lat}, 
-                        {tl_lon} {br_lat}, 
-                        {br_lon} {br_lat},
-                        {br_lon} {tl_lat},
-                        {tl_lon} {tl_lat}
-                    ))
-                    '''^^geo:wktLiteral))
-            }}
-            ORDER BY ?f
-            """.format(**{
-            "collection_uri": self.collection.uri,
-            "tl_lon": parts[0],
-            "tl_lat": parts[1],
-            "br_lon": parts[2],
-            "br_lat": parts[3]
-        })
-        features_uris = []
-        for r in get_graph().query(q):
-            features_uris.append(r["f"])
-
-        return features_uris
-
-    def _get_filtered_features_list_bbox_dggs(self):
-        # # geo:sfIntersects - any Cell of the Feature is within the BBox
-        # q = """
-        #     PREFIX dcterms: <http://purl.org/dc/terms/>
-        #     PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-        #     PREFIX geox: <https://linked.data.gov.au/def/geox#>
-        #     PREFIX ogcapi: <https://data.surroundaustralia.com/def/ogcapi/>
-        #
-        #     SELECT ?f
-        #     WHERE {{
-        #         ?f a ogcapi:Feature ;
-        #            dcterms:isPartOf <https://linked.data.gov.au/dataset/asgs2016/statisticalarealevel1/> .
-        #         ?f geo:hasGeometry/geox:asDGGS ?dggs .
-        #
-        #         BIND (STRAFTER(STR(?dggs), "> ") AS ?coords)
-        #
-        #         FILTER CONTAINS(?coords, "{}")
-        #     }}
-        #     """.format(self.request.values.get("bbox"))
-        # # TODO: update as RDFlib updates
-        # # for r in get_graph().query(q):
-        # #     features_uris.append((r["f"], r["prefLabel"]))
-        # from SPARQLWrapper import SPARQLWrapper, JSON
-        # sparql = SPARQLWrapper(SPARQL_ENDPOINT)
-        # sparql.setQuery(q)
-        # sparql.setReturnFormat(JSON)
-        # ret = sparql.queryAndConvert()["results"]["bindings"]
-        # return [URIRef(r["f"]["value"]) for r in ret]
-
-        # geo:sfWithin - every Cell of the Feature is within the BBox
-        q = """
-            PREFIX dcterms: <http://purl.org/dc/terms/>
-            PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-            PREFIX geox: <https://linked.data.gov.au/def/geox#>
-            PREFIX ogcapi: <https://data.surroundaustralia.com/def/ogcapi/>            
-            
-            SELECT ?f ?coords
-            WHERE {{
-                ?f a ogcapi:Feature ;
-                   dcterms:isPartOf <{}> .
-                ?f geo:hasGeometry/geox:asDGGS ?dggs .
-    
-                BIND (STRAFTER(STR(?dggs), "> ") AS ?coords)
-            }}
-            """.format(self.collection.uri)
-        from SPARQLWrapper import SPARQLWrapper, JSON
-        sparql = SPARQLWrapper(SPARQL_ENDPOINT)
-        sparql.setQuery(q)
-        sparql.setReturnFormat(JSON)
-        ret = sparql.queryAndConvert()["results"]["bindings"]
-        feature_ids = []
-        for r in ret:
-            within = True
-            for cell in r["coords"]["value"].split(" "):
-                if not str(cell).startswith(self.request.values.get("bbox")):
-                    within = False
-                    break
-            if within:
-                feature_ids.append(URIRef(r["f"]["value"]))
-
-        return feature_ids
-
-    def _get_filtered_features_list_bbox_paging(self):
-        pass
+    def _set_bbox_type(self):
+        self.bbox_type = bbox_type(self.request.values.get("bbox"))
 
 
 class Tb16PixFeaturesList(FeaturesList):
     def __init__(self, request, collection_id):
-        self.request = request
-        self.page = (
-            int(request.values.get("page")) if request.values.get("page") is not None else 1
-        )
-        self.per_page = (
-            int(request.values.get("per_page"))
-            if request.values.get("per_page") is not None
-            else 20
-        )
-        # limit
-        self.limit = int(request.values.get("limit")) if request.values.get("limit") is not None else None
+        super().__init__(request, collection_id)
 
-        # if limit is set, ignore page & per_page
-        if self.limit is not None:
-            self.start = 0
-            self.end = self.limit
-        else:
-            # generate list for requested page and per_page
-            self.start = (self.page - 1) * self.per_page
-            self.end = self.start + self.per_page
+        # TB16Pix generates Features, it doesn't retrieve them from a DB
+        resolution = grid_resolution(collection_id)
+        if resolution is None:
+            raise ValueError("You have entered an unknown Collection ID")
 
-        # get Collection
-        g = get_graph()
-        for s in g.subjects(predicate=DCTERMS.identifier, object=Literal(collection_id)):
-            self.collection = Collection(str(s))
+        self.bbox_mode = request.values.get("bbox_mode", WITHIN)
+        self.feature_count, grid_zone_list = grid_zones(resolution, request.values.get("bbox"), self.bbox_mode)
 
-        # TB16Pix generates Features, it doesn't retrieve them from a DB
+        def page_zones():
+            return grid_zone_list(max(self.start, 0), max(self.end, 0))
 
-        # filter if we have a filtering param
-        self.features = []
-        if request.values.get("bbox") is not None:
-            # work out what sort of BBOX filter it is and filter by that type
-            self.features = self.get_feature_uris_by_bbox()
-        else:
-            # all features in this Grid
-            for cell in TB16Pix.grid(int(collection_id[-1])):
-                self.features.append((
-                    "https://w3id.org/dggs/zone/{}".format(str(cell)),
-                    str(cell),
-                    "Zone {}".format(str(cell)),
-                    None
-                ))
-
-        self.feature_count = len(self.features)
-        # truncate the list of Features to this page
-        self.features = self.features[self.start:self.end]
+        # this page's Features are only generated as they're rendered, so a page of any size costs no memory
+        self.features = LazyPage(
+            lambda: self._zone_features(page_zones()),
+            max(0, min(self.end, self.feature_count) - max(self.start, 0))
+        )
 
-        self.bbox_type = None
+    @staticmethod
+    def _zone_features(page_zones):
+        # (URI, ID, title, description, Zone) of each Zone
+        for zone in page_zones:
+            zone_id = str(zone)
+            yield (
+                ZONE_LIST_URI_BASE + zone_id,
+                zone_id,
+                "Zone " + zone_id,
+                None,
+                zone
+            )
 
 
 class FeaturesRenderer(ContainerRenderer):
     def __init__(self, request, collection_id, other_links: List[Link] = None):
         self.request = request
+        self.collection_id = collection_id
         self.valid = self._valid_parameters()
         if self.valid[0]:
             self.links = [
@@ -282,7 +218,11 @@ class FeaturesRenderer(ContainerRenderer):
             if other_links is not None:
                 self.links.extend(other_links)
 
-            self.feature_list = Tb16PixFeaturesList(request, collection_id)
+            try:
+                self.feature_list = Tb16PixFeaturesList(request, collection_id)
+            except CoverTooLarge as e:
+                self.valid = False, str(e)
+                return
 
             super().__init__(
                 request,
@@ -291,20 +231,20 @@ class FeaturesRenderer(ContainerRenderer):
                 "The Features of Collection {}".format(self.feature_list.collection.identifier),
                 None,
                 None,
-                [(LANDING_PAGE_URL + "/collections/" + self.feature_list.collection.identifier + "/items/" + x[1], x[2]) for x in self.feature_list.features],
-                self.feature_list.collection.feature_count,
+                LazyPage(
+                    lambda: (
+                        (LANDING_PAGE_URL + "/collections/" + self.feature_list.collection.identifier + "/items/" + x[1], x[2])
+                        for x in self.feature_list.features
+                    ),
+                    len(self.feature_list.features)
+                ),
+                self.feature_list.feature_count,
                 profiles={"oai": profile_openapi, "geosp": profile_geosparql},
                 default_profile_token="oai"
             )
 
     def _valid_parameters(self):
-        allowed_params = ["_profile", "_view", "_mediatype", "_format", "page", "per_page", "limit", "bbox"]
-
-        allowed_bbox_formats = [
-            r"([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+),([0-9\.\-]+)",  # Lat Longs, e.g. 160.6,-55.95,-170,-25.89
-            r"([A-Z][0-9]{0,15})$",  # single DGGS Cell ID, e.g. R1234
-            r"([A-Z][0-9]{0,15}),([A-Z][0-9]{0,15})",  # two DGGS cells, e.g. R123,R456
-        ]
+        allowed_params = ["_profile", "_view", "_mediatype", "_format", "page", "per_page", "limit", "bbox", "bbox_mode"]
 
         for p in self.request.values.keys():
             if p not in allowed_params:
@@ -312,20 +252,16 @@ class FeaturesRenderer(ContainerRenderer):
                        "The parameter {} you supplied is not allowed. " \
                        "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params)),
 
+        if grid_resolution(self.collection_id) is None:
+            return False, "You have entered an unknown Collection ID"
+
         if self.request.values.get("limit") is not None:
             try:
                 int(self.request.values.get("limit"))
             except ValueError:
                 return False, "The parameter 'limit' you supplied is invalid. It must be an integer"
 
-        if self.request.values.get("bbox") is not None:
-            for p in allowed_bbox_formats:
-                if re.match(p, self.request.values.get("bbox")):
-                    return True, None
-            return False, "The parameter 'bbox' you supplied is invalid. Must be either two pairs of long/lat values, " \
-                          "a DGGS Cell ID or a pair of DGGS Cell IDs"
-
-        return True, None
+        return valid_bbox(self.request.values.get("bbox"), self.request.values.get("bbox_mode", WITHIN))
 
     def render(self):
         # return without rendering anything if there is an error with the parameters
@@ -358,6 +294,8 @@ class FeaturesRenderer(ContainerRenderer):
         page_json = {
             "links": [x.__dict__ for x in self.links],
             "collection": self.feature_list.collection.to_dict(),
+            "numberMatched": self.feature_list.feature_count,
+            "numberReturned": len(self.feature_list.features),
         }
 
         return Response(
@@ -367,18 +305,30 @@ class FeaturesRenderer(ContainerRenderer):
         )
 
     def _render_oai_geojson(self):
+        # a FeatureCollection, streamed: the Features are generated, and sent, STREAM_CHUNK_SIZE at a time
         page_json = {
             "links": [x.__dict__ for x in self.links],
             "collection": self.feature_list.collection.to_geo_json_dict(),
+            "numberMatched": self.feature_list.feature_count,
+            "numberReturned": len(self.feature_list.features),
         }
 
+        def stream():
+            yield '{"type": "FeatureCollection", "features": ['
+            separator = ""
+            for features in self._feature_chunks():
+                yield separator + ", ".join(json.dumps(f.to_geo_json_dict()) for f in features)
+                separator = ", "
+            yield "], " + json.dumps(page_json)[1:]
+
         return Response(
-            json.dumps(page_json),
+            stream_with_context(stream()),
             mimetype=str(MediaType.GEOJSON.value),
             headers=self.headers,
         )
 
     def _render_oai_html(self):
+        count_zones(len(self.feature_list.features))
         pagination = Pagination(page=self.page, per_page=self.per_page, total=self.feature_list.feature_count)
 
         _template_context = {
@@ -396,18 +346,40 @@ class FeaturesRenderer(ContainerRenderer):
             headers=self.headers,
         )
 
+    def _feature_chunks(self):
+        # this page's Features, generated STREAM_CHUNK_SIZE at a time
+        features = iter(self.feature_list.features)
+        while True:
+            chunk = [x[4] for x in islice(features, STREAM_CHUNK_SIZE)]
+            if len(chunk) == 0:
+                break
+            yield tb16pix_features(chunk, ZONE_LIST_URI_BASE)
+
     def _render_geosp_rdf(self):
-        g = Graph()
+        # the Collection then its Features, as resources, written in one pass without an rdflib Graph
+        collection = list(graph_resources(self.feature_list.collection.to_geosp_graph()))
+        features = (
+            [(URIRef(f.uri), f.to_geosp_properties()) for f in chunk] for chunk in self._feature_chunks()
+        )
 
-        g = g + self.feature_list.collection.to_geosp_graph()
+        # serialise in the appropriate RDF format
+        if self.mediatype in FORMATS:
+            writer = RDFWriter(FORMATS[self.mediatype], GEOSP_NAMESPACES)
 
-        for f in self.feature_list.features:
-            g = g + Feature(f[0]).to_geosp_graph()
+            def stream():
+                yield writer.header() + writer.resources(collection)
+                for resources in features:
+                    yield writer.resources(resources)
+                yield writer.footer()
 
-        # serialise in the appropriate RDF format
-        if self.mediatype in ["application/rdf+json", "application/json"]:
-            return Response(g.serialize(format="json-ld"), mimetype=self.mediatype)
+            return Response(stream_with_context(stream()), mimetype=self.mediatype)
         elif self.mediatype in Renderer.RDF_MEDIA_TYPES:
+            # formats only rdflib writes still need a Graph, but only one
+            g = Graph()
+            for prefix, namespace in GEOSP_NAMESPACES.items():
+                g.bind(prefix, namespace)
+            for s, properties in chain(collection, chain.from_iterable(features)):
+                add_resource(g, s, properties)
             return Response(g.serialize(format=self.mediatype), mimetype=self.mediatype)
         else:
             return Response(
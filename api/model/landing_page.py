@@ -1,12 +1,11 @@
 from typing import List
 from .link import *
 from flask import Response, render_template
-from rdflib import Graph, URIRef, Literal, RDF, RDFS, BNode
+from rdflib import RDF
 from rdflib.namespace import DCAT, DCTERMS
 from .profiles import *
 from api.config import *
 import json
-import markdown
 
 
 class LandingPage:
@@ -24,7 +23,7 @@ class LandingPage:
                 if p == DCTERMS.title:
                     self.title = str(o)
                 elif p == DCTERMS.description:
-                    self.description = markdown.markdown(o)
+                    self.description = get_description(s)
 
         # make links
         self.links = [
@@ -77,7 +76,7 @@ class LandingPageRenderer(Renderer):
     ):
         self.landing_page = LandingPage(other_links=other_links)
 
-        super().__init__(request, self.landing_page.uri, {"oai": profile_openapi, "dcat": profile_dcat}, "oai")
+        super().__init__(request, self.landing_page.uri, {"oai": profile_openapi}, "oai")
 
         # add OGC API Link headers to pyLDAPI Link headers
         self.headers["Link"] = self.headers["Link"] + ", ".join([link.render_as_http_header() for link in self.landing_page.links])
@@ -98,11 +97,6 @@ class LandingPageRenderer(Renderer):
                 return self._render_oai_json()
             else:
                 return self._render_oai_html()
-        elif self.profile == "dcat":
-            if self.mediatype in Renderer.RDF_SERIALIZER_TYPES_MAP:
-                return self._render_dcat_rdf()
-            else:
-                return self._render_dcat_html()
 
     def _render_oai_json(self):
         page_json = {}
@@ -150,39 +144,3 @@ class LandingPageRenderer(Renderer):
             render_template("landing_page_oai.html", **_template_context),
             headers=self.headers,
         )
-
-    def _render_dcat_rdf(self):
-        item_graph = Graph()
-        item_graph.bind("dggs", DGGS)
-        item_uri = URIRef(self.dataset.uri)
-        item_id = self.dataset.uri.split("/")[-1]
-        item_graph.add((item_uri, RDF.type, DGGS.Zone))
-        item_graph.add((item_uri, RDFS.label, Literal("Zone {}".format(item_id))))
-
-        for neighbour in calculate_neighbours(item_id):
-            direction_uri = URIRef(URI_BASE_DATASET[neighbour[0].title()])
-            neighbour_uri = URIRef(URI_BASE_ZONE[neighbour[1]])
-            bn = BNode()
-            item_graph.add((bn, DGGS.neighbour, neighbour_uri))
-            item_graph.add((bn, DGGS.direction, direction_uri))
-            item_graph.add((item_uri, DGGS.directionalisedNeighbour, bn))
-
-        # serialise in the appropriate RDF format
-        if self.mediatype in ["application/rdf+json", "application/json"]:
-            return Response(item_graph.serialize(format="json-ld"), mimetype=self.mediatype)
-        else:
-            return Response(item_graph.serialize(format=self.mediatype), mimetype=self.mediatype)
-
-    def _render_dcat_html(self):
-        _template_context = {
-            "uri": self.dataset.uri,
-            "label": self.dataset.label,
-            "description": markdown.markdown(self.dataset.description),
-            "parts": self.dataset.parts,
-            "distributions": self.dataset.distributions,
-        }
-
-        return Response(
-            render_template("dataset.html", **_template_context),
-            headers=self.headers,
-        )
@@ -0,0 +1,204 @@
+import csv
+import io
+import json
+from itertools import chain, islice
+from flask import Response, stream_with_context
+from api.config import *
+from api.dggs import MAX_RESOLUTION
+from api.dggs.points import point_zone_ids
+from api.metrics import count_zones
+
+NDJSON = "application/x-ndjson"
+
+# the Media Types Zones can be returned in, the first the default
+LOCATE_MEDIA_TYPES = ["application/json", "text/csv", NDJSON]
+
+# the names a CSV column, or NDJSON object member, of longitudes, or latitudes, may have
+LON_NAMES = ["lon", "long", "lng", "longitude", "x"]
+LAT_NAMES = ["lat", "latitude", "y"]
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _csv_points(lines):
+    # (lon, lat) of each row of CSV, in the columns named as such in a header row, if there is one, else the first two
+    rows = csv.reader(lines)
+    first = next(rows, None)
+    if first is None:
+        return
+    names = [name.strip().lower() for name in first]
+    if any(name in LON_NAMES + LAT_NAMES for name in names):
+        lon_column = next((i for i, name in enumerate(names) if name in LON_NAMES), 0)
+        lat_column = next((i for i, name in enumerate(names) if name in LAT_NAMES), 1)
+    else:
+        lon_column, lat_column = 0, 1
+        rows = chain([first], rows)
+    for row in rows:
+        if len(row) > max(lon_column, lat_column):
+            yield _number(row[lon_column]), _number(row[lat_column])
+        elif len(row) > 0:
+            yield float("nan"), float("nan")
+
+
+def _ndjson_points(lines):
+    # (lon, lat) of each line of NDJSON, each a [lon, lat] pair or an object with lon & lat members
+    for line in lines:
+        if line.strip() == "":
+            continue
+        try:
+            point = json.loads(line)
+        except ValueError:
+            point = None
+        yield _json_point(point)
+
+
+def _json_point(point):
+    if isinstance(point, list) and len(point) >= 2:
+        return _number(point[0]), _number(point[1])
+    if isinstance(point, dict):
+        return (
+            _number(next((point[k] for k in LON_NAMES if k in point), None)),
+            _number(next((point[k] for k in LAT_NAMES if k in point), None))
+        )
+    return float("nan"), float("nan")
+
+
+class LocateRenderer:
+    """
+    The Zones, of one or more resolutions, containing each of many WGS84 points.
+
+    The points may be given as a points parameter of semicolon-separated lon,lat pairs, a POSTed JSON list of
+    [lon, lat] pairs or an object with such a list as its points member, all of up to MAX_BATCH_ZONES points, or a
+    POSTed CSV or NDJSON document of any number. CSV & NDJSON are read, their Zones found, by api.dggs.points, and the
+    results written, LOCATE_CHUNK_SIZE points at a time, so any number of points can be streamed through.
+
+    Zones are returned in the order of the points, as JSON, CSV or NDJSON, by default as the points were given. A point
+    that isn't on the Earth, or can't be read, has no Zones: null in JSON, empty in CSV.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.points, self.input_mediatype = self._requested_points()
+        # unless another is asked for, answer in the Media Type the points were given in
+        default = self.input_mediatype if self.input_mediatype in LOCATE_MEDIA_TYPES else LOCATE_MEDIA_TYPES[0]
+        self.mediatype = request.values.get("_mediatype") or request.accept_mimetypes.best_match(
+            [default] + [m for m in LOCATE_MEDIA_TYPES if m != default],
+            default=default
+        )
+        self.valid = self._valid_parameters()
+
+    def _requested_points(self):
+        # the points, as a list or an iterator of (lon, lat), or None if they're unreadable, & the Media Type given in
+        if self.request.values.get("points") is not None:
+            try:
+                return [
+                    tuple(float(x) for x in pair.split(","))
+                    for pair in self.request.values.get("points").split(";") if pair.strip() != ""
+                ], None
+            except ValueError:
+                return None, None
+        if self.request.is_json:
+            body = self.request.get_json(silent=True)
+            if isinstance(body, dict):
+                body = body.get("points")
+            if not isinstance(body, list):
+                return None, "application/json"
+            return [_json_point(point) for point in body], "application/json"
+        if self.request.mimetype in ["text/csv", NDJSON]:
+            # buffered: the raw stream reads lines a byte at a time
+            lines = io.TextIOWrapper(io.BufferedReader(self.request.stream), encoding="utf-8", errors="replace",
+                                     newline="")
+            if self.request.mimetype == NDJSON:
+                return _ndjson_points(lines), NDJSON
+            return _csv_points(lines), "text/csv"
+        return None, None
+
+    def _valid_parameters(self):
+        allowed_params = ["_mediatype", "resolution", "points"]
+
+        for p in list(self.request.args.keys()) + list(self.request.form.keys()):
+            if p not in allowed_params:
+                return False, \
+                       "The parameter {} you supplied is not allowed. " \
+                       "For this API endpoint, you may only use one of '{}'".format(p, "', '".join(allowed_params))
+
+        if self.mediatype not in LOCATE_MEDIA_TYPES:
+            return False, "The parameter '_mediatype' you supplied is invalid. It must be one of '{}'".format(
+                "', '".join(LOCATE_MEDIA_TYPES))
+
+        try:
+            self.resolutions = list(dict.fromkeys(
+                int(r) for r in self.request.values.get("resolution", "").split(",") if r.strip() != ""
+            ))
+        except ValueError:
+            self.resolutions = None
+        if not self.resolutions or not all(0 <= r <= MAX_RESOLUTION for r in self.resolutions):
+            return False, "You must supply the 'resolution' of the Zones to find, or a comma-separated list of them, " \
+                          "each from 0 to {}".format(MAX_RESOLUTION)
+
+        if self.points is None:
+            return False, "You must supply the points to find the Zones of: a 'points' parameter of " \
+                          "semicolon-separated lon,lat pairs, a POSTed JSON list of [lon, lat] pairs, or a POSTed " \
+                          "CSV or NDJSON document of them"
+        if isinstance(self.points, list):
+            if len(self.points) > MAX_BATCH_ZONES:
+                return False, "You may only send {} points at a time as JSON, you supplied {}. " \
+                              "Send any number as CSV or NDJSON".format(MAX_BATCH_ZONES, len(self.points))
+            if not all(len(point) == 2 for point in self.points):
+                return False, "Points must each be a longitude and a latitude"
+
+        return True, None
+
+    def _chunks(self):
+        # (lon, lat, {resolution: Zone IDs}) of each LOCATE_CHUNK_SIZE points
+        points = iter(self.points)
+        while True:
+            chunk = list(islice(points, LOCATE_CHUNK_SIZE))
+            if len(chunk) == 0:
+                break
+            lon = [p[0] for p in chunk]
+            lat = [p[1] for p in chunk]
+            ids = point_zone_ids(lon, lat, self.resolutions)
+            count_zones(len(chunk) * len(self.resolutions))
+            yield lon, lat, [ids[r].tolist() for r in self.resolutions]
+
+    def render(self):
+        if not self.valid[0]:
+            return Response(self.valid[1], status=400, mimetype="text/plain")
+
+        grids = ["g{}".format(r) for r in self.resolutions]
+
+        def json_stream():
+            yield '{{"resolutions": {}, "zones": ['.format(json.dumps(self.resolutions))
+            separator = ""
+            for lon, lat, ids in self._chunks():
+                yield separator + ", ".join(
+                    json.dumps([z or None for z in zones]) for zones in zip(*ids)
+                )
+                separator = ", "
+            yield "]}"
+
+        def csv_stream():
+            yield ",".join(["lon", "lat"] + grids) + "\r\n"
+            for lon, lat, ids in self._chunks():
+                yield "".join(
+                    ",".join([str(x) if x == x else "", str(y) if y == y else ""] + list(zones)) + "\r\n"
+                    for x, y, zones in zip(lon, lat, zip(*ids))
+                )
+
+        def ndjson_stream():
+            for lon, lat, ids in self._chunks():
+                yield "".join(
+                    json.dumps(dict(
+                        [("lon", x if x == x else None), ("lat", y if y == y else None)] +
+                        [(grid, z or None) for grid, z in zip(grids, zones)]
+                    )) + "\n"
+                    for x, y, zones in zip(lon, lat, zip(*ids))
+                )
+
+        stream = {"application/json": json_stream, "text/csv": csv_stream, NDJSON: ndjson_stream}[self.mediatype]
+        return Response(stream_with_context(stream()), mimetype=self.mediatype)
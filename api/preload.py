@@ -0,0 +1,59 @@
+"""
+Everything the app builds once and from then on only reads, built up front.
+
+A pre-forking server, see gunicorn.conf.py, calls preload() once, in its master process, before it forks its workers so
+they all share what it built, copy-on-write, instead of each building its own: the graph snapshot, the rHEALPix grid
+and its tables, the memory-mapped geometry stores, the compiled page templates, the RDF serialisers and the modules
+otherwise only imported when first used, see api.lazy.
+"""
+import os
+import time
+from rdflib import plugin
+from rdflib.serializer import Serializer
+from api import lazy
+from api.dggs import MAX_RESOLUTION, store
+from api.dggs.geometry import _grid
+from api.dggs.neighbours import _crossing_table
+from api.snapshot import get_snapshot
+
+# the rdflib serialisers pyldapi renders single Features & Collections with
+SERIALIZERS = ["turtle", "xml", "json-ld", "nt"]
+
+
+def preload(app) -> float:
+    """
+    Builds all the given Flask app's shared, read-only, state.
+
+    :return: the seconds it took
+    """
+    began = time.perf_counter()
+    get_snapshot()
+    _grid()
+    _crossing_table()
+    for resolution in range(MAX_RESOLUTION + 1):
+        store._array(resolution)
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    for name in SERIALIZERS:
+        plugin.get(name, Serializer)
+    lazy.load_all()
+    return time.perf_counter() - began
+
+
+def process_memory(pid="self") -> dict:
+    """
+    A process's memory, in bytes: its resident set size, rss, its proportional set size, pss, in which each page it
+    shares with other processes counts divided between them, and its unique set size, uss, the pages only it has.
+    A pre-forked worker's uss is what it costs on top of its master.
+    """
+    memory = {}
+    with open(os.path.join("/proc", str(pid), "smaps_rollup")) as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ["Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"]:
+                memory[parts[0][:-1]] = int(parts[1]) * 1024
+    return {
+        "rss": memory["Rss"],
+        "pss": memory["Pss"],
+        "uss": memory["Private_Clean"] + memory["Private_Dirty"],
+    }
@@ -0,0 +1,179 @@
+"""
+Profiling single requests, to find out why one's slow, including in production.
+
+Off unless PROFILE_REQUESTS is true. Then a request with an X-Profile header of PROFILE_SECRET, and a random
+PROFILE_SAMPLE_RATE of all other requests, is profiled from the WSGI app being called, through routing, the view,
+pyldapi's negotiation & rendering, to the last chunk of its response being generated, so streamed responses are profiled
+whole, on whichever threads generate them. Its profile is saved in PROFILE_DIR, named by when it was made and the
+request's method & path, e.g. 20261018T171413.123456-GET-collections_g9_items.collapsed, and logged.
+
+PROFILE_FORMAT is "pstats", for cProfile's deterministic record of every call, to read with python -m pstats or snakeviz,
+or "collapsed", for the stacks of a sampling profiler, every PROFILE_INTERVAL_MS, one "frame;frame;frame count" line per
+stack, for flamegraph.pl or speedscope. cProfile can slow a request several times over, sampling hardly at all. cProfile
+profiles one request at a time, in a process, as from Python 3.12 only one can be enabled at once, so in a threaded
+server a request that comes while one's being profiled with it isn't profiled; stacks are sampled for any number.
+
+Requests profiled because they asked to be, with X-Profile, bypass the response cache, see api.cache, so what's profiled
+is their rendering, and are told their profile's file name in an X-Profile-File header.
+"""
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from api.config import PROFILE_SECRET, PROFILE_SAMPLE_RATE, PROFILE_FORMAT, PROFILE_INTERVAL_MS, PROFILE_DIR
+
+# the WSGI environ key set on requests that asked to be profiled
+PROFILED = "api.profiled"
+PROFILE_FORMATS = ["pstats", "collapsed"]
+# held while a request's being profiled with cProfile, from its call to its response being closed
+_cprofile_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    A sampling profiler of the thread that last enabled it, with the same enable(), disable() & dump_stats() as
+    cProfile.Profile. A background thread records the profiled thread's stack every interval seconds, if it's enabled.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._sampler.start()
+
+    def enable(self):
+        self._thread_id = threading.get_ident()
+
+    def disable(self):
+        self._thread_id = None
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+
+    def dump_stats(self, path: str):
+        self._stopped.set()
+        self._sampler.join()
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write("{} {}\n".format(stack, count))
+
+
+def _stack(frame) -> str:
+    # a stack, outermost frame first, in flame graphs' collapsed format
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append("{} ({}:{})".format(code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+def _short_path(filename: str) -> str:
+    # a source file's path from the sys.path entry it's under, e.g. api/app.py or flask/app.py
+    for path in sorted(sys.path, key=len, reverse=True):
+        if path != "" and filename.startswith(path + os.sep):
+            return filename[len(path) + 1:]
+    return filename
+
+
+def _profiled(profiler, f, *args):
+    profiler.enable()
+    try:
+        return f(*args)
+    finally:
+        profiler.disable()
+
+
+class _ProfiledResponse:
+    """
+    A WSGI response's iterable, generating each chunk under the profiler, whose profile's saved, and lock, if it's given
+    one, released once it's closed
+    """
+    def __init__(self, profiler, iterable, path: str, lock=None):
+        self.profiler = profiler
+        self.iterable = iterable
+        self.path = path
+        self.lock = lock
+        self._iterator = _profiled(profiler, iter, iterable)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _profiled(self.profiler, next, self._iterator)
+
+    def close(self):
+        try:
+            if hasattr(self.iterable, "close"):
+                _profiled(self.profiler, self.iterable.close)
+        finally:
+            try:
+                self.profiler.dump_stats(self.path)
+                logging.info("Profiled a request to {}".format(self.path))
+            finally:
+                if self.lock is not None:
+                    self.lock.release()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests to a WSGI app that ask to be, with an X-Profile header of PROFILE_SECRET, and a random
+    PROFILE_SAMPLE_RATE of the rest, saving their profiles to PROFILE_DIR
+    """
+    def __init__(self, wsgi_app):
+        if PROFILE_FORMAT not in PROFILE_FORMATS:
+            raise ValueError("PROFILE_FORMAT must be one of '{}', not '{}'".format(
+                "', '".join(PROFILE_FORMATS), PROFILE_FORMAT))
+        self.wsgi_app = wsgi_app
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    def __call__(self, environ, start_response):
+        secret = environ.get("HTTP_X_PROFILE")
+        asked = secret is not None and bool(PROFILE_SECRET) and \
+            hmac.compare_digest(secret.encode("utf-8"), PROFILE_SECRET.encode("utf-8"))
+        if not asked and random.random() >= PROFILE_SAMPLE_RATE:
+            return self.wsgi_app(environ, start_response)
+        if PROFILE_FORMAT == "pstats":
+            if not _cprofile_lock.acquire(blocking=False):
+                logging.info("Not profiling a request to {}: another's being profiled".format(environ.get("PATH_INFO")))
+                return self.wsgi_app(environ, start_response)
+            profiler = cProfile.Profile()
+            lock = _cprofile_lock
+        else:
+            profiler = StackSampler(PROFILE_INTERVAL_MS / 1000)
+            lock = None
+
+        name = "{}-{}-{}.{}".format(
+            datetime.now().strftime("%Y%m%dT%H%M%S.%f"),
+            environ["REQUEST_METHOD"],
+            re.sub(r"[^A-Za-z0-9]+", "_", environ.get("PATH_INFO", "")).strip("_")[:100] or "root",
+            PROFILE_FORMAT
+        )
+        if asked:
+            environ[PROFILED] = True
+
+            def start_profiled_response(status, headers, exc_info=None):
+                return start_response(status, headers + [("X-Profile-File", name)], exc_info)
+        else:
+            start_profiled_response = start_response
+
+        try:
+            iterable = _profiled(profiler, self.wsgi_app, environ, start_profiled_response)
+        except Exception:
+            try:
+                profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+            finally:
+                if lock is not None:
+                    lock.release()
+            raise
+        return _ProfiledResponse(profiler, iterable, os.path.join(PROFILE_DIR, name), lock)
@@ -0,0 +1,189 @@
+"""
+Streaming RDF serialisation.
+
+rdflib only serialises a Graph once it's been built, whole, in memory. Here RDF is written as it's generated instead,
+one resource at a time, straight to text, in Turtle, N-Triples or JSON-LD, so the cost of a response grows only with
+its number of triples and it can be sent as it's written.
+
+A resource is a (subject, properties) pair in which properties is a list of (predicate, object) pairs. An object is an
+rdflib term or, for a blank node, a nested list of (predicate, object) pairs, written inline.
+"""
+import json
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import RDF
+
+TURTLE = "turtle"
+NTRIPLES = "nt"
+JSONLD = "json-ld"
+
+# the Media Types written here, and the format each is written in. Turtle is valid N3
+FORMATS = {
+    "text/turtle": TURTLE,
+    "text/n3": TURTLE,
+    "application/n-triples": NTRIPLES,
+    "application/ld+json": JSONLD,
+    "application/rdf+json": JSONLD,
+    "application/json": JSONLD,
+}
+
+
+def _quote(s: str) -> str:
+    # a single-line string literal, valid in both N-Triples and Turtle
+    return '"{}"'.format(
+        s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+class RDFWriter:
+    """
+    Writes resources, see the module's docstring, as text in one of TURTLE, NTRIPLES or JSONLD.
+
+    The text of a whole document is header(), then resources(...) for any number of batches of resources, then
+    footer(), concatenated.
+    """
+    def __init__(self, format: str, namespaces: dict = None):
+        """
+        :param format: TURTLE, NTRIPLES or JSONLD
+        :param namespaces: prefix: namespace pairs, for compact Turtle
+        """
+        if format not in (TURTLE, NTRIPLES, JSONLD):
+            raise ValueError("RDF can't be written as {}".format(format))
+        self.format = format
+        self.namespaces = sorted(((str(ns), prefix) for prefix, ns in (namespaces or {}).items()), reverse=True)
+        self._blank_nodes = 0
+        self._resources = 0
+        self._qnames = {}
+
+    def header(self) -> str:
+        if self.format == TURTLE:
+            return "".join("@prefix {}: <{}> .\n".format(p, ns) for ns, p in sorted(self.namespaces, key=lambda x: x[1]))
+        elif self.format == JSONLD:
+            return "["
+        return ""
+
+    def footer(self) -> str:
+        if self.format == JSONLD:
+            return "\n]\n"
+        return ""
+
+    def resources(self, resources) -> str:
+        if self.format == TURTLE:
+            return "".join(
+                "\n{} {} .\n".format(self._turtle_term(s), self._turtle_properties(properties, 1))
+                for s, properties in resources
+            )
+        elif self.format == NTRIPLES:
+            lines = []
+            for s, properties in resources:
+                self._ntriples(self._ntriples_term(s), properties, lines)
+            return "".join(lines)
+        else:
+            text = []
+            for s, properties in resources:
+                node = {"@id": self._jsonld_id(s)}
+                node.update(self._jsonld_node(properties))
+                text.append(("," if self._resources > 0 else "") + "\n  " + json.dumps(node))
+                self._resources += 1
+            return "".join(text)
+
+    # Turtle
+    def _turtle_term(self, term) -> str:
+        if isinstance(term, URIRef):
+            qname = self._qnames.get(term)
+            if qname is not None:
+                return qname
+            for ns, prefix in self.namespaces:
+                local = term[len(ns):]
+                if term.startswith(ns) and local.replace("_", "a").replace("-", "a").isalnum():
+                    # only the few IRIs with prefixes, mostly predicates & classes, are remembered
+                    qname = self._qnames[term] = "{}:{}".format(prefix, local)
+                    return qname
+            return "<{}>".format(term)
+        elif isinstance(term, BNode):
+            return "_:{}".format(term)
+        else:
+            return self._literal(term, self._turtle_term)
+
+    def _turtle_properties(self, properties, depth) -> str:
+        indent = "\n" + "    " * depth
+        text = []
+        for p, o in properties:
+            if isinstance(o, list):
+                o = "[ {} ]".format(self._turtle_properties(o, depth + 1))
+            else:
+                o = self._turtle_term(o)
+            text.append("{} {}".format("a" if p == RDF.type else self._turtle_term(p), o))
+        return (" ;" + indent).join(text)
+
+    # N-Triples
+    def _ntriples_term(self, term) -> str:
+        if isinstance(term, URIRef):
+            return "<{}>".format(term)
+        elif isinstance(term, BNode):
+            return "_:{}".format(term)
+        else:
+            return self._literal(term, self._ntriples_term)
+
+    def _ntriples(self, s: str, properties, lines):
+        # s is the subject, already written
+        for p, o in properties:
+            if isinstance(o, list):
+                self._blank_nodes += 1
+                b = "_:b{}".format(self._blank_nodes)
+                lines.append("{} {} {} .\n".format(s, self._ntriples_term(p), b))
+                self._ntriples(b, o, lines)
+            else:
+                lines.append("{} {} {} .\n".format(s, self._ntriples_term(p), self._ntriples_term(o)))
+
+    # JSON-LD, expanded
+    @staticmethod
+    def _jsonld_id(term) -> str:
+        return "_:{}".format(term) if isinstance(term, BNode) else str(term)
+
+    def _jsonld_node(self, properties) -> dict:
+        node = {}
+        for p, o in properties:
+            if p == RDF.type:
+                node.setdefault("@type", []).append(self._jsonld_id(o))
+                continue
+            if isinstance(o, list):
+                value = self._jsonld_node(o)
+            elif isinstance(o, Literal):
+                value = {"@value": str(o)}
+                if o.language is not None:
+                    value["@language"] = o.language
+                elif o.datatype is not None:
+                    value["@type"] = str(o.datatype)
+            else:
+                value = {"@id": self._jsonld_id(o)}
+            node.setdefault(str(p), []).append(value)
+        return node
+
+    @staticmethod
+    def _literal(literal: Literal, term) -> str:
+        if literal.language is not None:
+            return "{}@{}".format(_quote(str(literal)), literal.language)
+        elif literal.datatype is not None:
+            return "{}^^{}".format(_quote(str(literal)), term(literal.datatype))
+        return _quote(str(literal))
+
+
+def graph_resources(g: Graph):
+    """
+    The resources, see the module's docstring, of a Graph: one per subject, blank nodes included as subjects.
+    """
+    for s in g.subjects(unique=True):
+        yield s, list(g.predicate_objects(s))
+
+
+def add_resource(g: Graph, subject, properties):
+    """
+    Adds a resource's triples, see the module's docstring, to a Graph, for formats that are only written by rdflib.
+    """
+    for p, o in properties:
+        if isinstance(o, list):
+            b = BNode()
+            g.add((subject, p, b))
+            add_resource(g, b, o)
+        else:
+            g.add((subject, p, o))
@@ -0,0 +1,345 @@
+import hashlib
+import logging
+import marshal
+import os
+import threading
+import time
+from rdflib import Graph, URIRef, Literal, BNode
+from rdflib.namespace import DCTERMS
+from rdflib.store import Store
+from api.config import DATA_DIR, CACHE_FILE, GRAPH_RELOAD_SECONDS
+
+# the static RDF files the API's metadata graph is built from
+SOURCE_FILES = [
+    "collections.ttl",
+    "conformance_targets.ttl",
+    "dataservice.ttl",
+    "dataset.ttl",
+]
+
+# bump this if the on-disk layout written by _write_cache() changes
+CACHE_FORMAT_VERSION = 2
+
+
+class SnapshotStore(Store):
+    """
+    A read-only, in-memory, triple store.
+
+    Each distinct term is hashed once, into the term table, when the store is built. The spo, pos & osp indices then
+    hold only small integers which makes building one far cheaper than unpickling an rdflib Memory store.
+    """
+    def __init__(self, terms: list = (), triples: list = ()):
+        super().__init__()
+        self._terms = list(terms)
+        self._numbers = {t: n for n, t in enumerate(self._terms)}
+        self._spo = {}
+        self._pos = {}
+        self._osp = {}
+        for i in range(0, len(triples), 3):
+            s, p, o = triples[i], triples[i + 1], triples[i + 2]
+            self._spo.setdefault(s, {}).setdefault(p, []).append(o)
+            self._pos.setdefault(p, {}).setdefault(o, []).append(s)
+            self._osp.setdefault(o, {}).setdefault(s, []).append(p)
+        self._len = len(triples) // 3
+        self._namespace = {}
+        self._prefix = {}
+
+    def add(self, triple, context, quoted=False):
+        raise TypeError("The metadata graph snapshot is read-only")
+
+    def addN(self, quads):
+        raise TypeError("The metadata graph snapshot is read-only")
+
+    def remove(self, triple, context=None):
+        raise TypeError("The metadata graph snapshot is read-only")
+
+    def _triple_numbers(self, triple_pattern):
+        s, p, o = triple_pattern
+        t = self._terms
+        if s is not None:
+            s = self._numbers.get(s, -1)
+        if p is not None:
+            p = self._numbers.get(p, -1)
+        if o is not None:
+            o = self._numbers.get(o, -1)
+
+        if s is not None:
+            po = self._spo.get(s, {})
+            for pn in (po if p is None else [p]):
+                for on in po.get(pn, []):
+                    if o is None or on == o:
+                        yield t[s], t[pn], t[on]
+        elif p is not None:
+            os_ = self._pos.get(p, {})
+            for on in (os_ if o is None else [o]):
+                for sn in os_.get(on, []):
+                    yield t[sn], t[p], t[on]
+        elif o is not None:
+            for sn, ps in self._osp.get(o, {}).items():
+                for pn in ps:
+                    yield t[sn], t[pn], t[o]
+        else:
+            for sn, po in self._spo.items():
+                for pn, os_ in po.items():
+                    for on in os_:
+                        yield t[sn], t[pn], t[on]
+
+    def triples(self, triple_pattern, context=None):
+        for triple in self._triple_numbers(triple_pattern):
+            yield triple, iter(())
+
+    def __len__(self, context=None):
+        return self._len
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and (prefix in self._namespace or namespace in self._prefix):
+            return
+        old_namespace = self._namespace.pop(prefix, None)
+        if old_namespace is not None:
+            del self._prefix[old_namespace]
+        old_prefix = self._prefix.pop(namespace, None)
+        if old_prefix is not None:
+            del self._namespace[old_prefix]
+        self._namespace[prefix] = namespace
+        self._prefix[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        yield from self._namespace.items()
+
+
+class GraphSnapshot:
+    """
+    One immutable load of the metadata graph, tagged with the state of the source files it was built from, with its
+    resources' Markdown descriptions already converted to HTML, by resource URI.
+    """
+    def __init__(self, graph: Graph, fingerprint: tuple, checksum: str, load_seconds: float, descriptions: dict):
+        self.graph = graph
+        self.fingerprint = fingerprint
+        self.checksum = checksum
+        self.load_seconds = load_seconds
+        self.descriptions = descriptions
+        self._derived = {}
+
+    @property
+    def modified(self) -> float:
+        """
+        When, in seconds since the epoch, the source files were last modified
+        """
+        return max(mtime_ns for _, mtime_ns, _ in self.fingerprint) / 1e9
+
+    def derived(self, key, compute):
+        """
+        A value computed from this snapshot's graph, computed once and then kept for as long as the snapshot is.
+
+        :param key: a hashable key for the value
+        :param compute: a function taking the graph and returning the value
+        :return: the value
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = compute(self.graph)
+            self._derived[key] = value
+            return value
+
+
+def _source_paths():
+    return [os.path.join(DATA_DIR, f) for f in SOURCE_FILES]
+
+
+def _fingerprint():
+    # cheap change detection: (name, mtime, size) for each source file
+    fp = []
+    for path in _source_paths():
+        st = os.stat(path)
+        fp.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    return tuple(fp)
+
+
+def _checksum():
+    h = hashlib.sha256()
+    for path in _source_paths():
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _encode_term(t):
+    if isinstance(t, URIRef):
+        return "u", str(t)
+    elif isinstance(t, BNode):
+        return "b", str(t)
+    else:  # Literal
+        return "l", str(t), str(t.datatype) if t.datatype is not None else None, t.language
+
+
+def _decode_term(t):
+    if t[0] == "u":
+        return URIRef(t[1])
+    elif t[0] == "b":
+        return BNode(t[1])
+    else:
+        return Literal(t[1], datatype=URIRef(t[2]) if t[2] is not None else None, lang=t[3])
+
+
+def _descriptions(g: Graph) -> dict:
+    # the HTML of each resource's dcterms:description, which are Markdown, by resource URI. markdown's only imported to
+    # build a snapshot from the source files, not from the cache
+    import markdown
+    return {str(s): markdown.markdown(str(o)) for s, o in g.subject_objects(DCTERMS.description)}
+
+
+def _tabulate(g: Graph):
+    # each distinct term is stored once, triples are a flat list of term table positions
+    terms = []
+    positions = {}
+    triples = []
+    for triple in g:
+        for term in triple:
+            if term not in positions:
+                positions[term] = len(terms)
+                terms.append(term)
+            triples.append(positions[term])
+
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "namespaces": [(str(prefix), str(uri)) for prefix, uri in g.namespaces()],
+        "terms": terms,
+        "triples": triples,
+        "descriptions": _descriptions(g),
+    }
+
+
+def _write_cache(data, fingerprint: tuple, checksum: str):
+    data = dict(data, fingerprint=fingerprint, checksum=checksum, terms=[_encode_term(t) for t in data["terms"]])
+
+    # write then rename so that other processes never see a partial file
+    tmp_file = "{}.{}.tmp".format(CACHE_FILE, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(tmp_file, "wb") as f:
+            marshal.dump(data, f)
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError as e:
+        logging.debug("could not write graph cache {}: {}".format(CACHE_FILE, e))
+
+
+def _read_cache():
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != CACHE_FORMAT_VERSION:
+        return None
+
+    return data
+
+
+def _graph_from_table(data) -> Graph:
+    g = Graph(store=SnapshotStore(data["terms"], data["triples"]), bind_namespaces="none")
+    for prefix, uri in data["namespaces"]:
+        g.bind(prefix, URIRef(uri))
+
+    return g
+
+
+def _table_from_source():
+    g = Graph(bind_namespaces="core")
+    for path in _source_paths():
+        g.parse(path, format="turtle")
+
+    return _tabulate(g)
+
+
+def load_snapshot(fingerprint: tuple = None, checksum: str = None) -> GraphSnapshot:
+    """
+    Builds a snapshot, from the on-disk cache if it matches the source files, else from the source files themselves,
+    in which case the cache is rewritten.
+    """
+    start = time.perf_counter()
+    if fingerprint is None:
+        fingerprint = _fingerprint()
+
+    data = _read_cache()
+    stale_fingerprint = data is not None and data["fingerprint"] != fingerprint
+    if stale_fingerprint:
+        # the files have been touched, but may not have changed
+        if checksum is None:
+            checksum = _checksum()
+        if data["checksum"] != checksum:
+            data = None
+
+    if data is not None:
+        logging.debug("loading g from cache")
+        data["terms"] = [_decode_term(t) for t in data["terms"]]
+        checksum = data["checksum"]
+        if stale_fingerprint:
+            # record the new mtimes so the next cold start can skip the checksum
+            _write_cache(data, fingerprint, checksum)
+    else:
+        logging.debug("no cache - reloading g from source files")
+        if checksum is None:
+            checksum = _checksum()
+        data = _table_from_source()
+        _write_cache(data, fingerprint, checksum)
+
+    g = _graph_from_table(data)
+
+    return GraphSnapshot(g, fingerprint, checksum, time.perf_counter() - start, data["descriptions"])
+
+
+_snapshot = None
+_last_checked = 0.0
+_lock = threading.Lock()
+
+
+def get_snapshot() -> GraphSnapshot:
+    """
+    Returns the process-wide snapshot, loading it on first use.
+
+    At most once every GRAPH_RELOAD_SECONDS the source files are re-examined: if their mtimes or sizes have changed and
+    their content has too, a new snapshot is built and swapped in. Requests already holding the old snapshot keep using
+    it undisturbed.
+    """
+    global _snapshot, _last_checked
+
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _last_checked < GRAPH_RELOAD_SECONDS:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None:
+            _snapshot = load_snapshot()
+        elif time.monotonic() - _last_checked >= GRAPH_RELOAD_SECONDS:
+            try:
+                fingerprint = _fingerprint()
+            except OSError as e:
+                # keep serving what we have if the source files are mid-replacement
+                logging.debug("could not stat graph source files: {}".format(e))
+                fingerprint = _snapshot.fingerprint
+
+            if fingerprint != _snapshot.fingerprint:
+                checksum = _checksum()
+                if checksum == _snapshot.checksum:
+                    _snapshot.fingerprint = fingerprint
+                else:
+                    logging.debug("graph source files changed - reloading")
+                    try:
+                        _snapshot = load_snapshot(fingerprint, checksum)
+                    except Exception as e:
+                        # e.g. a half-edited Turtle file: keep serving the last good snapshot
+                        logging.debug("could not reload graph: {}".format(e))
+        _last_checked = time.monotonic()
+
+        return _snapshot
@@ -0,0 +1,12 @@
+import sys
+import logging
+from os.path import *
+
+THIS_DIR = dirname(realpath(__file__))
+sys.path.insert(0, THIS_DIR)
+logging.basicConfig(stream=sys.stderr)
+
+from api.app import app
+from api.asgi import AsgiApp
+
+application = AsgiApp(app)
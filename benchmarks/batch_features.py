@@ -0,0 +1,46 @@
+"""
+Many Features from /features in one request vs one /collections/{id}/items/{item_id} request each.
+
+    python benchmarks/batch_features.py [resolution] [zones]
+
+Fetches zones Zones, from the middle of the grid of the given resolution, as GeoJSON and as Turtle, each way, through
+the Flask test client, from a cold Zone cache each time, and reports the seconds taken.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.dggs import zone_count, zone_ids
+from api.model.feature import zone_cache
+
+
+def main(resolution=8, zones=500):
+    client = app.test_client()
+    start = zone_count(resolution) // 2
+    ids = list(zone_ids(resolution, start, start + zones))
+    print("{:>24} {:>12} {:>12} {:>8}".format("Media Type", "batch s", "single s", "speedup"))
+    for mediatype in ["application/geo+json", "text/turtle"]:
+        zone_cache.clear()
+        began = time.perf_counter()
+        response = client.post("/features", json=ids, headers={"Accept": mediatype})
+        assert response.status_code == 200 and len(response.get_data()) > 0
+        batch_seconds = time.perf_counter() - began
+
+        zone_cache.clear()
+        began = time.perf_counter()
+        for zone_id in ids:
+            response = client.get(
+                "/collections/g{}/items/{}".format(resolution, zone_id),
+                headers={"Accept": mediatype}
+            )
+            assert response.status_code == 200 and len(response.get_data()) > 0
+        single_seconds = time.perf_counter() - began
+        print("{:>24} {:>12.3f} {:>12.3f} {:>7.0f}x".format(
+            mediatype, batch_seconds, single_seconds, single_seconds / batch_seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,56 @@
+"""
+Walking a Zone's subtree with rhealpixdggs Cells vs api.dggs.descendants(), and the /descendants endpoint.
+
+    python benchmarks/descendants.py [levels] [resolution]
+
+Lists all the descendants, levels resolutions down, of a Zone of the given resolution, by Cell.subcells() level by
+level and by descendants(), checks they agree, and reports Zones per second each way, then the time to skip to the
+last page of them and to stream them all, as plain text, from /collections/gN/items/{id}/descendants.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.config import TB16Pix
+from api.dggs import descendants, zone_count, zones
+
+
+def main(levels=5, resolution=4):
+    zone = next(zones(resolution, zone_count(resolution) // 2))
+    target = resolution + levels
+
+    began = time.perf_counter()
+    cells = [TB16Pix.cell([zone.face] + [int(d) for d in str(zone)[1:]])]
+    for _ in range(levels):
+        cells = [subcell for cell in cells for subcell in cell.subcells()]
+    expected = [str(cell) for cell in cells]
+    cell_seconds = time.perf_counter() - began
+
+    began = time.perf_counter()
+    got = [str(z) for z in descendants(zone, [target])]
+    seconds = time.perf_counter() - began
+    assert got == expected
+    print("{} descendants of {} at g{} agree; Cell.subcells() {:.0f}/s, descendants() {:.0f}/s".format(
+        len(got), zone, target, len(got) / cell_seconds, len(got) / seconds))
+
+    client = app.test_client()
+    url = "/collections/g{}/items/{}/descendants?resolution={}".format(resolution, zone, target)
+    began = time.perf_counter()
+    response = client.get(url + "&offset={}&limit=100".format(max(len(got) - 100, 0)))
+    body = response.get_data()
+    assert response.status_code == 200 and expected[-1].encode() in body
+    print("last page of 100: {:.2f}ms".format((time.perf_counter() - began) * 1000))
+
+    began = time.perf_counter()
+    response = client.get(url + "&_mediatype=text/plain")
+    lines = response.get_data().count(b"\n")
+    seconds = time.perf_counter() - began
+    assert lines == len(got)
+    print("/descendants, plain text, all: {:.0f} Zones/s".format(lines / seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
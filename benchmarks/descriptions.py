@@ -0,0 +1,87 @@
+"""
+The per-request time saved by converting the metadata's Markdown descriptions to HTML once, when the graph snapshot is
+built, rather than on every request.
+
+    python benchmarks/descriptions.py [requests]
+
+Times the given number of requests to the landing page & a collection, in HTML & JSON, each rendered, with the response
+cache emptied before it, first as they're served, with each description looked up in the snapshot's table of them, then
+with each converted from Markdown as it's looked up, as every request used to do, and reports the median time of each
+and the time saved. Also reports how long importing markdown takes, which the first request to use a description used to
+wait for, and now no request does unless the snapshot's built from the source files.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rdflib.namespace import DCTERMS
+from api.app import app
+from api.cache import _response_cache
+from api.snapshot import get_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PATHS = [
+    "/?_mediatype=text/html",
+    "/?_mediatype=application/json",
+    "/collections/g5?_mediatype=text/html",
+    "/collections/g5?_mediatype=application/json",
+]
+
+
+class ConvertedWhenLookedUp(dict):
+    """
+    The descriptions as they were before being precomputed: their Markdown, converted to HTML whenever looked up
+    """
+    def get(self, uri, default=None):
+        import markdown
+        if uri not in self:
+            return default
+        return markdown.markdown(self[uri])
+
+
+def median_ms(client, path, requests):
+    times = []
+    for _ in range(requests):
+        _response_cache().clear()
+        began = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        times.append((time.perf_counter() - began) * 1000)
+        assert response.status_code == 200, "{} {}".format(response.status_code, path)
+    return statistics.median(times)
+
+
+def main(requests=200):
+    client = app.test_client()
+    snapshot = get_snapshot()
+    precomputed = snapshot.descriptions
+    markdown_source = ConvertedWhenLookedUp(
+        (str(s), str(o)) for s, o in snapshot.graph.subject_objects(DCTERMS.description)
+    )
+    assert all(markdown_source.get(uri) == html for uri, html in precomputed.items())
+
+    print("{:44} {:>12} {:>12} {:>8}".format("", "converted", "precomputed", "saved"))
+    for path in PATHS:
+        snapshot.descriptions = markdown_source
+        median_ms(client, path, 5)
+        converted = median_ms(client, path, requests)
+        snapshot.descriptions = precomputed
+        median_ms(client, path, 5)
+        looked_up = median_ms(client, path, requests)
+        print("{:44} {:10.3f}ms {:10.3f}ms {:7.0%}".format(
+            path, converted, looked_up, (converted - looked_up) / converted))
+
+    import_ms = subprocess.run(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import markdown; "
+                               "print((time.perf_counter() - t) * 1000)"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    print("importing markdown, no longer needed to serve from the cached snapshot: {:.0f}ms".format(float(import_ms)))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,210 @@
+"""
+Every route's latency & memory, across profiles, Media Types, resolutions, page sizes & bbox filters, saved as JSON.
+
+    python benchmarks/endpoints.py [runs] [results file] [baseline results file]
+
+Requests each case, through the Flask test client, once to warm it up, then runs times, emptying the response cache
+before each so every request is rendered, reading each response whole, and then once more with tracemalloc tracing, for
+the most memory the request had allocated at once, its peak, and how much of that it left allocated, e.g. in caches.
+
+Each case's status, response size, latency percentiles, peak & retained memory are saved to the results file, by default
+benchmarks/results/endpoints-{commit}.json, with the version, commit & Python they're from, and, if a baseline results
+file from an earlier run is given, each case whose median latency is more than 10% different is reported.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.cache import _response_cache
+from api.config import VERSION
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+RESOLUTIONS = [0, 3, 6, 9, 12, 15]
+PAGE_SIZES = [10, 100, 1000]
+# (profile, Media Type) of Features, lists of them & Collections
+FEATURE_FORMATS = [
+    ("oai", "text/html"),
+    ("oai", "application/json"),
+    ("oai", "application/geo+json"),
+    ("geosp", "text/turtle"),
+]
+COLLECTION_FORMATS = [("oai", "text/html"), ("oai", "application/json"), ("geosp", "text/turtle")]
+BBOXES = [
+    ("coords", "148,-36,150,-34"),
+    ("cell_id", "R7"),
+    ("cell_ids", "R70,R78"),
+]
+CHANGE_THRESHOLD = 0.1
+
+
+def zone_in(resolution: int):
+    # a Zone of the given resolution, in R7, which covers much of Australia
+    return ("R7" + "12345678" * 2)[:resolution + 1]
+
+
+def query(**params):
+    return "?" + "&".join("{}={}".format(k, str(v).replace("+", "%2B")) for k, v in params.items())
+
+
+def cases():
+    """
+    Each case's name, path & query, and method & body, if it's POSTed
+    """
+    for profile, mediatype in COLLECTION_FORMATS[:2]:
+        yield "landing page {}".format(mediatype), "/" + query(_profile=profile, _mediatype=mediatype), None
+    yield "conformance", "/conformance", None
+    yield "OpenAPI spec", "/spec", None
+    for profile, mediatype in COLLECTION_FORMATS:
+        yield "collections {} {}".format(profile, mediatype), "/collections" + query(
+            _profile=profile, _mediatype=mediatype), None
+
+    for r in RESOLUTIONS:
+        for profile, mediatype in COLLECTION_FORMATS:
+            yield "collection g{} {} {}".format(r, profile, mediatype), "/collections/g{}{}".format(
+                r, query(_profile=profile, _mediatype=mediatype)), None
+
+        for profile, mediatype in FEATURE_FORMATS:
+            for per_page in PAGE_SIZES:
+                yield "items g{} {} {} per_page {}".format(r, profile, mediatype, per_page), \
+                    "/collections/g{}/items{}".format(
+                        r, query(_profile=profile, _mediatype=mediatype, per_page=per_page)), None
+
+        for kind, bbox in BBOXES:
+            for mode in ["within", "intersects"]:
+                yield "items g{} bbox {} {}".format(r, kind, mode), "/collections/g{}/items{}".format(
+                    r, query(bbox=bbox, bbox_mode=mode, per_page=100, _mediatype="application/geo+json")), None
+
+        zone = zone_in(r)
+        for profile, mediatype in FEATURE_FORMATS + [("geosp", "application/ld+json")]:
+            yield "feature g{} {} {}".format(r, profile, mediatype), "/collections/g{}/items/{}{}".format(
+                r, zone, query(_profile=profile, _mediatype=mediatype)), None
+
+        if r < 15:
+            yield "descendants g{} to g{}".format(r, min(r + 3, 15)), \
+                "/collections/g{}/items/{}/descendants{}".format(r, zone, query(resolution=min(r + 3, 15))), None
+
+    for r in [3, 4]:
+        for mediatype in ["application/n-triples", "text/turtle", "application/x-ndjson"]:
+            yield "export g{} {}".format(r, mediatype), "/collections/g{}/export{}".format(
+                r, query(_mediatype=mediatype)), None
+    yield "export g9 bbox cell_id ndjson", "/collections/g9/export{}".format(
+        query(bbox="R78123", _mediatype="application/x-ndjson")), None
+
+    zones = ",".join(zone_in(r)[:-1] + str(d) for r in [3, 9, 15] for d in range(9))
+    yield "neighbours 27 Zones", "/neighbours" + query(zones=zones), None
+    for mediatype in ["application/geo+json", "text/turtle"]:
+        yield "features 27 Zones {}".format(mediatype), "/features" + query(zones=zones, _mediatype=mediatype), None
+
+    points = ";".join("{},{}".format(113 + i * 0.4, -44 + i * 0.33) for i in range(100))
+    yield "locate 100 points JSON", "/locate" + query(resolution="5,10,15", points=points), None
+    csv = "lon,lat\n" + "".join("{},{}\n".format(-180 + i * 0.036, -90 + i * 0.018) for i in range(10000))
+    yield "locate 10000 points CSV", "/locate" + query(resolution="5,10,15"), ("text/csv", csv)
+
+
+def request(client, path, body):
+    if body is None:
+        response = client.get(path)
+    else:
+        response = client.post(path, data=body[1], content_type=body[0])
+    size = len(response.get_data())
+    response.close()
+    return response.status_code, size
+
+
+def measure(client, path, body, runs):
+    status, size = request(client, path, body)
+    latencies = []
+    for _ in range(runs):
+        _response_cache().clear()
+        began = time.perf_counter()
+        request(client, path, body)
+        latencies.append((time.perf_counter() - began) * 1000)
+
+    _response_cache().clear()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    request(client, path, body)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if runs > 1 else latencies * 99
+    return {
+        "status": status,
+        "bytes": size,
+        "runs": runs,
+        "mean_ms": statistics.mean(latencies),
+        "min_ms": min(latencies),
+        "p50_ms": percentiles[49],
+        "p90_ms": percentiles[89],
+        "p99_ms": percentiles[98],
+        "max_ms": max(latencies),
+        "peak_alloc_bytes": peak - before,
+        "retained_alloc_bytes": after - before,
+    }
+
+
+def compare(baseline, results):
+    # the cases whose median latency has changed by more than CHANGE_THRESHOLD, slowest first
+    before = {r["name"]: r for r in baseline["results"]}
+    changes = []
+    for r in results:
+        if r["name"] in before and before[r["name"]]["p50_ms"] > 0:
+            change = r["p50_ms"] / before[r["name"]]["p50_ms"] - 1
+            if abs(change) > CHANGE_THRESHOLD or r["status"] != before[r["name"]]["status"]:
+                changes.append((change, r["name"], before[r["name"]], r))
+    print("\n{} cases changed by more than {:.0%} since {}:".format(
+        len(changes), CHANGE_THRESHOLD, baseline["commit"] or baseline["created"]))
+    for change, name, old, new in sorted(changes, reverse=True):
+        print("  {:+7.0%} {:9.2f}ms -> {:9.2f}ms  {}{}".format(
+            change, old["p50_ms"], new["p50_ms"], name,
+            "" if old["status"] == new["status"] else ", status {} -> {}".format(old["status"], new["status"])))
+
+
+def main(runs=10, results_file=None, baseline_file=None):
+    runs = int(runs)
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    results_file = results_file or os.path.join(ROOT, "benchmarks", "results", "endpoints-{}.json".format(
+        commit or datetime.now().strftime("%Y%m%d%H%M%S")))
+
+    # the cases' errors are reported by their status
+    app.logger.disabled = True
+    client = app.test_client()
+    results = []
+    for name, path, body in cases():
+        result = dict(name=name, path=path, method="GET" if body is None else "POST", **measure(client, path, body, runs))
+        results.append(result)
+        print("{:>4} {:9.2f}ms p50 {:9.2f}ms p99 {:10.0f}KB peak  {}".format(
+            result["status"], result["p50_ms"], result["p99_ms"], result["peak_alloc_bytes"] / 1024, name))
+
+    os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+    with open(results_file, "w") as f:
+        json.dump({
+            "version": VERSION,
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "results": results,
+        }, f, indent=1)
+    print("{} cases saved to {}".format(len(results), results_file))
+
+    if baseline_file is not None:
+        with open(baseline_file) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
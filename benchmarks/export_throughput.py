@@ -0,0 +1,37 @@
+"""
+Bulk export throughput.
+
+    python benchmarks/export_throughput.py [resolution] [zones]
+
+Streams a Range of zones Zones, from the middle of the grid of the given resolution, from /collections/gN/export in
+each Media Type, through the Flask test client, and reports Zones and MB per second.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.dggs import zone_count
+from api.model.export import EXPORT_MEDIA_TYPES
+
+
+def main(resolution=10, zones=200000):
+    client = app.test_client()
+    start = zone_count(resolution) // 2
+    print("{:>24} {:>10} {:>12} {:>8}".format("Media Type", "seconds", "Zones/s", "MB/s"))
+    for mediatype in EXPORT_MEDIA_TYPES:
+        began = time.perf_counter()
+        response = client.get(
+            "/collections/g{}/export?_mediatype={}".format(resolution, mediatype),
+            headers={"Range": "zones={}-{}".format(start, start + zones - 1)},
+            buffered=False
+        )
+        size = sum(len(chunk) for chunk in response.response)
+        seconds = time.perf_counter() - began
+        print("{:>24} {:>10.2f} {:>12.0f} {:>8.1f}".format(mediatype, seconds, zones / seconds, size / seconds / 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
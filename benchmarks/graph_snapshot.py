@@ -0,0 +1,54 @@
+"""
+Cold-start vs warm cost of getting the API's metadata graph.
+
+    python benchmarks/graph_snapshot.py [repeats]
+
+Compares the old approach (unpickling a pickled rdflib Graph on every get_graph() call) with loading the marshal
+snapshot cache once (cold start) and with the shared, already-loaded snapshot (warm, i.e. every later request).
+"""
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rdflib import Graph
+from api import snapshot
+from api.config import get_graph
+
+
+def report(label, seconds, repeats):
+    print("{:<45} {:>12.1f} µs/call".format(label, seconds / repeats * 1e6))
+
+
+def main(repeats=200):
+    # make sure the on-disk snapshot cache exists
+    snapshot.load_snapshot()
+
+    # what the old get_graph() pickled
+    g = Graph()
+    for path in snapshot._source_paths():
+        g.parse(path)
+    with tempfile.NamedTemporaryFile(suffix=".pickle", delete=False) as f:
+        pickle.dump(g, f)
+        pickle_file = f.name
+    try:
+        def unpickle():
+            with open(pickle_file, "rb") as f:
+                return pickle.load(f)
+
+        print("{} triples, pickle {} bytes, marshal cache {} bytes\n".format(
+            len(g), os.path.getsize(pickle_file), os.path.getsize(snapshot.CACHE_FILE)))
+        report("parse TTL source files", timeit.timeit(snapshot._table_from_source, number=repeats // 10), repeats // 10)
+        report("unpickle Graph (old get_graph(), per call)", timeit.timeit(unpickle, number=repeats), repeats)
+        report("load marshal snapshot (cold start)", timeit.timeit(snapshot.load_snapshot, number=repeats), repeats)
+        get_graph()
+        report("get_graph() on loaded snapshot (warm)", timeit.timeit(get_graph, number=repeats * 100), repeats * 100)
+    finally:
+        os.remove(pickle_file)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
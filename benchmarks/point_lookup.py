@@ -0,0 +1,62 @@
+"""
+RHEALPixDGGS.cell_from_point() vs api.dggs.points, for correctness and speed, and /locate throughput.
+
+    python benchmarks/point_lookup.py [points] [resolution]
+
+Finds the Zones of the given resolution containing random points, and the vertices of some Zones, where edge rules
+matter, each way and checks they agree. Then streams that many random points through /locate as CSV, through the Flask
+test client, and reports points per second.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import numpy as np
+from api.app import app
+from api.config import TB16Pix
+from api.dggs import zone_ids
+from api.dggs.geometry import geometries
+from api.dggs.points import point_zone_ids
+
+
+def main(points=100000, resolution=10):
+    random.seed(0)
+    lon = [random.uniform(-180, 180) for _ in range(points)]
+    lat = [random.uniform(-90, 90) for _ in range(points)]
+
+    checked = min(points, 5000)
+    _, vertices = geometries(list(zone_ids(4, 0, checked // 4)))
+    check_lon = lon[:checked] + vertices[:, :, 0].ravel().tolist()
+    check_lat = lat[:checked] + vertices[:, :, 1].ravel().tolist()
+    began = time.perf_counter()
+    expected = [str(TB16Pix.cell_from_point(resolution, p, plane=False)) for p in zip(check_lon, check_lat)]
+    cell_seconds = time.perf_counter() - began
+    got = point_zone_ids(check_lon, check_lat, [resolution])[resolution].tolist()
+    wrong = [(p, g, e) for p, g, e in zip(zip(check_lon, check_lat), got, expected) if g != e]
+    assert len(wrong) == 0, "Zones differ from cell_from_point(), e.g. {}".format(wrong[:3])
+    print("{} points' Zones agree with cell_from_point()".format(len(expected)))
+
+    began = time.perf_counter()
+    point_zone_ids(lon, lat, [resolution])
+    seconds = time.perf_counter() - began
+    print("{} points: cell_from_point() {:.0f}/s, point_zone_ids() {:.0f}/s".format(
+        points, len(expected) / cell_seconds, points / seconds))
+
+    body = "lon,lat\n" + "".join("{},{}\n".format(x, y) for x, y in zip(lon, lat))
+    began = time.perf_counter()
+    response = app.test_client().post(
+        "/locate?resolution={},{}".format(resolution, resolution + 2),
+        data=body,
+        content_type="text/csv"
+    )
+    lines = response.get_data().count(b"\n")
+    seconds = time.perf_counter() - began
+    assert response.status_code == 200 and lines == points + 1
+    print("/locate, CSV, 2 resolutions: {:.0f} points/s".format(points / seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,101 @@
+"""
+gunicorn workers' memory & startup time with the app preloaded in the master, and without.
+
+    python benchmarks/prefork_memory.py [workers] [requests]
+
+Starts gunicorn, with gunicorn.conf.py, the given number of workers, first with PRELOAD_APP=false, each worker loading
+the app itself, then preloading it, as is the default. Once every worker's ready it sends the given number of requests,
+of many kinds, spread across the workers, then reports how long the workers took to start, from being forked to ready,
+and the memory, see api.preload.process_memory(), each worker has on average and all of gunicorn's processes have
+between them, pss, which counts memory they share only once.
+"""
+import http.client
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.preload import process_memory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PORT = 5098
+PATHS = [
+    "/",
+    "/collections?_mediatype=text/html",
+    "/collections/g5",
+    "/collections/g5/items",
+    "/collections/g5/items?_mediatype=application/geo%2Bjson",
+    "/collections/g5/items/R1234",
+    "/collections/g5/items/R1234?_mediatype=text/turtle",
+    "/collections/g5/items/R1234?_mediatype=application/ld%2Bjson",
+    "/neighbours?zones=R1,S2",
+    "/features?zones=R1,R2",
+    "/locate?resolution=5&points=1,2",
+    "/collections/g2/items/R12/descendants",
+]
+
+
+def get(path):
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    connection.request("GET", path)
+    connection.getresponse().read()
+    connection.close()
+
+
+def workers_of(pid):
+    with open("/proc/{0}/task/{0}/children".format(pid)) as f:
+        return [int(child) for child in f.read().split()]
+
+
+def run(preload, workers, requests):
+    log = open("/tmp/prefork_memory.log", "w+")
+    began = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api.app:app"],
+        cwd=ROOT,
+        env=dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(PORT), PRELOAD_APP=str(preload).lower()),
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+    try:
+        ready = []
+        while len(ready) < workers and server.poll() is None and time.monotonic() - began < 120:
+            time.sleep(0.1)
+            log.seek(0)
+            ready = [float(s) for s in re.findall(r"Worker \d+ ready in ([\d.]+)s", log.read())]
+        if len(ready) < workers:
+            print("gunicorn didn't start, see /tmp/prefork_memory.log")
+            return
+        all_ready = time.monotonic() - began
+
+        for i in range(requests):
+            get(PATHS[i % len(PATHS)])
+
+        memory = [process_memory(pid) for pid in workers_of(server.pid)]
+        total_pss = sum(m["pss"] for m in memory) + process_memory(server.pid)["pss"]
+        print("preload {}: {} workers ready in {:.2f}s, each {:.3f}s; per worker rss {:.1f} MB, uss {:.1f} MB; "
+              "all processes' pss {:.1f} MB".format(
+                  preload,
+                  workers,
+                  all_ready,
+                  sum(ready) / workers,
+                  sum(m["rss"] for m in memory) / workers / 2 ** 20,
+                  sum(m["uss"] for m in memory) / workers / 2 ** 20,
+                  total_pss / 2 ** 20
+              ))
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+
+
+def main(workers=4, requests=500):
+    for preload in [False, True]:
+        run(preload, workers, requests)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,57 @@
+"""
+Adding up per-Feature rdflib Graphs vs writing a page of Features' RDF in one pass.
+
+    python benchmarks/rdf_serialization.py [resolution]
+
+Times serialising /items pages of growing size as GeoSPARQL Turtle the way FeaturesRenderer used to, adding each
+Feature's to_geosp_graph() to the page's Graph with +, which copies it, against api.rdf.RDFWriter, and N-Triples &
+JSON-LD with RDFWriter. The time per Feature stays flat for RDFWriter, it grows with the page size for the Graphs.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rdflib import Graph, URIRef
+from api.dggs import zones
+from api.model.feature import tb16pix_features, GEOSP_NAMESPACES
+from api.model.features import ZONE_LIST_URI_BASE
+from api.rdf import RDFWriter, TURTLE, NTRIPLES, JSONLD
+
+# pages bigger than this take minutes to add up as Graphs
+MAX_GRAPH_PAGE = 400
+
+
+def added_graphs(features):
+    g = Graph()
+    for f in features:
+        g = g + f.to_geosp_graph()
+    return g.serialize(format="turtle")
+
+
+def written(features, format):
+    writer = RDFWriter(format, GEOSP_NAMESPACES)
+    return writer.header() + writer.resources([(URIRef(f.uri), f.to_geosp_properties()) for f in features]) \
+        + writer.footer()
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - start
+
+
+def main(resolution=10):
+    print("{:>8} {:>16} {:>16} {:>16} {:>16}".format(
+        "per_page", "Graph + (ms/F)", "Turtle (ms/F)", "N-Triples (ms/F)", "JSON-LD (ms/F)"))
+    for per_page in (100, 200, 400, 800, 1600, 3200, 6400):
+        features = tb16pix_features(list(zones(resolution, 0, per_page)), uri_base=ZONE_LIST_URI_BASE)
+        columns = [timed(added_graphs, features) if per_page <= MAX_GRAPH_PAGE else None]
+        columns += [timed(written, features, format) for format in (TURTLE, NTRIPLES, JSONLD)]
+        print("{:>8} ".format(per_page) + " ".join(
+            "{:>16}".format("-") if c is None else "{:>16.3f}".format(c * 1000 / per_page) for c in columns))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,50 @@
+"""
+Rendering vs the in-process response cache.
+
+    python benchmarks/response_cache.py [requests]
+
+Requests some common pages, through the Flask test client, that many times each: first with the response cache
+emptied before each request, so every one is rendered, then without, so all but the first are served from it. Reports
+the mean time per request of each, and the cache's statistics.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.cache import _response_cache
+
+PAGES = [
+    ("/", "text/html"),
+    ("/collections", "text/html"),
+    ("/collections/g3/items", "application/geo+json"),
+    ("/collections/g3/items?page=2&per_page=100", "text/turtle"),
+    ("/collections/g6/items/R123456", "text/html"),
+]
+
+
+def main(requests=50):
+    client = app.test_client()
+    cache = _response_cache()
+    print("{:>44} {:>12} {:>12} {:>8}".format("Page", "rendered us", "cached us", "speedup"))
+    for url, mediatype in PAGES:
+        seconds = []
+        for clear in [True, False]:
+            cache.clear()
+            began = time.perf_counter()
+            for _ in range(requests):
+                if clear:
+                    cache.clear()
+                response = client.get(url, headers={"Accept": mediatype})
+                assert response.status_code == 200 and len(response.get_data()) > 0
+            seconds.append((time.perf_counter() - began) / requests)
+        print("{:>44} {:>12.0f} {:>12.0f} {:>7.0f}x".format(
+            "{} {}".format(url, mediatype), seconds[0] * 1e6, seconds[1] * 1e6, seconds[0] / seconds[1]))
+    print(json.dumps(cache.stats()))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
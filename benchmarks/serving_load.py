@@ -0,0 +1,158 @@
+"""
+Threaded WSGI vs ASGI serving under load from slow streaming clients.
+
+    python benchmarks/serving_load.py [slow clients] [seconds]
+
+Serves the app each way in turn: with the Flask server, threaded, as api/app.py runs it; with gunicorn's threaded
+worker, ASGI_THREADS threads, as a WSGI server with a fixed pool of threads would; and from asgi.py with uvicorn, also
+ASGI_THREADS threads. Each is loaded by the given number of slow clients, each reading a grid export at 16 KB/s and,
+once the exports have filled their connections' buffers and are only being generated as fast as they're read, for the
+given seconds, by 4 others fetching Features as fast as they can: the Features fetched per second, their median & 95th
+percentile latencies and the server's threads are reported. A server that can't be started is skipped.
+"""
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.config import ASGI_THREADS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PORT = 5099
+SERVERS = {
+    "Flask, threaded": [
+        sys.executable, "-c", "from api.app import app; app.run(threaded=True, port={})".format(PORT)],
+    "gunicorn gthread, {} threads".format(ASGI_THREADS): [
+        sys.executable, "-m", "gunicorn", "-k", "gthread", "--threads", str(ASGI_THREADS),
+        "-b", "127.0.0.1:{}".format(PORT), "api.app:app"],
+    "uvicorn ASGI, {} threads".format(ASGI_THREADS): [
+        sys.executable, "-m", "uvicorn", "asgi:application", "--port", str(PORT)],
+}
+
+
+def get(path, read=None):
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    if read is not None:
+        # a slow client's small receive window, so the server can't write far ahead of it
+        connection.sock = socket.socket()
+        connection.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+        connection.sock.connect(("127.0.0.1", PORT))
+    connection.request("GET", path)
+    response = connection.getresponse()
+    if read is None:
+        response.read()
+    else:
+        read(response)
+    connection.close()
+    return response.status
+
+
+def wait_until_up(server):
+    for _ in range(600):
+        if server.poll() is not None:
+            return False
+        try:
+            return get("/collections/g0/items/R") == 200
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def processes(pid):
+    # the server's process and its workers'
+    with open("/proc/{0}/task/{0}/children".format(pid)) as f:
+        return [pid] + [int(child) for child in f.read().split()]
+
+
+def cpu_seconds(pids):
+    total = 0
+    for pid in pids:
+        with open("/proc/{}/stat".format(pid)) as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return total
+
+
+def load(pid, slow_clients, seconds):
+    done = threading.Event()
+    latencies = []
+
+    def slow():
+        def read(response):
+            while not done.is_set() and len(response.read(16384)) > 0:
+                time.sleep(1)
+        get("/collections/g9/export?_mediatype=application/x-ndjson", read)
+
+    def fast():
+        r = random.Random()
+        while not done.is_set():
+            began = time.perf_counter()
+            zone_id = "R" + "".join(str(r.randrange(9)) for _ in range(6))
+            get("/collections/g6/items/{}?_mediatype=application/geo%2Bjson".format(zone_id))
+            latencies.append(time.perf_counter() - began)
+
+    slow_threads = [threading.Thread(target=slow) for _ in range(slow_clients)]
+    for t in slow_threads:
+        t.start()
+    # until the exports have filled their connections' socket buffers, and are only written as they're read
+    pids = processes(pid)
+    for _ in range(120):
+        used = cpu_seconds(pids)
+        time.sleep(1)
+        if cpu_seconds(pids) - used < 0.2:
+            break
+    server_threads = 0
+    for p in pids:
+        with open("/proc/{}/status".format(p)) as f:
+            server_threads += int(f.read().split("Threads:")[1].split()[0])
+
+    fast_threads = [threading.Thread(target=fast) for _ in range(4)]
+    for t in fast_threads:
+        t.start()
+    time.sleep(seconds)
+    done.set()
+    for t in slow_threads + fast_threads:
+        t.join()
+    return latencies, server_threads
+
+
+def main(slow_clients=16, seconds=10):
+    try:
+        get("/")
+        print("Port {} is already in use".format(PORT))
+        return
+    except OSError:
+        pass
+
+    for name, command in SERVERS.items():
+        server = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, EXPORT_CHUNK_SIZE="1000"),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_until_up(server):
+                print("{}: couldn't be started, skipped".format(name))
+                continue
+            latencies, server_threads = load(server.pid, slow_clients, seconds)
+            if len(latencies) < 20:
+                print("{}: {} Features in {}s".format(name, len(latencies), seconds))
+                continue
+            print("{}: {:.0f} Features/s, median {:.1f}ms, p95 {:.1f}ms, {} server threads".format(
+                name,
+                len(latencies) / seconds,
+                statistics.median(latencies) * 1000,
+                statistics.quantiles(latencies, n=20)[-1] * 1000,
+                server_threads
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
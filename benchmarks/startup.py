@@ -0,0 +1,78 @@
+"""
+The API's cold start, what takes it, and a check that it's within budget.
+
+    python benchmarks/startup.py [budget ms] [runs]
+
+Imports api.app, so creating the app, in the given number of new Python processes and reports the median time taken,
+the modules that took longest to import, from python -X importtime, and how long the first request needing the
+rHEALPix grid, for a grid with no geometry store, then takes. Fails if the median is over the budget, by default
+STARTUP_BUDGET_MS, or if a module meant to be imported only when first used, see api.lazy and api.config, was imported
+with the app.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# the most the app may take to import, median, in milliseconds
+STARTUP_BUDGET_MS = int(os.environ.get("STARTUP_BUDGET_MS", 800))
+# modules that mustn't be imported until a request needs them
+DEFERRED = ["rhealpixdggs", "scipy", "markdown", "geomet", "geojson_rewind"]
+
+STARTUP = """
+import sys, time
+began = time.perf_counter()
+import api.app
+print((time.perf_counter() - began) * 1000)
+print(",".join(m for m in {} if m in sys.modules))
+""".format(DEFERRED)
+
+FIRST_REQUEST = """
+import time
+from api.app import app
+client = app.test_client()
+began = time.perf_counter()
+response = client.get("/collections/g11/items/R12345678801?_mediatype=application/geo%2Bjson")
+response.get_data()
+assert response.status_code == 200
+print((time.perf_counter() - began) * 1000)
+"""
+
+
+def python(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def main(budget=STARTUP_BUDGET_MS, runs=5):
+    times = []
+    imported = []
+    for _ in range(runs):
+        out = python(STARTUP).stdout.splitlines()
+        times.append(float(out[0]))
+        imported = [m for m in out[1].split(",") if m != ""]
+    median = statistics.median(times)
+
+    # the modules that took longest to import, themselves & all they imported in turn
+    report = python("import api.app", "-X", "importtime").stderr.splitlines()
+    modules = []
+    for line in report[1:]:
+        own, cumulative, name = line.split("|")
+        modules.append((int(cumulative), int(own.split(":")[1]), name.strip()))
+    print("slowest imports, ms cumulative / own:")
+    for cumulative, own, name in sorted(modules, reverse=True)[:15]:
+        print("  {:7.1f} {:7.1f}  {}".format(cumulative / 1000, own / 1000, name))
+
+    print("first request needing the rHEALPix grid: {:.0f}ms".format(float(python(FIRST_REQUEST).stdout.split()[-1])))
+    print("import api.app, median of {}: {:.0f}ms, budget {}ms".format(runs, median, budget))
+
+    assert len(imported) == 0, "imported with the app, not when first used: {}".format(", ".join(imported))
+    assert median <= budget, "cold start {:.0f}ms is over budget, {}ms".format(median, budget)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
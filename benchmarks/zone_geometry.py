@@ -0,0 +1,52 @@
+"""
+Per-Zone vs batch calculation of Zone centroids and vertices.
+
+    python benchmarks/zone_geometry.py [resolution]
+
+Times rhealpixdggs' Cell.nucleus(plane=False) & Cell.vertices(plane=False), called once per Zone as Tb16PixFeature used
+to, against api.dggs.geometry's one vectorised pass, for /items pages of 1000 and 10000 Zones, and checks they agree.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rhealpixdggs.dggs import Cell
+from api.config import TB16Pix
+from api.dggs import geometry, zone_count, zone_ids
+
+
+def per_cell(ids):
+    out = []
+    for z in ids:
+        c = Cell(TB16Pix, [z[0]] + [int(d) for d in z[1:]])
+        out.append((c.nucleus(plane=False), c.vertices(plane=False)))
+    return out
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+
+def main(resolution=10):
+    print("{:>8} {:>12} {:>12} {:>8}".format("per_page", "Cell (s)", "batch (s)", "speedup"))
+    for per_page in (1000, 10000):
+        # a page from the middle of the grid, so it crosses polar and equatorial faces
+        start = zone_count(resolution) // 6 * 5 - per_page // 2
+        ids = list(zone_ids(resolution, start, start + per_page))
+
+        expected, cell_seconds = timed(per_cell, ids)
+        (centroids, vertices), batch_seconds = timed(geometry.geometries, ids)
+
+        assert np.allclose(centroids, [e[0] for e in expected], rtol=0, atol=1e-9)
+        assert np.allclose(vertices, [e[1] for e in expected], rtol=0, atol=1e-9)
+        print("{:>8} {:>12.4f} {:>12.4f} {:>7.0f}x".format(
+            per_page, cell_seconds, batch_seconds, cell_seconds / batch_seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,42 @@
+"""
+Cell.neighbors() vs api.dggs.neighbours, for speed. That they agree is tested by tests/test_neighbours.py.
+
+    python benchmarks/zone_neighbours.py [zones] [resolution]
+
+Times working out the neighbours of the given number of Zones, from the middle of the grid of the given resolution,
+with Cell.neighbors(), with zone_neighbours() one at a time and with neighbours() all at once.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from rhealpixdggs.dggs import Cell
+from api.config import TB16Pix
+from api.dggs import zone_count, zone_ids
+from api.dggs.neighbours import neighbours, zone_neighbours
+
+
+def main(n=10000, resolution=8):
+    start = zone_count(resolution) // 2
+    ids = list(zone_ids(resolution, start, start + n))
+
+    began = time.perf_counter()
+    for z in ids:
+        Cell(TB16Pix, [z[0]] + [int(d) for d in z[1:]]).neighbors()
+    cell_seconds = time.perf_counter() - began
+    began = time.perf_counter()
+    for z in ids:
+        zone_neighbours(z)
+    one_seconds = time.perf_counter() - began
+    began = time.perf_counter()
+    neighbours(ids)
+    seconds = time.perf_counter() - began
+    print("{} Zones: Cell.neighbors() {:.3f}s, zone_neighbours() one at a time {:.3f}s ({:.0f}x), "
+          "neighbours() at once {:.4f}s ({:.0f}x)".format(
+              len(ids), cell_seconds, one_seconds, cell_seconds / one_seconds, seconds, cell_seconds / seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,55 @@
+"""
+Zone IDs as strings vs as Zones.
+
+    python benchmarks/zone_type.py [resolution] [zones]
+
+For zones Zones, from the middle of the grid of the given resolution, reports the memory a list of them takes as ID
+strings and as Zones, the time to list them each way, to parse and format them and to find their parents & children,
+then the memory the Zone cache takes per Zone once a page of them has been listed as GeoJSON.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from api.app import app
+from api.cache import deep_sizeof
+from api.dggs import Zone, zones, zone_count, zone_ids
+from api.model.feature import zone_cache
+
+
+def timed(f):
+    began = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - began
+
+
+def main(resolution=9, n=100000):
+    start = zone_count(resolution) // 2
+    ids, ids_seconds = timed(lambda: list(zone_ids(resolution, start, start + n)))
+    grid_zones, zones_seconds = timed(lambda: list(zones(resolution, start, start + n)))
+    print("list {} IDs {:.3f}s, {:.0f} B each; as Zones {:.3f}s, {:.0f} B each".format(
+        n, ids_seconds, deep_sizeof(ids) / n, zones_seconds, deep_sizeof(grid_zones) / n))
+
+    parsed, seconds = timed(lambda: [Zone.parse(z) for z in ids])
+    assert parsed == grid_zones
+    print("Zone.parse() {:.2f}us each".format(seconds / n * 1e6))
+    formatted, seconds = timed(lambda: [str(z) for z in grid_zones])
+    assert formatted == ids
+    print("str(Zone) {:.2f}us each".format(seconds / n * 1e6))
+    _, id_seconds = timed(lambda: [(z[:-1], [z + str(d) for d in range(9)]) for z in ids])
+    _, seconds = timed(lambda: [(z.parent, z.children()) for z in grid_zones])
+    print("parent & children of IDs {:.2f}us each, of Zones {:.2f}us each".format(
+        id_seconds / n * 1e6, seconds / n * 1e6))
+
+    zone_cache.clear()
+    client = app.test_client()
+    _, seconds = timed(lambda: client.get(
+        "/collections/g{}/items?limit=10000&_mediatype=application/geo%2Bjson".format(resolution)).get_data())
+    size = zone_cache.bytes + sum(deep_sizeof(k) for k in zone_cache._entries)
+    print("10000 Feature GeoJSON page, cold, {:.2f}s, Zone cache {:.0f} B per Zone".format(seconds, size / len(zone_cache)))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,62 @@
+"""
+gunicorn settings for serving the API in production on several pre-forked worker processes:
+
+    gunicorn -c gunicorn.conf.py api.app:app
+
+or, serving asgi.py's ASGI app on uvicorn's workers:
+
+    WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:application
+
+The app is loaded, and everything it only reads built, see api.preload, once, in the master process, before the workers
+are forked, so they share it all, copy-on-write, rather than each loading their own, and start in milliseconds. Python's
+garbage collector writes to every object it tracks, which would copy the pages they're on into each worker, so all that's
+been loaded is frozen out of its reach first. Each worker logs its memory, see api.preload.process_memory(), when it's
+started and when it exits.
+"""
+import gc
+import multiprocessing
+import os
+import time
+
+bind = os.environ.get("BIND", "0.0.0.0:{}".format(os.environ.get("PORT", 5000)))
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = os.environ.get("WORKER_CLASS", "gthread")
+threads = int(os.environ.get("THREADS", 8))
+# load the app once in the master, for all the workers. PRELOAD_APP=false for each worker to load its own
+preload_app = os.environ.get("PRELOAD_APP", "true").lower() != "false"
+
+
+def _memory_text():
+    from api.preload import process_memory
+    return ", ".join("{} {:.1f} MB".format(k, v / 2 ** 20) for k, v in process_memory().items())
+
+
+def when_ready(server):
+    # the app's been loaded, if preload_app, and no worker forked yet
+    if preload_app:
+        from api.app import app
+        from api.preload import preload
+        seconds = preload(app)
+        gc.freeze()
+        server.log.info("Preloaded in {:.2f}s: {}".format(seconds, _memory_text()))
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    worker.log.info("Worker {} ready in {:.3f}s: {}".format(
+        worker.pid, time.monotonic() - worker.forked_at, _memory_text()))
+
+
+def worker_exit(server, worker):
+    server.log.info("Worker {} exiting: {}".format(worker.pid, _memory_text()))
+
+
+def child_exit(server, worker):
+    # a worker's metrics, see api.metrics, are only kept in PROMETHEUS_MULTIPROC_DIR when several processes share it
+    from api.metrics import MULTIPROCESS
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the API's package, api, is imported from the repository's root, as the server and benchmarks/ do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
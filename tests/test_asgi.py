@@ -0,0 +1,116 @@
+"""
+The app served over ASGI, by api.asgi.AsgiApp, responds as it does over WSGI: to a GET, with a streamed body and to a
+POST whose body is received in parts.
+"""
+import asyncio
+import pytest
+from api.app import app
+from api.asgi import AsgiApp
+
+
+@pytest.fixture(scope="module")
+def asgi_app():
+    application = AsgiApp(app, threads=2)
+    yield application
+    application.executor.shutdown()
+
+
+def call(application, method, path, query=b"", headers=(), body_parts=(b"",), disconnect_after=None):
+    # the status, headers and body parts an ASGI server would be sent for the request
+    sent = []
+    received = []
+    # the client's gone once it's been sent disconnect_after parts of the body, or else never, and the part that
+    # completes those is only sent once the disconnect's been received, so nothing more is sent after it
+    leaving = asyncio.Event()
+    gone = asyncio.Event()
+
+    async def receive():
+        if len(received) < len(body_parts):
+            received.append(body_parts[len(received)])
+            return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(body_parts)}
+        await leaving.wait()
+        gone.set()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if disconnect_after is not None and len(sent) == disconnect_after + 1:
+            leaving.set()
+            await gone.wait()
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 5000),
+    }
+    asyncio.run(application(scope, receive, send))
+    assert sent[0]["type"] == "http.response.start"
+    parts = [message["body"] for message in sent[1:]]
+    return sent[0]["status"], dict((k.decode(), v.decode()) for k, v in sent[0]["headers"]), parts
+
+
+def test_get(asgi_app):
+    status, headers, parts = call(asgi_app, "GET", "/collections/g1/items/R1", b"_mediatype=text/turtle")
+    with app.test_client().get("/collections/g1/items/R1?_mediatype=text/turtle") as expected:
+        assert status == 200
+        assert headers["content-type"] == expected.headers["Content-Type"]
+        assert b"".join(parts) == expected.get_data()
+
+
+def test_get_error(asgi_app):
+    status, _, parts = call(asgi_app, "GET", "/collections/nope/items/R1")
+    assert status == 400
+    assert b"".join(parts) == b"You have entered an unknown Collection ID"
+
+
+def test_streamed(asgi_app):
+    status, _, parts = call(asgi_app, "GET", "/collections/g4/export", b"_mediatype=application/x-ndjson")
+    with app.test_client().get("/collections/g4/export?_mediatype=application/x-ndjson") as expected:
+        assert status == 200
+        assert len(parts) > 2
+        assert parts[-1] == b""
+        assert b"".join(parts) == expected.get_data()
+
+
+def test_streamed_disconnect(asgi_app):
+    # the export stops being generated once its client's gone, after its first chunk of 4
+    status, _, parts = call(asgi_app, "GET", "/collections/g4/export", b"_mediatype=application/x-ndjson",
+                            disconnect_after=1)
+    assert status == 200
+    assert len(parts) == 1
+    assert parts[0] != b""
+
+
+def test_post(asgi_app):
+    body = b"lon,lat\n145.0,-37.8\n0,0\n"
+    status, _, parts = call(
+        asgi_app,
+        "POST",
+        "/locate",
+        b"resolution=3",
+        headers=[("Content-Type", "text/csv"), ("Transfer-Encoding", "chunked")],
+        body_parts=(body[:10], body[10:20], body[20:]),
+    )
+    assert status == 200
+    assert b"".join(parts) == b"lon,lat,g3\r\n145.0,-37.8,P664\r\n0.0,0.0,R443\r\n"
+
+
+def test_write():
+    # a WSGI app may send some of its body with start_response's write(), before the rest it returns
+    def wsgi_app(environ, start_response):
+        write = start_response("200 OK", [("Content-Type", "text/plain")])
+        write(b"written, ")
+        return [b"returned"]
+
+    application = AsgiApp(wsgi_app, threads=1)
+    status, _, parts = call(application, "GET", "/")
+    application.executor.shutdown()
+    assert status == 200
+    assert b"".join(parts) == b"written, returned"
@@ -0,0 +1,73 @@
+"""
+A conditional request is answered with a 304 only if its response would be a 200: an invalid one still gets the
+view's error, whatever its If-Modified-Since.
+"""
+import pytest
+from api.app import app
+
+LATER = {"If-Modified-Since": "Tue, 01 Jan 2099 00:00:00 GMT"}
+
+INVALID = [
+    "/collections/nope/items/R1",
+    "/collections/g1/items/XYZ",
+    "/collections/g1/items/R1/descendants?depth=x",
+    "/features",
+    "/features?zones=XYZ",
+    "/neighbours",
+    "/neighbours?zone=XYZ",
+    "/locate",
+    "/locate?lon=x&lat=y",
+]
+
+
+@pytest.mark.parametrize("url", INVALID)
+def test_invalid_request_if_modified_since(url):
+    with app.test_client().get(url, headers=LATER) as response:
+        assert response.status_code == 400
+        assert "ETag" not in response.headers
+
+
+@pytest.mark.parametrize("url", ["/collections/g1/items/R1", "/collections/g1/items/R1/descendants"])
+def test_valid_request_if_modified_since(url):
+    client = app.test_client()
+    with client.get(url, headers=LATER) as response:
+        assert response.status_code == 304
+        assert response.get_data() == b""
+    with client.get(url) as response:
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        response.get_data()
+    # now from response_cache
+    with client.get(url, headers=LATER) as response:
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+    with client.get(url, headers={"If-None-Match": etag}) as response:
+        assert response.status_code == 304
+
+
+def test_large_response_not_buffered(monkeypatch):
+    # a response larger than an entry may be is sent in full, but not kept in response_cache
+    from api import cache
+    url = "/collections/g2/items?per_page=50&_mediatype=application/geo%2Bjson"
+    monkeypatch.setattr(cache, "response_cache", cache.LRUCache(16 * 1024, cache.CachedResponse.size))
+    client = app.test_client()
+    with client.get(url) as response:
+        body = response.get_data()
+        assert 1024 < len(body) < 16 * 1024
+    assert len(cache.response_cache) == 0
+    with client.get(url) as response:
+        assert response.headers["X-Cache"] == "MISS"
+        assert response.get_data() == body
+
+
+def test_small_response_buffered(monkeypatch):
+    from api import cache
+    url = "/collections/g1/items/R1"
+    monkeypatch.setattr(cache, "response_cache", cache.LRUCache(16 * 1024 * 1024, cache.CachedResponse.size))
+    client = app.test_client()
+    with client.get(url) as response:
+        body = response.get_data()
+    assert len(cache.response_cache) == 1
+    with client.get(url) as response:
+        assert response.headers["X-Cache"] == "HIT"
+        assert response.get_data() == body
@@ -0,0 +1,93 @@
+"""
+The Zones ZoneCover finds within a bbox are those rhealpixdggs' Cells are, judged by points on and in each Zone of the
+coarse grids, in grid order; those it finds intersecting a bbox include all of those, and only polar Zones besides,
+whose extents, not the Zones themselves, overlap the box. Any page of a cover is that part of the whole, and a cover
+with too many Zones along its edges raises CoverTooLarge, which /items answers with a 400.
+"""
+import pytest
+from rhealpixdggs.dggs import Cell
+from api.app import app
+from api.config import TB16Pix
+from api.dggs import FACES, zone_count, zone_ids
+from api.dggs.cover import ZoneCover, CoverTooLarge, WITHIN, INTERSECTS
+
+BBOXES = [
+    (113.3, -43.7, 153.9, -10.1),  # equatorial
+    (170.5, -20.3, -170.2, 20.7),  # across the antimeridian
+    (-30.2, 60.3, 60.7, 88.1),  # polar
+    (10.1, -80.2, 100.3, -50.6),  # polar & equatorial
+    (-180, -90, 180, -70.4),  # a polar cap
+    (-180, -90, 180, 90),  # the whole Earth
+]
+# the Zones of the grids up to this are checked
+RESOLUTION = 3
+
+_samples = {}
+
+
+def samples(zone_id):
+    # points on the boundary of, and inside, a Zone
+    if zone_id not in _samples:
+        cell = Cell(TB16Pix, [zone_id[0]] + [int(d) for d in zone_id[1:]])
+        _samples[zone_id] = cell.boundary(n=8, plane=False) + cell.interior(n=6, plane=False, flatten=True)
+    return _samples[zone_id]
+
+
+def ids(zones):
+    return [str(z) for z in zones]
+
+
+def in_bbox(lon, lat, bbox):
+    west, south, east, north = bbox
+    if west <= east:
+        return west <= lon <= east and south <= lat <= north
+    return (lon >= west or lon <= east) and south <= lat <= north
+
+
+def expected(bbox, resolution):
+    # the Zones wholly within the bbox, and those partly in it, by their points
+    within, intersecting = [], []
+    for zone_id in zone_ids(resolution, 0, zone_count(resolution)):
+        inside = [in_bbox(lon, lat, bbox) for lon, lat in samples(zone_id)]
+        if all(inside):
+            within.append(zone_id)
+        if any(inside):
+            intersecting.append(zone_id)
+    return within, intersecting
+
+
+@pytest.mark.parametrize("resolution", range(2, RESOLUTION + 1))
+@pytest.mark.parametrize("bbox", BBOXES)
+def test_cover(bbox, resolution):
+    within, intersecting = expected(bbox, resolution)
+    assert ids(ZoneCover(bbox, resolution, WITHIN).zones()) == within
+
+    cover = ids(ZoneCover(bbox, resolution, INTERSECTS).zones())
+    assert cover == sorted(cover, key=lambda z: (FACES.index(z[0]), z))
+    assert set(intersecting) <= set(cover)
+    assert all(z[0] in "NS" for z in set(cover) - set(intersecting))
+
+
+@pytest.mark.parametrize("mode", [WITHIN, INTERSECTS])
+@pytest.mark.parametrize("bbox", BBOXES[:4])
+def test_pages(bbox, mode):
+    cover = ZoneCover(bbox, 5, mode)
+    every = ids(cover.zones())
+    assert len(cover) == len(every) > 0
+    for start in [0, 1, 37, len(every) // 2, len(every) - 5]:
+        assert ids(cover.zones(start, start + 37)) == every[start:start + 37]
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        ZoneCover((10, 20, 30, 100), 3)
+    with pytest.raises(ValueError):
+        ZoneCover((10, 20, 30, 40), 3, "overlaps")
+
+
+def test_too_large():
+    bbox = (-170.3, 60.1, 170.2, 89.9)
+    with pytest.raises(CoverTooLarge):
+        ZoneCover(bbox, 12)
+    response = app.test_client().get("/collections/g12/items?bbox={},{},{},{}".format(*bbox))
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+"""
+The export writes each Zone as its template, made from what /items writes, filled in with str.format() would: its
+chunks' IDs, coordinates & templates, formatted all at once, are the same as formatting each Zone in turn.
+"""
+import random
+import numpy as np
+import pytest
+from api.app import app
+from api.dggs import MAX_RESOLUTION, Zone, format_zones, store, zone_count, zones
+from api.model.export import EXPORT_MEDIA_TYPES, ExportRenderer, _coordinates_text, _fill
+
+
+def test_format_zones():
+    rng = random.Random(0)
+    mixed = [Zone.of(rng.randrange(zone_count(r)), r) for r in range(MAX_RESOLUTION + 1) for _ in range(100)]
+    rng.shuffle(mixed)
+    for some in [mixed, list(zones(0)), list(zones(2)), list(zones(15, 10 ** 12, 10 ** 12 + 1000)), []]:
+        assert format_zones(some) == [str(z) for z in some]
+
+
+def test_fill():
+    assert _fill("{0}={1}, {0};", [["a", "b"], ["1", "2"]]) == "a=1, a;b=2, b;"
+    assert _fill("{{{0}}}", [["x", "y"]]) == "{x}{y}"
+
+
+def test_coordinates_text():
+    coordinates = np.array([[0.0, -0.0], [1e-05, -180.0], [0.1 + 0.2, 0.0], [-0.0, 1e-05]])
+    assert _coordinates_text(coordinates) == [[str(c) for c in column] for column in coordinates.T.tolist()]
+
+
+@pytest.mark.parametrize("mediatype", EXPORT_MEDIA_TYPES)
+@pytest.mark.parametrize("resolution, start", [(1, 0), (6, 3188000), (10, 10 ** 8)])
+def test_chunk_as_formatted_per_zone(mediatype, resolution, start):
+    chunk = list(zones(resolution, start, start + 500))
+    with app.test_request_context("/collections/g{}/export?_mediatype={}".format(resolution, mediatype)):
+        from flask import request
+        renderer = ExportRenderer(request, "g{}".format(resolution))
+        template = renderer._zone_template()
+        text = "".join(renderer._zones_text(lambda a, b: chunk[a:b], 0, len(chunk)))
+
+    coordinates = store.nuclei(chunk) if mediatype == "application/x-ndjson" else store.records(chunk)
+    assert text == "".join(template.format(str(z), *map(str, c)) for z, c in zip(chunk, coordinates.tolist()))
@@ -0,0 +1,30 @@
+"""
+The format of a page of /collections/{collection_id}/items in each of its JSON Media Types: the plain JSON view is the
+page's links, Collection & counts, without its Features, which only the GeoJSON FeatureCollection includes.
+"""
+import json
+from api.app import app
+
+PAGE = "/collections/g3/items?page=2&per_page=5&_mediatype="
+
+
+def page(mediatype: str):
+    with app.test_client().get(PAGE + mediatype) as response:
+        assert response.status_code == 200
+        return response.mimetype, json.loads(response.get_data())
+
+
+def test_json():
+    mimetype, body = page("application/json")
+    assert mimetype == "application/json"
+    assert list(body) == ["links", "collection", "numberMatched", "numberReturned"]
+    assert (body["numberMatched"], body["numberReturned"]) == (6 * 9 ** 3, 5)
+
+
+def test_geojson():
+    mimetype, body = page("application/geo%2Bjson")
+    assert mimetype == "application/geo+json"
+    assert list(body) == ["type", "features", "links", "collection", "numberMatched", "numberReturned"]
+    assert body["type"] == "FeatureCollection"
+    assert [f["id"].split("/")[-1] for f in body["features"]] == ["N005", "N006", "N007", "N008", "N010"]
+    assert (body["numberMatched"], body["numberReturned"]) == (6 * 9 ** 3, 5)
@@ -0,0 +1,25 @@
+"""
+The landing page is served in each of its Media Types, and its alternate profiles, and a profile it doesn't have gives
+its default, as pyldapi negotiates, not an error.
+"""
+import pytest
+from api.app import app
+
+
+@pytest.mark.parametrize("query, mediatype", [
+    ("", "text/html"),
+    ("?_mediatype=application/json", "application/json"),
+    ("?_profile=alt", "text/html"),
+    ("?_profile=dcat", "text/html"),
+])
+def test_landing_page(query, mediatype):
+    with app.test_client().get("/" + query, headers={"Accept": "text/html, application/json;q=0.5"}) as response:
+        assert response.status_code == 200
+        assert response.mimetype == mediatype
+
+
+def test_landing_page_json():
+    page = app.test_client().get("/?_mediatype=application/json").get_json()
+    assert page["title"]
+    assert page["description"].startswith("<p>")
+    assert any(link["rel"] == "data" for link in page["links"])
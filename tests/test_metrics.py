@@ -0,0 +1,64 @@
+"""
+/metrics, and that with METRICS false nothing of api.metrics is done: prometheus_client isn't imported, nor /metrics
+served, though the routes counting the Zones they render still answer.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+REQUESTS = """
+import json, sys
+from api.app import app
+client = app.test_client()
+
+
+def status(path):
+    # streamed responses are read whole, and closed, as a server would
+    with client.get(path) as response:
+        response.get_data()
+        return response.status_code
+
+
+statuses = [status(path) for path in [
+    "/collections/g3/items?_mediatype=application/geo%2Bjson",
+    "/collections/g3/items/R123",
+    "/features?zones=R1,S23",
+    "/metrics",
+]]
+print(json.dumps([statuses, "prometheus_client" in sys.modules]))
+"""
+
+
+def requested(metrics: str):
+    out = subprocess.run(
+        [sys.executable, "-c", REQUESTS], cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, METRICS=metrics)
+    )
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def test_metrics_disabled():
+    statuses, imported = requested("false")
+    assert statuses == [200, 200, 200, 404]
+    assert not imported
+
+
+def test_metrics_enabled():
+    statuses, imported = requested("true")
+    assert statuses == [200, 200, 200, 200]
+    assert imported
+
+
+def test_zones_rendered_recorded():
+    from api.app import app
+    client = app.test_client()
+    with client.get("/collections/g3/items?per_page=7&_mediatype=application/geo%2Bjson") as response:
+        assert response.status_code == 200
+        response.get_data()
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'tb16pix_zones_rendered_count{route="/collections/<string:collection_id>/items"}' in text
+    assert 'tb16pix_requests_total{' in text
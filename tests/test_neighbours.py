@@ -0,0 +1,94 @@
+"""
+The neighbours api.dggs.neighbours works out by index arithmetic, in batches and one at a time, and /neighbours gives,
+are those Cell.neighbors() gives: for every Zone of the coarsest grids, random Zones of every finer one, and Zones along
+every edge of every root face, where neighbours are on other faces and, next to the polar faces N & S, rotated. The
+equatorial faces O & R meet at the antimeridian. /neighbours answers invalid requests with a 400.
+"""
+import random
+import pytest
+from rhealpixdggs.dggs import Cell
+from api.app import app
+from api.config import TB16Pix
+from api.dggs import FACES, MAX_RESOLUTION, zone_count, zone_id, zone_ids
+from api.dggs.index import N_SIDE
+from api.dggs.neighbours import neighbours, zone_neighbours, DIRECTIONS
+
+# the grids checked Zone by Zone; finer ones are sampled
+EXHAUSTIVE_RESOLUTION = 3
+SAMPLES = 200
+EDGE_SAMPLES = 10
+
+
+def cell_neighbours(ids):
+    out = []
+    for z in ids:
+        n = Cell(TB16Pix, [z[0]] + [int(d) for d in z[1:]]).neighbors()
+        out.append([str(n[d]) for d in DIRECTIONS])
+    return out
+
+
+def edge_zones(face, resolution, samples):
+    # random Zones on each of the four edges of a root face, and its corners
+    rng = random.Random("{}{}".format(face, resolution))
+    side = N_SIDE ** resolution
+    positions = [(0, 0), (0, side - 1), (side - 1, 0), (side - 1, side - 1)]
+    for _ in range(samples):
+        i = rng.randrange(side)
+        positions += [(0, i), (side - 1, i), (i, 0), (i, side - 1)]
+    ids = []
+    for row, col in positions:
+        digits = [
+            (row // N_SIDE ** p % N_SIDE) * N_SIDE + col // N_SIDE ** p % N_SIDE
+            for p in reversed(range(resolution))
+        ]
+        ids.append(face + "".join(str(d) for d in digits))
+    return ids
+
+
+def assert_agree(ids):
+    expected = cell_neighbours(ids)
+    assert neighbours(ids).tolist() == expected
+    assert [zone_neighbours(z) for z in ids] == expected
+
+
+@pytest.mark.parametrize("resolution", range(EXHAUSTIVE_RESOLUTION + 1))
+def test_every_zone(resolution):
+    assert_agree(list(zone_ids(resolution)))
+
+
+@pytest.mark.parametrize("resolution", range(EXHAUSTIVE_RESOLUTION + 1, MAX_RESOLUTION + 1))
+def test_random_zones(resolution):
+    rng = random.Random(resolution)
+    assert_agree([zone_id(rng.randrange(zone_count(resolution)), resolution) for _ in range(SAMPLES)])
+
+
+@pytest.mark.parametrize("face", FACES)
+@pytest.mark.parametrize("resolution", range(1, MAX_RESOLUTION + 1))
+def test_face_edges(face, resolution):
+    assert_agree(edge_zones(face, resolution, EDGE_SAMPLES))
+
+
+def test_mixed_resolutions():
+    # a batch of Zones of different resolutions, as /neighbours may be asked for
+    ids = ["N", "S8", "O036", "R258", "Q" + "4" * MAX_RESOLUTION, "P1234"]
+    assert_agree(ids)
+
+
+def test_route():
+    ids = ["N", "S8", "P1234"]
+    client = app.test_client()
+    response = client.get("/neighbours?zones=" + ",".join(ids))
+    assert response.status_code == 200
+    assert response.get_json() == {z: dict(zip(DIRECTIONS, n)) for z, n in zip(ids, cell_neighbours(ids))}
+    response = client.post("/neighbours", json=ids)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("url", [
+    "/neighbours",
+    "/neighbours?zones=R1,X1",
+    "/neighbours?zones=R1&_mediatype=text/turtle",
+    "/neighbours?zone=R1",
+])
+def test_route_invalid(url):
+    assert app.test_client().get(url).status_code == 400
@@ -0,0 +1,103 @@
+"""
+Requests profiled at once, by a threaded server, are all answered: with cProfile, which from Python 3.12 can't be
+enabled by two threads at once, one at a time is profiled and the rest served as usual; with the stack sampler, all are.
+"""
+import cProfile
+import os
+import threading
+import pytest
+from werkzeug.test import Client
+from api.app import app
+from api import profiling
+
+SECRET = "let me see"
+URL = "/collections/g3/items?per_page=100&_mediatype=application/geo%2Bjson"
+THREADS = 8
+
+
+class OneAtATimeProfile(cProfile.Profile):
+    # cProfile as it is from Python 3.12, on which it's a sys.monitoring tool of which one may be active
+    _active = 0
+    _lock = threading.Lock()
+
+    def enable(self, *args, **kwargs):
+        with OneAtATimeProfile._lock:
+            if OneAtATimeProfile._active > 0:
+                raise ValueError("Another profiling tool is already active")
+            OneAtATimeProfile._active += 1
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        with OneAtATimeProfile._lock:
+            OneAtATimeProfile._active -= 1
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path, request):
+    monkeypatch.setattr(cProfile, "Profile", OneAtATimeProfile)
+    monkeypatch.setattr(profiling, "PROFILE_FORMAT", request.param)
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", SECRET)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return Client(profiling.ProfilingMiddleware(app.wsgi_app)), tmp_path
+
+
+def get(client, url=URL):
+    # the status, and the profile's file name, if it was profiled, of a request asking to be
+    response = client.get(url, headers={"X-Profile": SECRET})
+    try:
+        response.get_data()
+        return response.status_code, response.headers.get("X-Profile-File")
+    finally:
+        response.close()
+
+
+def get_at_once(client) -> list:
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def run(i):
+        barrier.wait()
+        results[i] = get(client)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.parametrize("profiled_client", ["pstats"], indirect=True)
+def test_cprofile_concurrent(profiled_client):
+    client, profile_dir = profiled_client
+    results = get_at_once(client)
+    assert [status for status, _ in results] == [200] * THREADS
+    files = [name for _, name in results if name is not None]
+    assert len(files) >= 1
+    assert sorted(files) == sorted(os.listdir(profile_dir))
+
+
+@pytest.mark.parametrize("profiled_client", ["pstats"], indirect=True)
+def test_cprofile_busy(profiled_client):
+    # while a streamed response's being profiled, another request is answered but not profiled
+    client, profile_dir = profiled_client
+    streamed = client.get("/collections/g4/export?_mediatype=application/x-ndjson", headers={"X-Profile": SECRET})
+    assert streamed.headers.get("X-Profile-File") is not None
+    results = [None]
+    thread = threading.Thread(target=lambda: results.__setitem__(0, get(client)))
+    thread.start()
+    thread.join()
+    assert results[0] == (200, None)
+    streamed.close()
+    assert get(client)[1] is not None
+    assert len(os.listdir(profile_dir)) == 2
+
+
+@pytest.mark.parametrize("profiled_client", ["collapsed"], indirect=True)
+def test_sampled_concurrent(profiled_client):
+    client, profile_dir = profiled_client
+    results = get_at_once(client)
+    assert [status for status, _ in results] == [200] * THREADS
+    assert all(name is not None for _, name in results)
+    assert len(os.listdir(profile_dir)) == THREADS
@@ -0,0 +1,54 @@
+"""
+The API's cold start: importing api.app, in a new Python process, mustn't import the modules deferred until a request
+needs them, see api.lazy, and mustn't take longer than STARTUP_BUDGET_MS, median. benchmarks/startup.py reports what
+the time's spent on.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# the most the app may take to import, median, in milliseconds
+STARTUP_BUDGET_MS = int(os.environ.get("STARTUP_BUDGET_MS", 800))
+# modules that mustn't be imported until a request needs them
+DEFERRED = ["rhealpixdggs", "scipy", "markdown", "geomet", "geojson_rewind"]
+RUNS = 3
+
+STARTUP = """
+import json, sys, time
+began = time.perf_counter()
+import api.app
+seconds = time.perf_counter() - began
+print(json.dumps([seconds * 1000, sorted(m for m in sys.modules if m.split(".")[0] in {})]))
+""".format(DEFERRED)
+
+FIRST_USE = """
+import json, sys
+from api.app import app
+response = app.test_client().get("/collections/g11/items/R12345678801?_mediatype=application/geo%2Bjson")
+assert response.status_code == 200, response.status_code
+print(json.dumps(all(m in sys.modules for m in ["rhealpixdggs", "geomet", "geojson_rewind"])))
+"""
+
+
+def python(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def test_deferred_modules_not_imported_with_app():
+    _, imported = python(STARTUP)
+    assert imported == []
+
+
+def test_startup_within_budget():
+    median = statistics.median(python(STARTUP)[0] for _ in range(RUNS))
+    assert median <= STARTUP_BUDGET_MS, "cold start {:.0f}ms is over budget, {}ms".format(median, STARTUP_BUDGET_MS)
+
+
+def test_deferred_module_imported_when_first_needed():
+    # g11 has no geometry store, so its Zones' geometries are worked out by the rHEALPix grid
+    assert python(FIRST_USE)
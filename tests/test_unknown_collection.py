@@ -0,0 +1,24 @@
+"""
+Every route under /collections/{collection_id} answers a Collection ID that isn't one of the grids', g0 to g15, with a
+400, not an error.
+"""
+import pytest
+from api.app import app
+
+ROUTES = [
+    "/collections/{}",
+    "/collections/{}/items",
+    "/collections/{}/items?_mediatype=application/geo%2Bjson",
+    "/collections/{}/items?_profile=geosp&_mediatype=text/turtle",
+    "/collections/{}/items/R1",
+    "/collections/{}/items/R1/descendants",
+    "/collections/{}/export",
+]
+
+
+@pytest.mark.parametrize("collection_id", ["foo", "g16", "g"])
+@pytest.mark.parametrize("route", ROUTES)
+def test_unknown_collection(route, collection_id):
+    response = app.test_client().get(route.format(collection_id))
+    assert response.status_code == 400
+    assert response.get_data(as_text=True) == "You have entered an unknown Collection ID"
@@ -0,0 +1,71 @@
+"""
+A Zone is the Zone its ID names: parsing, formatting, ordinals, parents, ancestors and children agree with the Zone ID
+strings api.dggs.index works with, for every Zone of the coarsest grids and random Zones of every finer one, and a Zone
+behaves as the int it is in sets, sorts and numpy arrays.
+"""
+import random
+import numpy as np
+import pytest
+from api.dggs import MAX_RESOLUTION, Zone, zone_count, zone_id, zone_ids, zone_ordinal, zones
+
+# the grids checked Zone by Zone; finer ones are sampled
+EXHAUSTIVE_RESOLUTION = 3
+SAMPLES = 200
+
+
+def some_zone_ids(resolution):
+    if resolution <= EXHAUSTIVE_RESOLUTION:
+        return list(zone_ids(resolution))
+    rng = random.Random(resolution)
+    ordinals = [0, zone_count(resolution) - 1] + [rng.randrange(zone_count(resolution)) for _ in range(SAMPLES)]
+    return [zone_id(o, resolution) for o in ordinals]
+
+
+@pytest.mark.parametrize("resolution", range(MAX_RESOLUTION + 1))
+def test_parse_and_format(resolution):
+    for i in some_zone_ids(resolution):
+        zone = Zone.parse(i)
+        assert str(zone) == "{}".format(zone) == i
+        assert repr(zone) == "Zone('{}')".format(i)
+        assert zone.resolution == resolution
+        assert zone.ordinal == zone_ordinal(i)
+        assert zone.face == i[0]
+        assert Zone.of(zone_ordinal(i), resolution) == zone
+
+
+@pytest.mark.parametrize("resolution", range(MAX_RESOLUTION + 1))
+def test_hierarchy(resolution):
+    for i in some_zone_ids(resolution):
+        zone = Zone.parse(i)
+        if resolution == 0:
+            assert zone.parent is None
+        else:
+            assert str(zone.parent) == i[:-1]
+        for r in range(resolution + 1):
+            assert str(zone.ancestor(r)) == i[:r + 1]
+        if resolution == MAX_RESOLUTION:
+            assert zone.children() == []
+        else:
+            assert [str(c) for c in zone.children()] == [i + str(d) for d in range(9)]
+    with pytest.raises(ValueError):
+        Zone.parse("R1").ancestor(2)
+
+
+@pytest.mark.parametrize("resolution, start, stop", [(0, 0, None), (3, 100, 200), (15, 10 ** 12, 10 ** 12 + 50)])
+def test_zones(resolution, start, stop):
+    assert [str(z) for z in zones(resolution, start, stop)] == list(zone_ids(resolution, start, stop))
+
+
+@pytest.mark.parametrize("zone_id", ["", "X1", "R9", "R" + "1" * (MAX_RESOLUTION + 1), "r1", "R1a"])
+def test_invalid(zone_id):
+    with pytest.raises(ValueError):
+        Zone.parse(zone_id)
+
+
+def test_as_int():
+    # Zones of different resolutions never compare equal, and sort by resolution then grid order
+    some = [Zone.parse(i) for i in ["S8", "N", "R12", "N0", "S", "R1"]]
+    assert len(set(some)) == len(some)
+    assert [str(z) for z in sorted(some)] == ["N", "S", "N0", "R1", "S8", "R12"]
+    assert Zone.parse("R1") == Zone.parse("R1") and hash(Zone.parse("R1")) == hash(Zone.parse("R1"))
+    assert np.array(some, dtype=np.int64).tolist() == [int(z) for z in some]